@@ -0,0 +1,40 @@
+import discord
+from discord.ext import commands
+import logging
+import config
+from services.attachment_store import AttachmentStore
+
+logger = logging.getLogger(__name__)
+
+class AttachmentArchiver(commands.Cog):
+    """Keeps local copies of attachments posted in archived channels so delete logs can re-upload them."""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.store = AttachmentStore(
+            config.ATTACHMENT_ARCHIVE_DIR,
+            config.ATTACHMENT_ARCHIVE_MAX_BYTES,
+            config.ATTACHMENT_ARCHIVE_CONCURRENCY
+        )
+
+    async def cog_unload(self):
+        await self.store.close()
+
+    def _is_archived(self, channel: discord.abc.GuildChannel) -> bool:
+        if channel.id in config.ATTACHMENT_ARCHIVE_CHANNEL_IDS:
+            return True
+        return getattr(channel, "category_id", None) in config.ATTACHMENT_ARCHIVE_CATEGORY_IDS
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        if not message.guild or not message.attachments:
+            return
+        if not self._is_archived(message.channel):
+            return
+        self.store.schedule(message)
+
+async def setup(bot: commands.Bot):
+    if not config.ATTACHMENT_ARCHIVE_ENABLED:
+        logger.info("Attachment archive disabled (config.ATTACHMENT_ARCHIVE_ENABLED is False).")
+        return
+    await bot.add_cog(AttachmentArchiver(bot))
@@ -1,6 +1,7 @@
 import discord
 from discord.ext import commands
 import datetime
+import os
 
 LOG_CHANNEL_ID = 1378035725752209478  # ID of the channel to send logs
 
@@ -37,14 +38,28 @@ class MessageLogger(commands.Cog):
 
         # Embed 2: attachments, embeds, or content
         if message.attachments:
+            # CDN links die with the message; prefer the archived local copy if there is one
+            archiver = self.bot.get_cog("AttachmentArchiver")
             for att in message.attachments:
+                local = await archiver.store.get(att.id) if archiver else None
+                # The archive may hold files bigger than this guild can take; link those instead
+                if local and os.path.getsize(local[0]) > message.guild.filesize_limit:
+                    local = None
+                file = discord.File(local[0], filename=local[1]) if local else None
                 # image attachments
                 if att.content_type and att.content_type.startswith("image"):
                     embed2 = discord.Embed(title="Deleted Image", color=discord.Color.dark_red())
-                    embed2.set_image(url=att.url)
+                    embed2.set_image(url=f"attachment://{file.filename}" if file else att.url)
                     embed2.set_footer(text=att.filename)
-                    await log_channel.send(embed=embed2)
+                    await log_channel.send(embed=embed2, file=file or discord.utils.MISSING)
                 # video or other files
+                elif file:
+                    embed2 = discord.Embed(
+                        title="Deleted Attachment",
+                        description=att.filename,
+                        color=discord.Color.dark_red()
+                    )
+                    await log_channel.send(embed=embed2, file=file)
                 else:
                     embed2 = discord.Embed(
                         title="Deleted Attachment",
@@ -1,12 +1,13 @@
 import discord
 from discord.ext import commands
 import config
-import sqlite3
-import io
 import logging
-import chat_exporter
 from datetime import datetime
-import asyncio
+from services.ticket_archive import get_ticket_archive
+from services.ticket_mirror import get_ticket_mirror
+from services.ticket_pool import is_pool_channel
+from services.tickets import Ticket, get_ticket_store
+from services.transcripts import send_transcript, transcript_embed
 
 logger = logging.getLogger(__name__)
 
@@ -16,62 +17,50 @@ class DevTicketListener(commands.Cog):
 
     @commands.Cog.listener()
     async def on_guild_channel_create(self, channel: discord.abc.GuildChannel):
+        if is_pool_channel(channel):
+            return
         if channel.category and channel.category.id == config.DEV_SUPPORT_CATEGORY_ID:
-            ticket_owner_id = None
-            timeout = 5.0
-            interval = 0.5
-            elapsed = 0.0
-            while elapsed < timeout:
-                try:
-                    conn = sqlite3.connect("dev_tickets.db")
-                    c = conn.cursor()
-                    c.execute("SELECT user_id FROM tickets WHERE channel_id = ?", (channel.id,))
-                    result = c.fetchone()
-                    conn.close()
-                    if result:
-                        ticket_owner_id = result[0]
-                        break
-                except Exception as e:
-                    logger.error(f"Error fetching ticket owner for channel {channel.id}: {e}")
-                await asyncio.sleep(interval)
-                elapsed += interval
-            
-            if ticket_owner_id is None:
+            # The panel registers the ticket once channel creation returns,
+            # which is usually just after this event arrives
+            timeout = config.TICKET_OWNER_WAIT_SECONDS
+            ticket = await get_ticket_store().wait_for(channel.id, timeout)
+            if ticket is None:
+                # The pool records a channel it created once creation returns, which may be after this event
+                if is_pool_channel(channel):
+                    return
                 logger.error(f"No ticket owner found for channel {channel.id} after waiting {timeout} seconds.")
                 return
+            await self._welcome(channel, ticket.user_id)
 
-            developer_role_mention = f"<@&{config.DEVELOPER_ROLE_ID}>"
-            ticket_owner_mention = f"<@{ticket_owner_id}>"
-
-            await channel.send(ticket_owner_mention)
-            embed = discord.Embed(
-                title="Ticket Management",
-                description=(
-                    f"Welcome {ticket_owner_mention}, {developer_role_mention} will be here shortly to help you.\n"
-                    "In the meantime, kindly describe your issue using the button below."
-                ),
-                color=config.EMBED_COLOR
-            )
-            view = TicketActionView(channel)
-            message = await channel.send(embed=embed, view=view)
-            view.message = message
+    @commands.Cog.listener()
+    async def on_ticket_claimed(self, channel: discord.TextChannel, ticket: Ticket):
+        """A pool channel became a ticket (services.ticket_pool); there was no channel-create event."""
+        await self._welcome(channel, ticket.user_id)
+
+    async def _welcome(self, channel: discord.TextChannel, ticket_owner_id: int):
+        developer_role_mention = f"<@&{config.DEVELOPER_ROLE_ID}>"
+        ticket_owner_mention = f"<@{ticket_owner_id}>"
+
+        await channel.send(ticket_owner_mention)
+        embed = discord.Embed(
+            title="Ticket Management",
+            description=(
+                f"Welcome {ticket_owner_mention}, {developer_role_mention} will be here shortly to help you.\n"
+                "In the meantime, kindly describe your issue using the button below."
+            ),
+            color=config.EMBED_COLOR
+        )
+        view = TicketActionView(channel)
+        message = await channel.send(embed=embed, view=view)
+        view.message = message
 
 class TicketActionView(discord.ui.View):
     def __init__(self, channel: discord.TextChannel):
         super().__init__(timeout=None)
         self.channel = channel
         self.message: discord.Message = None
-        self.ticket_owner_id = None
-        try:
-            conn = sqlite3.connect("dev_tickets.db")
-            c = conn.cursor()
-            c.execute("SELECT user_id FROM tickets WHERE channel_id = ?", (channel.id,))
-            result = c.fetchone()
-            if result:
-                self.ticket_owner_id = result[0]
-            conn.close()
-        except Exception as e:
-            logger.error(f"Error fetching ticket owner for channel {channel.id}: {e}")
+        ticket = get_ticket_store().get(channel.id)
+        self.ticket_owner_id = ticket.user_id if ticket else None
 
     @discord.ui.button(label="Describe your Issue", style=discord.ButtonStyle.primary)
     async def describe_issue(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -86,79 +75,60 @@ class TicketActionView(discord.ui.View):
         if interaction.user.id != self.ticket_owner_id:
             await interaction.response.send_message("You are not authorized to close this ticket.", ephemeral=True)
             return
-        try:
-            conn = sqlite3.connect("tickethold.db")
-            c = conn.cursor()
-            c.execute("SELECT channel_id FROM ticket_hold WHERE channel_id = ?", (interaction.channel.id,))
-            if c.fetchone():
-                await interaction.response.send_message("This ticket is currently on hold. Please unhold before closing.", ephemeral=True)
-                conn.close()
-                return
-            conn.close()
-        except Exception as e:
-            await interaction.response.send_message("Error checking ticket hold status.", ephemeral=True)
+        store = get_ticket_store()
+        if store.is_held(interaction.channel.id):
+            await interaction.response.send_message("This ticket is currently on hold. Please unhold before closing.", ephemeral=True)
             return
         try:
-            transcript = await chat_exporter.export(interaction.channel)
-            transcript_file = discord.File(io.StringIO(transcript), filename=f"transcript-{interaction.channel.id}.html")
+            # From the local mirror; one history pass feeds transcript and count otherwise
+            transcript = await get_ticket_mirror().export(interaction.channel)
         except Exception as e:
             logger.error(f"Error generating transcript: {e}")
             await interaction.response.send_message("Failed to generate transcript.", ephemeral=True)
             return
-        try:
-            messages = [msg async for msg in interaction.channel.history(limit=None)]
-            message_count = len(messages)
-        except Exception as e:
-            logger.error(f"Error counting messages in channel {interaction.channel.id}: {e}")
-            message_count = "N/A"
+        message_count = transcript.message_count
 
-        ticket_created_epoch = 0
-        try:
-            conn = sqlite3.connect("dev_tickets.db")
-            c = conn.cursor()
-            c.execute("SELECT created FROM tickets WHERE channel_id = ?", (interaction.channel.id,))
-            result = c.fetchone()
-            if result:
-                ticket_created_str = result[0]
-                ticket_created_dt = datetime.fromisoformat(ticket_created_str)
-                ticket_created_epoch = int(ticket_created_dt.timestamp())
-        except Exception as e:
-            logger.error(f"Error fetching ticket creation time for channel {interaction.channel.id}: {e}")
-        finally:
-            conn.close()
+        ticket = store.get(interaction.channel.id)
+        ticket_created_epoch = ticket.created_epoch() if ticket else 0
 
         ticket_closed_epoch = int(datetime.utcnow().timestamp())
         ticket_name = interaction.channel.name
         ticket_category = interaction.channel.category.name if interaction.channel.category else "None"
         ticket_owner_mention = f"<@{self.ticket_owner_id}>"
-        embed_transcript = discord.Embed(
-            title="Ticket Transcript",
-            description="Below are the details of the closed ticket:",
-            color=config.EMBED_COLOR
+        embed_transcript = transcript_embed(
+            ticket_name, ticket_category, "User Involved", f"{ticket_owner_mention} - {message_count} messages",
+            ticket_created_epoch, ticket_closed_epoch
         )
-        embed_transcript.add_field(name="Ticket Name", value=ticket_name, inline=True)
-        embed_transcript.add_field(name="Ticket Category", value=ticket_category, inline=True)
-        embed_transcript.add_field(name="User Involved", value=f"{ticket_owner_mention} - {message_count} messages", inline=False)
-        embed_transcript.add_field(name="Ticket Created at", value=f"<t:{ticket_created_epoch}:F>", inline=False)
-        embed_transcript.add_field(name="Ticket Closed at", value=f"<t:{ticket_closed_epoch}:F>", inline=False)
 
         transcript_channel = interaction.guild.get_channel(config.DEV_SUPPORT_TRANSCRIPT_CHANNEL_ID)
-        if transcript_channel:
-            await transcript_channel.send(embed=embed_transcript, file=transcript_file)
-        else:
-            logger.error("Transcript channel not found in guild.")
-            await interaction.response.send_message("Transcript channel not found.", ephemeral=True)
-            return
         try:
-            conn = sqlite3.connect("dev_tickets.db")
-            c = conn.cursor()
-            c.execute("DELETE FROM tickets WHERE channel_id = ?", (interaction.channel.id,))
-            conn.commit()
-            conn.close()
-        except Exception as e:
-            logger.error(f"Error deleting ticket data for channel {interaction.channel.id}: {e}")
-            await interaction.response.send_message("Failed to remove ticket data from the database.", ephemeral=True)
-            return
+            if transcript_channel:
+                try:
+                    await send_transcript(
+                        transcript_channel, embed_transcript, transcript,
+                        f"transcript-{interaction.channel.id}.html.gz", interaction.guild.filesize_limit
+                    )
+                except discord.HTTPException as e:
+                    logger.error(f"Failed to post the transcript for channel {interaction.channel.id}: {e}")
+                    await interaction.response.send_message(
+                        "Failed to post the transcript; the ticket was left open.", ephemeral=True
+                    )
+                    return
+            else:
+                logger.error("Transcript channel not found in guild.")
+                await interaction.response.send_message("Transcript channel not found.", ephemeral=True)
+                return
+            try:
+                store.remove(interaction.channel.id)
+                get_ticket_mirror().forget(interaction.channel.id)
+                if ticket is not None:
+                    get_ticket_archive().enqueue(ticket, ticket_name, ticket_category, transcript)
+            except Exception as e:
+                logger.error(f"Error deleting ticket data for channel {interaction.channel.id}: {e}")
+                await interaction.response.send_message("Failed to remove ticket data from the database.", ephemeral=True)
+                return
+        finally:
+            transcript.discard()
 
         await interaction.response.send_message("Ticket closed successfully. ", ephemeral=True)
         await interaction.channel.delete()
@@ -0,0 +1,136 @@
+import discord
+from discord.ext import commands, tasks
+import logging
+import config
+from datetime import datetime
+from services.ticket_archive import get_ticket_archive
+from services.ticket_mirror import get_ticket_mirror
+from services.tickets import get_ticket_store
+from services.transcripts import send_transcript, transcript_embed, user_breakdown
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL_SECONDS = 5
+
+class TicketMirrorListener(commands.Cog):
+    """Keeps services.ticket_mirror in step with messages, edits and deletes in ticket channels."""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.mirror = get_ticket_mirror()
+        self._backfilled = False
+        self.flush_loop.start()
+
+    async def cog_unload(self):
+        self.flush_loop.cancel()
+        await self.mirror.flush()
+
+    @tasks.loop(seconds=FLUSH_INTERVAL_SECONDS)
+    async def flush_loop(self):
+        await self.mirror.flush()
+
+    def _is_ticket_channel(self, channel) -> bool:
+        return getattr(channel, "category_id", None) in config.TICKET_CATEGORY_IDS
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # Channels opened before mirroring started are copied once; later ones are followed from creation.
+        # Channels mirrored before a restart only fetch what was posted while the bot was offline.
+        if self._backfilled:
+            return
+        self._backfilled = True
+        for category_id in set(config.TICKET_CATEGORY_IDS):
+            category = self.bot.get_channel(category_id)
+            if not isinstance(category, discord.CategoryChannel):
+                continue
+            for channel in category.text_channels:
+                if channel.id in self.mirror.complete:
+                    continue
+                try:
+                    if channel.id in self.mirror.resumable:
+                        await self.mirror.catch_up(channel)
+                    else:
+                        await self.mirror.backfill(channel)
+                except discord.HTTPException as e:
+                    logger.error(f"Error backfilling ticket mirror for channel {channel.id}: {e}")
+
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel: discord.abc.GuildChannel):
+        if isinstance(channel, discord.TextChannel) and self._is_ticket_channel(channel):
+            self.mirror.mark_complete(channel.id)
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        if message.guild and self._is_ticket_channel(message.channel):
+            self.mirror.put(message)
+
+    @commands.Cog.listener()
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent):
+        if not self._is_ticket_channel(self.bot.get_channel(payload.channel_id)):
+            return
+        data = payload.data
+        embeds = None
+        if "embeds" in data:
+            embeds = [(e.get("title") or "", e.get("description") or "") for e in data["embeds"]]
+        self.mirror.edit(payload.message_id, data.get("content"), embeds)
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        if self._is_ticket_channel(self.bot.get_channel(payload.channel_id)):
+            self.mirror.delete(payload.message_id)
+
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload: discord.RawBulkMessageDeleteEvent):
+        if self._is_ticket_channel(self.bot.get_channel(payload.channel_id)):
+            for message_id in payload.message_ids:
+                self.mirror.delete(message_id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
+        """A ticket channel deleted without closing: post its transcript from the mirror."""
+        store = get_ticket_store()
+        ticket = store.get(channel.id)
+        caught_up = channel.id in self.mirror.complete
+        if ticket is None or not (caught_up or channel.id in self.mirror.resumable):
+            return
+        try:
+            transcript = await self.mirror.export_local(channel.id, f"#{channel.name}")
+        except Exception as e:
+            logger.error(f"Error generating transcript for deleted channel {channel.id}: {e}")
+            return
+        try:
+            embed = transcript_embed(
+                channel.name,
+                channel.category.name if channel.category else "None",
+                "Users Involved",
+                user_breakdown(transcript.counts) or "N/A",
+                ticket.created_epoch(),
+                int(datetime.utcnow().timestamp())
+            )
+            footer = "The ticket channel was deleted without being closed."
+            if not caught_up:
+                footer += " Messages sent while the bot was offline may be missing."
+            embed.set_footer(text=footer)
+            transcript_channel = channel.guild.get_channel(config.DEV_SUPPORT_TRANSCRIPT_CHANNEL_ID)
+            if transcript_channel is None:
+                logger.error("Transcript channel not found in guild.")
+                return
+            try:
+                await send_transcript(
+                    transcript_channel, embed, transcript, f"transcript-{channel.id}.html.gz",
+                    channel.guild.filesize_limit
+                )
+            except discord.HTTPException as e:
+                # The channel is already gone; leave the ticket and its mirrored messages in place
+                logger.error(f"Failed to post the transcript for deleted channel {channel.id}: {e}")
+                return
+            store.remove(channel.id)
+            self.mirror.forget(channel.id)
+            get_ticket_archive().enqueue(
+                ticket, channel.name, channel.category.name if channel.category else "None", transcript
+            )
+        finally:
+            transcript.discard()
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(TicketMirrorListener(bot))
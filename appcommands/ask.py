@@ -1,8 +1,14 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
-import aiohttp
 import config
+from services.gemini import GeminiError
+from services.model_router import get_model_router
+from services.ai_scheduler import PRIORITY_NORMAL, get_ai_scheduler
+from services.faq_index import match_question, send_faq_answer
+from services.ai_cache import cache_key, get_response_cache
+from services.streaming_reply import StreamingReply
+from services.usage import QuotaExceeded, get_usage_ledger, usage_counts
 
 class AskApp(commands.Cog):
     def __init__(self, bot: commands.Bot):
@@ -17,6 +23,21 @@ class AskApp(commands.Cog):
     )
     @app_commands.describe(question="Your question for Suvo")
     async def ask(self, interaction: discord.Interaction, question: str):
+        # Questions a tag already answers skip the model (and the quota)
+        tag = match_question(question)
+        if tag:
+            await interaction.response.defer()
+            await send_faq_answer(lambda content, **kwargs: interaction.followup.send(content, wait=True, **kwargs), tag)
+            return
+
+        ledger = get_usage_ledger()
+        try:
+            ledger.check(interaction.user.id)
+        except QuotaExceeded:
+            await interaction.response.send_message(
+                "You've used today's AI quota. It resets at midnight UTC.", ephemeral=True
+            )
+            return
         await interaction.response.defer()
         system_text = (
             "You are Suvo, an intelligent AI assistant created by Gaurav. "
@@ -31,20 +52,46 @@ class AskApp(commands.Cog):
             ],
             "generationConfig": {"temperature": 0.7, "maxOutputTokens": 150}
         }
-        url = (
-            f"https://generativelanguage.googleapis.com/v1beta/models/"
-            f"{config.GEMINI_MODEL}:generateContent?key={config.GEMINI_API_KEY}"
-        )
+        # The deferred followup is edited in place as the answer streams in
+        stream = StreamingReply(lambda content: interaction.followup.send(content, wait=True))
+        await stream.start()
+
+        router = get_model_router()
+        # The model that answered, so the cache files the answer under it
+        route = {}
+
+        async def fetch() -> str:
+            usage = {}
+
+            async def answer():
+                async for chunk in router.stream(payload, usage, route):
+                    await stream.feed(chunk)
+
+            try:
+                await get_ai_scheduler().run(
+                    interaction.user.id,
+                    answer,
+                    PRIORITY_NORMAL,
+                    on_queued=lambda pos: stream.status(f"You're #{pos} in the queue…"),
+                )
+            finally:
+                if usage or stream.text:
+                    ledger.record(interaction.user.id, *usage_counts(usage, payload, stream.text))
+            return stream.text
+
+        # Identical questions are answered from the cache or share one in-flight call
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=payload) as resp:
-                    resp.raise_for_status()
-                    data = await resp.json()
-            parts = data["candidates"][0]["content"]["parts"]
-            reply = "".join(p.get("text", "") for p in parts)
-        except Exception as e:
-            reply = f"Error: {e}"
-        await interaction.followup.send(reply)
+            text, streamed = await get_response_cache().get_or_compute(
+                cache_key(payload, router.current_model()),
+                fetch,
+                store_key=lambda: cache_key(payload, route.get("model", router.current_model())),
+            )
+            if not streamed:
+                await stream.feed(text)
+        except GeminiError as e:
+            await stream.fail(f"Error: {e}")
+            return
+        await stream.finish("Sorry, I couldn't process that.")
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(AskApp(bot))
@@ -0,0 +1,38 @@
+import discord
+from discord import app_commands
+from discord.ext import commands
+import config
+from services.tag_index import get_tag_index
+from services.tag_files import send_tag_file
+
+class TagApp(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    @app_commands.command(name="tag", description="Show a saved tag.")
+    @app_commands.guilds(discord.Object(id=config.GUILD_ID))
+    @app_commands.describe(name="Tag name")
+    async def tag(self, interaction: discord.Interaction, name: str):
+        entry = get_tag_index().get(name)
+        if entry is None:
+            await interaction.response.send_message(f"Tag '{name}' not found.", ephemeral=True)
+            return
+
+        tag_message, file_path = entry
+        if file_path:
+            # Defer so the followup returns the sent message and its attachment URL
+            await interaction.response.defer()
+            await send_tag_file(interaction.followup.send, name, tag_message, file_path, wait=True)
+        else:
+            await interaction.response.send_message(tag_message)
+
+    @tag.autocomplete("name")
+    async def tag_autocomplete(self, interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
+        # Served entirely from the in-memory index, well inside Discord's 3s window
+        return [
+            app_commands.Choice(name=tag[:100], value=tag)
+            for tag in get_tag_index().complete(current, limit=25)
+        ]
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(TagApp(bot))
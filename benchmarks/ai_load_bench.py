@@ -0,0 +1,332 @@
+"""
+End-to-end load test of the AI features against the Gemini stub.
+
+Synthetic mention, !ask thread and /ask traffic is fed through the real cogs
+(precommands/ai_mention.py, precommands/ai.py, appcommands/ask.py) with
+fake Discord objects, so the scheduler, router, cache, streaming edits and
+usage accounting all run as in production. No Discord connection needed.
+
+    python -m benchmarks.ai_load_bench [--scenario steady|storm|timeouts|all]
+                                       [--duration 20] [--rate 6] [--cancel-rate 0.05]
+"""
+import argparse
+import asyncio
+import itertools
+import random
+import tempfile
+import time
+import types
+
+import discord
+
+import config
+from benchmarks.gemini_stub import StubSettings, start_stub
+
+PORT = 8092
+BOT_ID = 4242
+ERROR_PREFIXES = ("Error", "The AI service is busy", "An error occurred", "Sorry, I couldn't")
+
+SCENARIOS = {
+    "steady": dict(latency="lognormal:0.4:0.5"),
+    "storm": dict(latency="lognormal:0.4:0.5", storm_every=10, storm_length=3),
+    "timeouts": dict(latency="lognormal:0.4:0.5", timeout_rate=0.05),
+}
+
+_ids = itertools.count(10_000)
+
+
+class Request:
+    """One synthetic user action and what the user saw."""
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.started = time.perf_counter()
+        self.first_text: float | None = None
+        self.done: float | None = None
+        self.last_content = ""
+        self.deleted = False
+
+    def saw(self, content: str):
+        self.last_content = content
+        visible = content and content != "…" and not content.startswith("You're #")
+        if visible and self.first_text is None:
+            self.first_text = time.perf_counter() - self.started
+
+    @property
+    def outcome(self) -> str:
+        if self.deleted:
+            return "cancelled"
+        if self.last_content.startswith(ERROR_PREFIXES):
+            return "error"
+        return "ok"
+
+
+class FakeUser:
+    def __init__(self, user_id: int, bot: bool = False):
+        self.id = user_id
+        self.bot = bot
+        self.display_name = f"user{user_id}"
+        self.mention = f"<@{user_id}>"
+
+    def __eq__(self, other):
+        return getattr(other, "id", None) == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+
+class FakeSentMessage:
+    def __init__(self, request: Request, channel, content: str):
+        self.id = next(_ids)
+        self.request = request
+        self.channel = channel
+        self.content = content
+        self.attachments = []
+        request.saw(content)
+
+    async def edit(self, content: str = None, **kwargs):
+        await asyncio.sleep(0.01)
+        self.content = content
+        self.request.saw(content)
+        return self
+
+    async def delete(self):
+        self.request.deleted = True
+
+
+class FakeChannel:
+    def __init__(self, channel_id: int, request: Request):
+        self.id = channel_id
+        self.request = request
+
+    async def send(self, content: str = "", **kwargs):
+        await asyncio.sleep(0.01)
+        return FakeSentMessage(self.request, self, content)
+
+    async def fetch_message(self, message_id: int):
+        raise discord.NotFound(types.SimpleNamespace(status=404, reason="Not Found"), "unknown message")
+
+
+class FakeThread(discord.Thread):
+    """Passes the cog's isinstance(channel, discord.Thread) check."""
+
+    def __init__(self, thread_id: int, request: Request):
+        self.id = thread_id
+        self.request = request
+
+    async def send(self, content: str = "", **kwargs):
+        await asyncio.sleep(0.01)
+        return FakeSentMessage(self.request, self, content)
+
+
+class FakeMessage:
+    def __init__(self, request: Request, author: FakeUser, channel, content: str, mentions=()):
+        self.id = next(_ids)
+        self.request = request
+        self.author = author
+        self.channel = channel
+        self.content = content
+        self.mentions = list(mentions)
+        self.guild = types.SimpleNamespace(id=config.GUILD_ID)
+        self.reference = None
+
+    async def reply(self, content: str = "", **kwargs):
+        await asyncio.sleep(0.01)
+        return FakeSentMessage(self.request, self.channel, content)
+
+
+class FakeInteraction:
+    def __init__(self, request: Request, user: FakeUser):
+        self.request = request
+        self.user = user
+        channel = FakeChannel(next(_ids), request)
+        self.response = types.SimpleNamespace(defer=self._defer, send_message=self._send)
+        self.followup = types.SimpleNamespace(send=lambda content="", **kwargs: channel.send(content))
+
+    async def _defer(self, **kwargs):
+        await asyncio.sleep(0.01)
+
+    async def _send(self, content: str = "", **kwargs):
+        self.request.saw(content)
+
+
+class FakeBot:
+    def __init__(self):
+        self.user = FakeUser(BOT_ID, bot=True)
+        self.tree = types.SimpleNamespace(add_command=lambda *args, **kwargs: None)
+
+    async def wait_until_ready(self):
+        pass
+
+    def get_channel(self, channel_id: int):
+        return None
+
+
+QUESTIONS = [f"question {n}: how does feature {n % 37} work with setting {n % 11}?" for n in range(400)]
+
+
+def pick_question() -> str:
+    # A few popular questions repeat, most are unique
+    return QUESTIONS[min(int(random.paretovariate(1.2)) - 1, len(QUESTIONS) - 1)] if random.random() < 0.3 \
+        else random.choice(QUESTIONS)
+
+
+def reset_services():
+    """Fresh shared singletons, so scenarios don't see each other's state."""
+    import services.ai_cache
+    import services.ai_scheduler
+    import services.conversations
+    import services.gemini
+    import services.message_cache
+    import services.model_router
+    import services.scheduler
+    import services.usage
+    services.gemini._client = None
+    services.model_router._router = None
+    services.ai_scheduler._scheduler = None
+    services.ai_cache._cache = None
+    services.conversations._store = None
+    services.usage._ledger = None
+    services.message_cache._cache = None
+    services.scheduler._scheduler = None
+
+
+def pct(samples: list[float], p: float) -> float:
+    if not samples:
+        return float("nan")
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+async def run_scenario(name: str, duration: float, rate: float, cancel_rate: float):
+    from appcommands.ask import AskApp
+    from precommands.ai import AskCog
+    from precommands.ai_mention import MentionAskCog
+    from services.ai_cache import get_response_cache
+    from services.ai_scheduler import get_ai_scheduler
+    from services.gemini import close_gemini_client, get_gemini_client
+    from services.model_router import get_model_router
+
+    reset_services()
+    settings = StubSettings(chunks=12, chunk_delay=0.04, **SCENARIOS[name])
+    runner = await start_stub(PORT, settings)
+
+    bot = FakeBot()
+    ask_cog = AskCog(bot)
+    mention_cog = MentionAskCog(bot)
+    slash_cog = AskApp(bot)
+    mention_users = [FakeUser(uid) for uid in MentionAskCog.ALLOWED_USER_IDS]
+
+    threads = []
+    for n in range(12):
+        owner = FakeUser(20_000 + n)
+        thread_id = 30_000 + n
+        ask_cog.store.create(thread_id, owner.id, 1800)
+        threads.append((thread_id, owner))
+
+    requests: list[Request] = []
+    tasks: list[asyncio.Task] = []
+
+    async def mention():
+        request = Request("mention")
+        message = FakeMessage(
+            request, random.choice(mention_users), FakeChannel(1, request),
+            f"<@{BOT_ID}> {pick_question()}", mentions=[bot.user]
+        )
+        if random.random() < cancel_rate:
+            async def delete_later():
+                await asyncio.sleep(random.uniform(0.05, 1.5))
+                payload = types.SimpleNamespace(message_id=message.id)
+                await mention_cog.on_raw_message_delete(payload)
+                await ask_cog.on_raw_message_delete(payload)
+            tasks.append(asyncio.create_task(delete_later()))
+        await mention_cog.on_message(message)
+        return request
+
+    async def thread():
+        request = Request("thread")
+        thread_id, owner = random.choice(threads)
+        await ask_cog.on_message(FakeMessage(request, owner, FakeThread(thread_id, request), pick_question()))
+        return request
+
+    async def slash():
+        request = Request("slash")
+        user = FakeUser(40_000 + random.randrange(30))
+        await slash_cog.ask.callback(slash_cog, FakeInteraction(request, user), pick_question())
+        return request
+
+    async def timed(make):
+        try:
+            request = await make()
+        except asyncio.CancelledError:
+            return
+        request.done = time.perf_counter() - request.started
+        requests.append(request)
+
+    started = time.perf_counter()
+    while time.perf_counter() - started < duration:
+        make = random.choices((mention, thread, slash), weights=(3, 4, 3))[0]
+        tasks.append(asyncio.create_task(timed(make)))
+        await asyncio.sleep(random.expovariate(rate))
+    await asyncio.gather(*tasks, return_exceptions=True)
+    elapsed = time.perf_counter() - started
+
+    metrics = get_gemini_client().metrics
+    scheduler = get_ai_scheduler().stats()
+    cache = get_response_cache().stats()
+    decisions = dict(get_model_router().decisions)
+    await close_gemini_client()
+    await runner.cleanup()
+
+    print(f"\n== {name}: {len(requests)} requests in {elapsed:.1f}s ({len(requests) / elapsed:.1f} req/s)")
+    print(f"{'':<8} {'count':>5} {'ok':>4} {'err':>4} {'canc':>4}   {'p50':>6} {'p95':>6} {'p99':>6}   first text p50/p95")
+    for kind in ("mention", "thread", "slash", "all"):
+        group = [r for r in requests if kind == "all" or r.kind == kind]
+        done = [r.done for r in group if r.outcome == "ok"]
+        first = [r.first_text for r in group if r.first_text is not None and r.outcome == "ok"]
+        outcomes = [r.outcome for r in group]
+        print(
+            f"{kind:<8} {len(group):>5} {outcomes.count('ok'):>4} {outcomes.count('error'):>4} "
+            f"{outcomes.count('cancelled'):>4}   {pct(done, 50):6.2f} {pct(done, 95):6.2f} {pct(done, 99):6.2f}   "
+            f"{pct(first, 50):.2f} / {pct(first, 95):.2f}"
+        )
+    print(
+        f"gemini calls {metrics.calls}  retries {metrics.retries}  failures {metrics.failures}  "
+        f"cancelled {scheduler['cancelled']}  cache hit rate {cache['hit_rate']:.0%}"
+    )
+    print(
+        f"stub requests {settings.requests}  503s {settings.errors}  hangs {settings.hangs}  "
+        f"router {decisions}"
+    )
+
+
+async def run(args):
+    workdir = tempfile.mkdtemp(prefix="ai_load_bench_")
+    config.GEMINI_API_BASE = f"http://127.0.0.1:{PORT}/v1beta"
+    config.GEMINI_REQUESTS_PER_MINUTE = 100000
+    config.GEMINI_TOKENS_PER_MINUTE = 10 ** 9
+    # Short enough that hung requests show up within a run
+    config.GEMINI_TIMEOUT = 3
+    config.AI_CONVERSATIONS_DB = f"{workdir}/conversations.db"
+    config.AI_USAGE_DB = f"{workdir}/usage.db"
+    config.SCHEDULER_DB = f"{workdir}/scheduler.db"
+    config.AI_CACHE_PERSIST = False
+    config.AI_FAQ_ENABLED = False
+    config.AI_DAILY_TOKEN_QUOTA = 0
+
+    names = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+    for name in names:
+        await run_scenario(name, args.duration, args.rate, args.cancel_rate)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenario", default="all", choices=[*SCENARIOS, "all"])
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--rate", type=float, default=6.0, help="requests per second")
+    parser.add_argument("--cancel-rate", type=float, default=0.05, help="share of mentions deleted early")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Model routing against injected faults: fallback on an overloaded primary,
+and p90 hedging against a slow first-token tail.
+
+Runs against benchmarks.gemini_stub on a local port; no Discord connection needed.
+
+    python -m benchmarks.ai_router_bench
+"""
+import asyncio
+import statistics
+import time
+
+import config
+from benchmarks.gemini_stub import StubSettings, start_stub
+from services.gemini import GeminiError, close_gemini_client, get_gemini_client
+from services.model_router import ModelRouter
+
+PORT = 8091
+PRIMARY = "primary-model"
+FALLBACK = "lite-model"
+
+PAYLOAD = {
+    "contents": [{"role": "user", "parts": [{"text": "What time is the event?"}]}],
+    "generationConfig": {"maxOutputTokens": 100},
+}
+
+
+def pct(samples: list[float], p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+async def first_chunk(stream) -> float:
+    started = time.perf_counter()
+    first = None
+    async for _ in stream:
+        if first is None:
+            first = time.perf_counter() - started
+    return first
+
+
+async def overload(settings: StubSettings):
+    settings.overloaded_models = {PRIMARY}
+    client = get_gemini_client()
+    router = ModelRouter(client, PRIMARY, FALLBACK)
+    for name, make_stream in (
+        ("same model + backoff", lambda: client.stream_generate(PAYLOAD, PRIMARY)),
+        ("router + fallback", lambda: router.stream(PAYLOAD)),
+    ):
+        ok, samples = 0, []
+        for _ in range(10):
+            started = time.perf_counter()
+            try:
+                await first_chunk(make_stream())
+                ok += 1
+            except GeminiError:
+                pass
+            samples.append(time.perf_counter() - started)
+        print(f"  {name:<22} answered {ok}/10   mean {statistics.mean(samples):5.2f}s")
+    print(f"  router decisions: {dict(router.decisions)}")
+    settings.overloaded_models = set()
+
+
+async def tail(settings: StubSettings):
+    settings.tail_rate, settings.tail_delay = 0.1, 1.5
+    client = get_gemini_client()
+    for hedge in (False, True):
+        config.AI_HEDGE_ENABLED = hedge
+        router = ModelRouter(client, PRIMARY)
+        samples = []
+        for _ in range(150):
+            samples.append(await first_chunk(router.stream(PAYLOAD)))
+        # Skip warm-up until the router has enough samples to hedge
+        samples = samples[config.AI_HEDGE_MIN_SAMPLES:]
+        print(
+            f"  {'hedged' if hedge else 'single':<22} first chunk p50 {pct(samples, 50):5.2f}s   "
+            f"p95 {pct(samples, 95):5.2f}s   p99 {pct(samples, 99):5.2f}s   "
+            f"hedged {router.decisions['hedged']}   won {router.decisions['hedge_won']}"
+        )
+
+
+async def run():
+    config.GEMINI_API_BASE = f"http://127.0.0.1:{PORT}/v1beta"
+    config.GEMINI_REQUESTS_PER_MINUTE = 100000
+    config.GEMINI_TOKENS_PER_MINUTE = 10 ** 9
+    settings = StubSettings(chunks=5, chunk_delay=0.01, first_delay=0.1)
+    runner = await start_stub(PORT, settings)
+    try:
+        print("Primary overloaded (every request 503):")
+        await overload(settings)
+        print("Slow tail (10% of requests +1.5s before the first token):")
+        await tail(settings)
+    finally:
+        await close_gemini_client()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
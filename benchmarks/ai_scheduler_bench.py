@@ -0,0 +1,92 @@
+"""
+Latency of light users while one user floods the AI queue: plain FIFO
+semaphore vs the fair per-user scheduler.
+
+Runs against benchmarks.gemini_stub on a local port; no Discord connection needed.
+
+    python -m benchmarks.ai_scheduler_bench
+"""
+import asyncio
+import contextlib
+import statistics
+import time
+
+import config
+from benchmarks.gemini_stub import StubSettings, start_stub
+from services.ai_scheduler import AIScheduler
+from services.gemini import close_gemini_client, get_gemini_client
+
+PORT = 8090
+SLOTS = 4
+FLOOD_REQUESTS = 60
+LIGHT_USERS = 6
+LIGHT_REQUESTS = 4
+LIGHT_INTERVAL = 1.0
+
+PAYLOAD = {
+    "contents": [{"role": "user", "parts": [{"text": "Hello"}]}],
+    "generationConfig": {"maxOutputTokens": 100},
+}
+
+
+def p95(samples: list[float]) -> float:
+    return statistics.quantiles(samples, n=20)[-1] if len(samples) > 1 else samples[0]
+
+
+async def ask(slot, user_id: int) -> float:
+    started = time.perf_counter()
+    async with slot(user_id):
+        async for _ in get_gemini_client().stream_generate(PAYLOAD):
+            pass
+    return time.perf_counter() - started
+
+
+async def scenario(slot, flood: bool) -> list[float]:
+    async def light_user(user_id: int) -> list[float]:
+        samples = []
+        for _ in range(LIGHT_REQUESTS):
+            samples.append(await ask(slot, user_id))
+            await asyncio.sleep(LIGHT_INTERVAL)
+        return samples
+
+    flooder = [asyncio.create_task(ask(slot, 0)) for _ in range(FLOOD_REQUESTS)] if flood else []
+    await asyncio.sleep(0.05)
+    light = await asyncio.gather(*(light_user(u) for u in range(1, LIGHT_USERS + 1)))
+    await asyncio.gather(*flooder)
+    return [s for samples in light for s in samples]
+
+
+def fifo_slot():
+    semaphore = asyncio.Semaphore(SLOTS)
+
+    @contextlib.asynccontextmanager
+    async def slot(user_id: int):
+        async with semaphore:
+            yield
+    return slot
+
+
+async def run():
+    config.GEMINI_API_BASE = f"http://127.0.0.1:{PORT}/v1beta"
+    config.GEMINI_MAX_CONCURRENCY = SLOTS * 2
+    config.GEMINI_REQUESTS_PER_MINUTE = 100000
+    config.GEMINI_TOKENS_PER_MINUTE = 10 ** 9
+    runner = await start_stub(PORT, StubSettings(chunks=10, chunk_delay=0.03, first_delay=0.2))
+    try:
+        for name, make_slot, flood in (
+            ("quiet", fifo_slot, False),
+            ("fifo+flood", fifo_slot, True),
+            ("fair+flood", lambda: AIScheduler(SLOTS).slot, True),
+        ):
+            samples = await scenario(make_slot(), flood)
+            print(
+                f"{name:<11} light users: p50 {statistics.median(samples):5.2f}s   "
+                f"p95 {p95(samples):5.2f}s   max {max(samples):5.2f}s"
+            )
+    finally:
+        await close_gemini_client()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
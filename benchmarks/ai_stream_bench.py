@@ -0,0 +1,82 @@
+"""
+Time to first visible text: blocking generateContent vs streamed progressive edits.
+
+Runs against benchmarks.gemini_stub on a local port; no Discord connection needed.
+
+    python -m benchmarks.ai_stream_bench
+"""
+import asyncio
+import time
+
+import config
+from benchmarks.gemini_stub import StubSettings, start_stub
+from services.gemini import extract_text, get_gemini_client, close_gemini_client
+from services.streaming_reply import StreamingReply
+
+PORT = 8089
+
+
+class FakeMessage:
+    def __init__(self, channel: "FakeChannel", content: str):
+        self.channel = channel
+        self.content = content
+
+    async def edit(self, content: str):
+        self.content = content
+        self.channel.log("edit", content)
+
+
+class FakeChannel:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.events: list[tuple[float, str, int]] = []
+
+    def log(self, kind: str, content: str):
+        self.events.append((time.perf_counter() - self.started, kind, len(content)))
+
+    async def send(self, content: str) -> FakeMessage:
+        self.log("send", content)
+        return FakeMessage(self, content)
+
+    def first_text(self) -> float:
+        # The placeholder does not count as visible text
+        return next(t for t, _, size in self.events if size > 1)
+
+
+PAYLOAD = {
+    "contents": [{"role": "user", "parts": [{"text": "Give me the lyrics."}]}],
+    "generationConfig": {"temperature": 0.3, "maxOutputTokens": 8192},
+}
+
+
+async def run():
+    config.GEMINI_API_BASE = f"http://127.0.0.1:{PORT}/v1beta"
+    runner = await start_stub(PORT, StubSettings(chunks=60, chunk_delay=0.05, first_delay=0.3))
+    client = get_gemini_client()
+    try:
+        blocking = FakeChannel()
+        text = extract_text(await client.generate(PAYLOAD))
+        for i in range(0, len(text), 2000):
+            await blocking.send(text[i:i + 2000])
+
+        streamed = FakeChannel()
+        reply = StreamingReply(streamed.send, interval=1.0)
+        await reply.start()
+        async for chunk in client.stream_generate(PAYLOAD):
+            await reply.feed(chunk)
+        await reply.finish()
+
+        for name, channel in (("blocking", blocking), ("streamed", streamed)):
+            sends = sum(1 for _, kind, _ in channel.events if kind == "send")
+            edits = sum(1 for _, kind, _ in channel.events if kind == "edit")
+            print(
+                f"{name:<9} first text {channel.first_text():6.2f}s   "
+                f"done {channel.events[-1][0]:6.2f}s   messages {sends}   edits {edits}"
+            )
+    finally:
+        await close_gemini_client()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
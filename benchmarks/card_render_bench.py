@@ -0,0 +1,127 @@
+"""
+Benchmark of-the-day card rendering: the old on-loop renderer against services.cards.
+
+Reports cards/sec and the longest event-loop stall seen by a 5 ms heartbeat
+while the cards render.
+
+    python -m benchmarks.card_render_bench [--cards 200] [--workers 1]
+"""
+import argparse
+import asyncio
+import json
+import time
+from io import BytesIO
+
+from PIL import Image, ImageDraw, ImageFont
+
+from services import cards
+from services.cards import CardRenderer, render_korean_card
+
+HEARTBEAT_SECONDS = 0.005
+BG_HEX = "#C8E6C9"
+
+
+def old_render(korean_word: str, romanization: str, meaning: str) -> bytes:
+    """The renderer DayoftheDay used before services.cards: a new truetype font per 2pt step."""
+    img = Image.new("RGB", cards.KOREAN_CARD_SIZE, color=(200, 230, 201))
+    draw = ImageDraw.Draw(img)
+    max_width = cards.KOREAN_CARD_SIZE[0] - 20
+    font_size = cards.KOREAN_MAIN_FONT_SIZE
+    while font_size > 10:
+        main_font = ImageFont.truetype(cards.FONT_PATH, font_size)
+        bbox = draw.textbbox((0, 0), korean_word, font=main_font)
+        if bbox[2] - bbox[0] <= max_width:
+            break
+        font_size -= 2
+    sub_font = ImageFont.truetype(cards.FONT_PATH, cards.KOREAN_SUB_FONT_SIZE)
+    y = 10
+    for text, font in ((korean_word, main_font), (f"[{romanization}]", sub_font), (meaning, sub_font)):
+        bbox = draw.textbbox((0, 0), text, font=font)
+        draw.text(((cards.KOREAN_CARD_SIZE[0] - bbox[2]) // 2, y), text, font=font, fill=(0, 0, 0))
+        y += bbox[3] - bbox[1] + cards.KOREAN_SPACING
+    buffer = BytesIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def load_entries(n: int) -> list[tuple[str, str, str]]:
+    entries = []
+    for path in ("words.json", "phrases.json"):
+        with open(path, encoding="utf-8") as f:
+            entries += [(e.get("korean", ""), "romanization", e.get("english", "")) for e in json.load(f)]
+    return [entries[i % len(entries)] for i in range(n)]
+
+
+async def watch_loop(stop: asyncio.Event) -> float:
+    """Longest delay past the heartbeat interval, in seconds."""
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(HEARTBEAT_SECONDS)
+        worst = max(worst, time.perf_counter() - started - HEARTBEAT_SECONDS)
+    return worst
+
+
+async def measure(label: str, n: int, work):
+    stop = asyncio.Event()
+    watcher = asyncio.create_task(watch_loop(stop))
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    await work()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    stall = await watcher
+    print(f"{label:<32} {n / elapsed:8.1f} cards/s   max loop stall {stall * 1000:8.1f} ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cards", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+    entries = load_entries(args.cards)
+
+    async def old_on_loop():
+        for entry in entries:
+            old_render(*entry)
+            # The scheduler awaited between posts; give the heartbeat a chance per card
+            await asyncio.sleep(0)
+
+    async def new_on_loop():
+        for entry in entries:
+            render_korean_card(*entry, BG_HEX)
+            await asyncio.sleep(0)
+
+    renderer = CardRenderer(args.workers)
+    # Start the pool (and its fonts) outside the measurement, as the bot's first prerender does
+    await renderer.render(render_korean_card, *entries[0], BG_HEX)
+
+    async def new_in_pool():
+        await asyncio.gather(*(renderer.render(render_korean_card, *entry, BG_HEX) for entry in entries))
+
+    renderer_threads = CardRenderer(0)
+
+    async def new_in_thread():
+        for entry in entries:
+            await renderer_threads.render(render_korean_card, *entry, BG_HEX)
+
+    print(f"{args.cards} Korean cards, {args.workers} worker process(es)")
+    await measure("old renderer, on loop", args.cards, old_on_loop)
+    await measure("services.cards, on loop", args.cards, new_on_loop)
+    await measure("services.cards, thread", args.cards, new_in_thread)
+    await measure("services.cards, process pool", args.cards, new_in_pool)
+
+    started = time.perf_counter()
+    await renderer.take("bench", render_korean_card, *entries[0], BG_HEX)
+    cold = time.perf_counter() - started
+    renderer.prerender("bench", render_korean_card, *entries[0], BG_HEX)
+    await asyncio.sleep(0.5)
+    started = time.perf_counter()
+    await renderer.take("bench", render_korean_card, *entries[0], BG_HEX)
+    warm = time.perf_counter() - started
+    print(f"post-time render: {cold * 1000:.1f} ms cold, {warm * 1000:.2f} ms pre-rendered")
+    renderer.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,74 @@
+"""
+Benchmark loading the learning content: every cog parsing its own JSON
+against the shared memory-mapped corpus (services.corpus).
+
+    python -m benchmarks.corpus_bench [--lookups 100000]
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import time
+import tracemalloc
+
+import config
+from services import corpus
+from services.corpus import SOURCES, Corpus, build_corpus
+
+
+def load_json_sources() -> dict[str, list]:
+    """What the cogs did at startup: json.load each file into lists of dicts."""
+    data = {}
+    for name, source in SOURCES.items():
+        path = os.path.join(corpus.BASE_DIR, source.file)
+        with open(path, encoding="utf-8") as f:
+            data[name] = json.load(f)
+    return data
+
+
+def load_corpus() -> dict[str, corpus.Dataset]:
+    c = Corpus(config.CORPUS_FILE)
+    return {name: c.dataset(name) for name in SOURCES}
+
+
+def measure(label: str, load):
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    data = load()
+    elapsed = time.perf_counter() - started
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<22} load {elapsed * 1000:7.2f} ms   retained {retained / 1024:8.1f} KiB   peak {peak / 1024:8.1f} KiB")
+    return data
+
+
+def lookups(label: str, data: dict, n: int):
+    rng = random.Random(1)
+    names = list(data)
+    picks = [(name, rng.randrange(len(data[name]))) for name in (rng.choice(names) for _ in range(n))]
+    started = time.perf_counter()
+    for name, i in picks:
+        data[name][i]
+    elapsed = time.perf_counter() - started
+    print(f"{label:<22} {elapsed / n * 1e6:7.2f} µs per entry lookup")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lookups", type=int, default=100000)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    count = build_corpus()
+    print(f"build + validate: {count} entries in {(time.perf_counter() - started) * 1000:.1f} ms, "
+          f"{os.path.getsize(config.CORPUS_FILE) / 1024:.1f} KiB on disk")
+    json_data = measure("json.load per source", load_json_sources)
+    corpus_data = measure("mapped corpus", load_corpus)
+    lookups("json lists", json_data, args.lookups)
+    lookups("mapped corpus", corpus_data, args.lookups)
+
+
+if __name__ == "__main__":
+    main()
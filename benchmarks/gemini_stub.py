@@ -0,0 +1,210 @@
+"""
+Local stand-in for the Gemini REST API.
+
+Serves generateContent and streamGenerateContent (?alt=sse) for any model.
+Point the bot at it with config.GEMINI_API_BASE = "http://127.0.0.1:8089/v1beta".
+
+Faults can be injected:
+- latency: time to first token drawn from a distribution
+  ("fixed:0.3", "uniform:0.1:0.8", "lognormal:0.3:0.6" = median, sigma)
+- error rate: a share of requests answered with 503
+- overloaded models: every request to them answered with 503
+- slow tail: a share of requests whose first token takes extra time
+- 503 storms: every `storm_every` seconds, `storm_length` seconds of 503s
+- timeouts: a share of requests that hang without answering
+
+    python -m benchmarks.gemini_stub [--port 8089] [--chunks 40] [--chunk-delay 0.05]
+                                     [--latency lognormal:0.3:0.6] [--error-rate 0.1]
+                                     [--overloaded gemini-2.0-flash] [--tail-rate 0.1 --tail-delay 2.0]
+                                     [--storm-every 30 --storm-length 5] [--timeout-rate 0.02]
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+
+from aiohttp import web
+
+LOREM = (
+    "Line {n}: the quick brown fox jumps over the lazy dog while the stub "
+    "pretends to think very hard about your question.\n"
+)
+
+
+def parse_latency(spec: str):
+    """Sampler for a latency spec: fixed:S, uniform:LO:HI or lognormal:MEDIAN:SIGMA."""
+    kind, *args = spec.split(":")
+    values = [float(a) for a in args]
+    if kind == "fixed":
+        return lambda: values[0]
+    if kind == "uniform":
+        return lambda: random.uniform(values[0], values[1])
+    if kind == "lognormal":
+        mu = math.log(values[0])
+        return lambda: random.lognormvariate(mu, values[1])
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+class StubSettings:
+    def __init__(
+        self,
+        chunks: int = 40,
+        chunk_delay: float = 0.05,
+        first_delay: float = 0.3,
+        error_rate: float = 0.0,
+        overloaded_models=(),
+        tail_rate: float = 0.0,
+        tail_delay: float = 0.0,
+        latency: str | None = None,
+        storm_every: float = 0.0,
+        storm_length: float = 0.0,
+        timeout_rate: float = 0.0,
+        hang_seconds: float = 120.0,
+    ):
+        self.chunks = chunks
+        self.chunk_delay = chunk_delay
+        # Time before the first token (prefill); `latency` replaces it with a distribution
+        self.first_delay = first_delay
+        self.latency = parse_latency(latency) if latency else None
+        # Share of requests answered with 503
+        self.error_rate = error_rate
+        # Models that answer every request with 503
+        self.overloaded_models = set(overloaded_models)
+        # Share of requests whose first token takes `tail_delay` extra seconds
+        self.tail_rate = tail_rate
+        self.tail_delay = tail_delay
+        # Periodic windows in which every request is answered with 503
+        self.storm_every = storm_every
+        self.storm_length = storm_length
+        # Share of requests that don't answer for `hang_seconds`
+        self.timeout_rate = timeout_rate
+        self.hang_seconds = hang_seconds
+        self.started = time.monotonic()
+        self.requests = 0
+        self.by_model: dict[str, int] = {}
+        self.errors = 0
+        self.hangs = 0
+
+    def in_storm(self) -> bool:
+        if not self.storm_every:
+            return False
+        return (time.monotonic() - self.started) % self.storm_every < self.storm_length
+
+    def first_token_delay(self) -> float:
+        delay = self.latency() if self.latency else self.first_delay
+        if random.random() < self.tail_rate:
+            delay += self.tail_delay
+        return delay
+
+
+def _chunk(text: str, finish: str | None = None, usage: dict | None = None) -> dict:
+    candidate = {"content": {"role": "model", "parts": [{"text": text}]}}
+    if finish:
+        candidate["finishReason"] = finish
+    data = {"candidates": [candidate]}
+    if usage:
+        data["usageMetadata"] = usage
+    return data
+
+
+def _usage(prompt: dict, output: str) -> dict:
+    prompt_tokens = len(json.dumps(prompt)) // 4
+    output_tokens = len(output) // 4
+    return {
+        "promptTokenCount": prompt_tokens,
+        "candidatesTokenCount": output_tokens,
+        "totalTokenCount": prompt_tokens + output_tokens,
+    }
+
+
+def make_app(settings: StubSettings | None = None) -> web.Application:
+    settings = settings or StubSettings()
+
+    async def handle(request: web.Request) -> web.StreamResponse:
+        settings.requests += 1
+        model_method = request.match_info["model_method"]
+        model = model_method.split(":")[0]
+        settings.by_model[model] = settings.by_model.get(model, 0) + 1
+        body = await request.json()
+
+        if (
+            model in settings.overloaded_models
+            or settings.in_storm()
+            or random.random() < settings.error_rate
+        ):
+            settings.errors += 1
+            await asyncio.sleep(settings.first_delay / 3)
+            return web.json_response(
+                {"error": {"code": 503, "message": "The model is overloaded.", "status": "UNAVAILABLE"}},
+                status=503
+            )
+
+        if random.random() < settings.timeout_rate:
+            settings.hangs += 1
+            await asyncio.sleep(settings.hang_seconds)
+
+        await asyncio.sleep(settings.first_token_delay())
+
+        if model_method.endswith(":streamGenerateContent"):
+            resp = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+            try:
+                await resp.prepare(request)
+                sent = ""
+                for n in range(settings.chunks):
+                    text = LOREM.format(n=n)
+                    sent += text
+                    last = n == settings.chunks - 1
+                    chunk = _chunk(text, "STOP" if last else None, _usage(body, sent) if last else None)
+                    await resp.write(f"data: {json.dumps(chunk)}\r\n\r\n".encode())
+                    await asyncio.sleep(settings.chunk_delay)
+                await resp.write_eof()
+            except ConnectionResetError:
+                # Client went away (cancelled or hedged request lost the race)
+                pass
+            return resp
+
+        # Non-streaming: the whole answer after the full generation time
+        await asyncio.sleep(settings.chunk_delay * settings.chunks)
+        text = "".join(LOREM.format(n=n) for n in range(settings.chunks))
+        return web.json_response(_chunk(text, "STOP", _usage(body, text)))
+
+    app = web.Application()
+    app.router.add_post("/v1beta/models/{model_method}", handle)
+    app["settings"] = settings
+    return app
+
+
+async def start_stub(port: int = 8089, settings: StubSettings | None = None) -> web.AppRunner:
+    runner = web.AppRunner(make_app(settings))
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--chunks", type=int, default=40)
+    parser.add_argument("--chunk-delay", type=float, default=0.05)
+    parser.add_argument("--first-delay", type=float, default=0.3)
+    parser.add_argument("--latency", default=None)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--overloaded", action="append", default=[])
+    parser.add_argument("--tail-rate", type=float, default=0.0)
+    parser.add_argument("--tail-delay", type=float, default=0.0)
+    parser.add_argument("--storm-every", type=float, default=0.0)
+    parser.add_argument("--storm-length", type=float, default=0.0)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    settings = StubSettings(
+        args.chunks, args.chunk_delay, args.first_delay,
+        args.error_rate, args.overloaded, args.tail_rate, args.tail_delay,
+        args.latency, args.storm_every, args.storm_length, args.timeout_rate
+    )
+    web.run_app(make_app(settings), host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
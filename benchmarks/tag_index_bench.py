@@ -0,0 +1,102 @@
+"""
+Benchmark the in-memory TagIndex against the old per-message SQL + difflib path.
+
+    python -m benchmarks.tag_index_bench [--tags 50000]
+"""
+import argparse
+import difflib
+import random
+import sqlite3
+import string
+import time
+
+from services.tag_index import TagIndex
+
+WORDS = [
+    "korean", "english", "lesson", "grammar", "pronunciation", "planner", "weekly",
+    "session", "vowel", "consonant", "diphthong", "hangul", "verb", "noun", "particle",
+    "honorific", "batchim", "notes", "quiz", "phrase", "word", "romanisation", "level",
+]
+
+
+def make_tags(n: int) -> list[tuple[str, str, None]]:
+    rng = random.Random(42)
+    tags = set()
+    while len(tags) < n:
+        parts = rng.sample(WORDS, rng.randint(1, 3))
+        parts.append("".join(rng.choices(string.ascii_lowercase, k=4)))
+        tags.add("-".join(parts))
+    return [(t, f"text for {t}", None) for t in sorted(tags)]
+
+
+def old_lookup(cursor: sqlite3.Cursor, terms: list[str]):
+    exact_tag = "-".join(terms)
+    cursor.execute("SELECT tag, message, file_path FROM tags")
+    all_tags = [row[0] for row in cursor.fetchall()]
+    cursor.execute("SELECT tag, message, file_path FROM tags WHERE tag = ?", (exact_tag,))
+    if cursor.fetchone():
+        return
+    like_clauses = " AND ".join(["tag LIKE ?"] * len(terms))
+    cursor.execute(f"SELECT tag FROM tags WHERE {like_clauses}", [f"%{t}%" for t in terms])
+    if cursor.fetchall():
+        return
+    matches = difflib.get_close_matches(exact_tag, all_tags, n=5, cutoff=0.6)
+    if not matches:
+        for term in terms:
+            difflib.get_close_matches(term, all_tags, n=5, cutoff=0.6)
+
+
+def new_lookup(index: TagIndex, terms: list[str]):
+    exact_tag = "-".join(terms)
+    if index.get(exact_tag):
+        return
+    if index.partial(terms):
+        return
+    if not index.fuzzy(exact_tag):
+        for term in terms:
+            index.fuzzy(term)
+
+
+def timed(fn, queries) -> float:
+    start = time.perf_counter()
+    for q in queries:
+        fn(q)
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tags", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = make_tags(args.tags)
+    db = sqlite3.connect(":memory:")
+    db.execute("CREATE TABLE tags (tag TEXT PRIMARY KEY, message TEXT, file_path TEXT)")
+    db.executemany("INSERT INTO tags VALUES (?, ?, ?)", rows)
+    cursor = db.cursor()
+
+    start = time.perf_counter()
+    index = TagIndex(rows)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    rng = random.Random(7)
+    names = [r[0] for r in rows]
+    queries = {
+        "exact": [n.split("-") for n in rng.sample(names, args.queries)],
+        "partial": [rng.sample(WORDS, 2) for _ in range(args.queries)],
+        "fuzzy": [["".join(rng.choices(string.ascii_lowercase, k=9))] for _ in range(args.queries)],
+    }
+    autocomplete = ["kor", "english les", "gramar", "w"]
+
+    print(f"{args.tags} tags, index built in {build_ms:.0f} ms")
+    for kind, qs in queries.items():
+        old = timed(lambda q: old_lookup(cursor, q), qs)
+        new = timed(lambda q: new_lookup(index, q), qs)
+        print(f"{kind:<8} old {old:9.2f} ms/query   index {new:8.3f} ms/query")
+    ac = timed(lambda q: index.complete(q), autocomplete)
+    print(f"autocomplete          index {ac:8.3f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
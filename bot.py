@@ -4,6 +4,11 @@ import os
 import config
 import asyncio
 import logging
+from services.cards import close_card_renderer
+from services.gemini import close_gemini_client
+from services.scheduler import close_scheduler, get_scheduler
+from services.tag_files import close_tag_file_cache
+from services.usage import close_usage_ledger, get_usage_ledger
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -46,6 +51,8 @@ async def load_all_extensions():
 async def on_ready():
     await bot.change_presence(status=discord.Status.online)
     logger.info(f"Logged in as {bot.user} (ID: {bot.user.id})")
+    # Jobs need the guild cache, so the timer starts (and catches up) once connected
+    get_scheduler().start()
 
     try:
         guild_obj = discord.Object(id=TARGET_GUILD_ID)
@@ -63,8 +70,19 @@ async def on_guild_join(guild):
         logger.info(f"Joined target guild '{guild.name}' (ID: {guild.id})")
 
 async def main():
-    await load_all_extensions()
-    await bot.start(config.TOKEN)
+    async with bot:
+        try:
+            await load_all_extensions()
+            # AI usage is written behind whether or not the stats cog is loaded
+            get_usage_ledger().start()
+            await bot.start(config.TOKEN)
+        finally:
+            # Shared services outlive individual cogs; close them with the bot
+            await close_gemini_client()
+            await close_tag_file_cache()
+            close_card_renderer()
+            close_scheduler()
+            await close_usage_ledger()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -32,8 +32,126 @@ GEMINI_API_KEY = ""
 
 GEMINI_MODEL = "gemini-2.0-flash"
 
+GEMINI_API_BASE = "https://generativelanguage.googleapis.com/v1beta"
+
+GEMINI_MAX_CONCURRENCY = 5
+
+GEMINI_REQUESTS_PER_MINUTE = 60
+
+GEMINI_TOKENS_PER_MINUTE = 250000
+
+GEMINI_MAX_RETRIES = 3
+
+GEMINI_BACKOFF_BASE = 1.0
+
+GEMINI_BACKOFF_CAP = 10.0
+
+GEMINI_RETRY_AFTER_MAX = 30.0
+
+GEMINI_TIMEOUT = 30
+
+GEMINI_FALLBACK_MODEL = "gemini-2.0-flash-lite"
+
+AI_ROUTER_WINDOW = 20
+
+AI_ROUTER_OVERLOAD_THRESHOLD = 0.5
+
+AI_ROUTER_COOLDOWN = 60
+
+AI_HEDGE_ENABLED = True
+
+AI_HEDGE_MAX_PROMPT_TOKENS = 300
+
+AI_HEDGE_MIN_SAMPLES = 20
+
+AI_STREAM_EDIT_INTERVAL = 1.0
+
+AI_SCHEDULER_SLOTS = GEMINI_MAX_CONCURRENCY
+
+AI_HISTORY_TOKEN_BUDGET = 1500
+
+AI_SUMMARY_MAX_TOKENS = 200
+
+AI_CONVERSATIONS_DB = "conversations.db"
+
+AI_DAILY_TOKEN_QUOTA = 50000
+
+AI_QUOTA_EXEMPT_USER_IDS = []
+
+AI_USAGE_DB = "ai_usage.db"
+
+AI_USAGE_FLUSH_SECONDS = 30
+
+AI_CONTEXT_CACHE_SIZE = 5000
+
+AI_CONTEXT_TOKEN_BUDGET = 1500
+
+AI_CONTEXT_MAX_FETCHES = 2
+
+AI_CONTEXT_MAX_DEPTH = 10
+
+AI_FAQ_ENABLED = True
+
+AI_FAQ_INDEX = "faq_index.bin"
+
+AI_FAQ_MIN_SCORE = 3.0
+
+AI_FAQ_MIN_COVERAGE = 0.6
+
+AI_FAQ_MIN_MARGIN = 1.5
+
+AI_CACHE_TTL = 6 * 60 * 60
+
+AI_CACHE_MAX_ENTRIES = 512
+
+AI_CACHE_PERSIST = True
+
+AI_CACHE_DB = "ai_cache.db"
+
 WELCOME_CHANNEL = 1377884284165160970
 
 INTRODUCTION_CHANNEL = 1377909277993468035
 
-WELCOME_ROLE = 1377884248144482375
\ No newline at end of file
+WELCOME_ROLE = 1377884248144482375
+
+ATTACHMENT_ARCHIVE_ENABLED = False
+
+ATTACHMENT_ARCHIVE_DIR = "attachment_archive"
+
+ATTACHMENT_ARCHIVE_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+ATTACHMENT_ARCHIVE_CONCURRENCY = 4
+
+ATTACHMENT_ARCHIVE_CHANNEL_IDS = [MEDIA_CHANNEL_ID]
+
+ATTACHMENT_ARCHIVE_CATEGORY_IDS = TICKET_CATEGORY_IDS
+
+TAG_FILE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+TAG_FILE_REUSE_UPLOADS = True
+
+TICKETS_DB = "tickets.db"
+
+TICKET_OWNER_WAIT_SECONDS = 5
+
+TICKET_MIRROR_DB = "ticket_mirror.db"
+
+TICKET_ARCHIVE_DB = "ticket_archive.db"
+
+TICKET_POOL_SIZE = 0
+
+TICKET_POOL_PREFIX = "ticket-pool"
+
+TICKET_REMIND_AFTER_HOURS = 48
+
+TICKET_AUTO_CLOSE_AFTER_HOURS = 0
+
+TICKET_INACTIVITY_SWEEP_MINUTES = 30
+
+CARD_RENDER_WORKERS = 1
+
+CARD_FONT_CACHE_SIZE = 64
+
+CORPUS_FILE = "corpus.bin"
+
+SCHEDULER_DB = "scheduler.db"
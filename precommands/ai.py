@@ -1,23 +1,52 @@
-import re
-import aiohttp
 import asyncio
-import random
+import logging
+import time
 import discord
 from discord.ext import commands
 import config
+from services.ai_scheduler import PRIORITY_LOW, PRIORITY_NORMAL, RequestCancelled, get_ai_scheduler
+from services.faq_index import match_question, send_faq_answer
+from services.conversations import Conversation, get_conversation_store
+from services.gemini import GeminiError, GeminiOverloaded, extract_text
+from services.model_router import get_model_router
+from services.scheduler import get_scheduler
+from services.streaming_reply import StreamingReply
+from services.usage import QuotaExceeded, get_usage_ledger, usage_counts
+
+logger = logging.getLogger(__name__)
+
+THREAD_LIFETIME_SECONDS = 1800
 
 class AskCog(commands.Cog):
     """Handles the '!ask' command by creating a private thread and managing AI-powered replies."""
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        # Map thread_id to conversation context
-        self.conversations: dict[int, dict] = {}
-        # Limit concurrent Gemini calls (tune as needed)
-        self._semaphore = asyncio.Semaphore(5)
-        # Create one shared HTTP session with a 30s timeout
-        timeout = aiohttp.ClientTimeout(total=30)
-        self._session = aiohttp.ClientSession(timeout=timeout)
+        # Conversations per thread, persisted so open threads survive a restart
+        self.store = get_conversation_store()
+        # Shared client behind a router that fails over to the lighter model
+        self.router = get_model_router()
+        # Fair per-user queue in front of the client
+        self.scheduler = get_ai_scheduler()
+        # Per-user daily token totals and quotas
+        self.usage = get_usage_ledger()
+        # Background summary jobs per thread, awaited before the next reply
+        self._summaries: dict[int, asyncio.Task] = {}
+        # Thread locks are persistent jobs, so they survive a restart
+        self.jobs = get_scheduler()
+
+    async def cog_load(self):
+        self.jobs.register("ask.lock", self._lock_thread_job)
+        # Threads opened before locks were persisted jobs
+        for conv in list(self.store.open.values()):
+            if not self.jobs.has(f"ask.lock:{conv.thread_id}"):
+                self._schedule_lock(conv.thread_id, conv.lock_at - time.time())
+
+    async def cog_unload(self):
+        self.jobs.unregister("ask.lock")
+
+    def _schedule_lock(self, thread_id: int, delay: float):
+        self.jobs.schedule_in(f"ask.lock:{thread_id}", "ask.lock", max(delay, 0), {"thread_id": thread_id})
 
     @commands.command(name="ask")
     async def ask(self, ctx: commands.Context):
@@ -39,47 +68,68 @@ class AskCog(commands.Cog):
         await thread.add_user(ctx.author)
 
         # Initialize with empty history
-        self.conversations[thread.id] = {
-            "user_id": ctx.author.id,
-            "history": []
-        }
+        self.store.create(thread.id, ctx.author.id, THREAD_LIFETIME_SECONDS)
 
         await thread.send(f"{ctx.author.mention} Hello {ctx.author.display_name}, how can I help you?")
-        asyncio.create_task(self._lock_thread_after(thread, 1800))
+        self._schedule_lock(thread.id, THREAD_LIFETIME_SECONDS)
 
-    async def _lock_thread_after(self, thread: discord.Thread, delay: int):
-        await asyncio.sleep(delay)
+    async def _lock_thread_job(self, payload: dict):
+        thread_id = payload["thread_id"]
         try:
+            thread = self.bot.get_channel(thread_id) or await self.bot.fetch_channel(thread_id)
             await thread.edit(locked=True)
             await thread.send("Thread locked after 30 minutes. Use `!ask` to start another.")
-            self.conversations.pop(thread.id, None)
         except:
             pass
+        finally:
+            # Locked (or gone): nothing more will be said here
+            self.scheduler.cancel(("thread", thread_id))
+            summary = self._summaries.pop(thread_id, None)
+            if summary is not None:
+                summary.cancel()
+            self.store.evict(thread_id)
+
+    async def _summarize(self, conv: Conversation, dropped: list[dict]):
+        """Fold turns that fell out of the token budget into the rolling summary."""
+        transcript = "\n".join(f"{t['role']}: {t['content']}" for t in dropped)
+        payload = {
+            "systemInstruction": {"parts": [{"text": (
+                "You maintain a running summary of a conversation between a user and an assistant. "
+                "Merge the new lines into the existing summary. Keep names, facts, decisions and open questions. "
+                "Reply with the updated summary only."
+            )}]},
+            "contents": [{"role": "user", "parts": [{"text": (
+                f"Existing summary:\n{conv.summary or '(none)'}\n\nNew lines:\n{transcript}"
+            )}]}],
+            "generationConfig": {"temperature": 0.2, "maxOutputTokens": config.AI_SUMMARY_MAX_TOKENS}
+        }
+        usage = {}
+
+        async def summarize() -> str:
+            return extract_text(await self.router.generate(payload, usage))
+
+        try:
+            summary = await self.scheduler.run(
+                conv.user_id, summarize, PRIORITY_LOW, tags={("thread", conv.thread_id)}
+            )
+            self.usage.record(conv.user_id, *usage_counts(usage, payload, summary))
+        except RequestCancelled:
+            return
+        except (GeminiError, KeyError, IndexError) as e:
+            logger.warning("Summary for thread %s failed, keeping a truncated transcript: %s", conv.thread_id, e)
+            summary = ""
+        finally:
+            self._summaries.pop(conv.thread_id, None)
+        if not summary:
+            summary = f"{conv.summary}\n{transcript}".strip()
+        # Hard cap so a misbehaving summary can't grow the prompt unbounded
+        if conv.thread_id in self.store.open:
+            self.store.set_summary(conv, summary[-config.AI_SUMMARY_MAX_TOKENS * 4:])
 
-    async def _call_gemini(self, url: str, payload: dict) -> dict:
-        max_retries = 3
-        for attempt in range(1, max_retries + 1):
-            async with self._semaphore:
-                try:
-                    async with self._session.post(url, json=payload) as resp:
-                        if resp.status == 200:
-                            return await resp.json()
-                        if resp.status == 503:
-                            # model overloaded: wait then retry
-                            backoff = min(2 ** attempt, 10) + random.random()
-                            await asyncio.sleep(backoff)
-                            continue
-                        # other HTTP error: bail immediately
-                        text = await resp.text()
-                        raise RuntimeError(f"Error {resp.status}: {text}")
-                except asyncio.TimeoutError:
-                    # timeout, retry until max_retries
-                    if attempt == max_retries:
-                        raise RuntimeError("Request timed out after multiple attempts.")
-                    await asyncio.sleep(1 + random.random())
-                    continue
-        # after exhausting retries, indicate model is busy
-        raise RuntimeError("MODEL_OVERLOADED")
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        # A deleted question no longer needs an answer; the only listener that cancels AI jobs
+        self.scheduler.cancel(("message", payload.message_id))
 
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
@@ -87,15 +137,28 @@ class AskCog(commands.Cog):
         if message.author.bot or not isinstance(message.channel, discord.Thread):
             return
 
-        ctx_data = self.conversations.get(message.channel.id)
-        if not ctx_data or message.author.id != ctx_data["user_id"]:
+        conv = self.store.get(message.channel.id)
+        if not conv or message.author.id != conv.user_id:
+            return
+
+        # Questions a tag already answers skip the model (and the quota)
+        tag = match_question(message.content)
+        if tag:
+            await send_faq_answer(message.reply, tag, mention_author=False)
+            return
+
+        try:
+            self.usage.check(message.author.id)
+        except QuotaExceeded:
+            await message.channel.send("You've used today's AI quota. It resets at midnight UTC.")
             return
 
-        # Append user message
-        ctx_data["history"].append({"role": "user", "content": message.content})
-        # Trim conversation history to last 20 entries to keep payload small
-        if len(ctx_data["history"]) > 20:
-            ctx_data["history"] = ctx_data["history"][-20:]
+        # Let a pending summary of older turns land before building the prompt
+        pending = self._summaries.get(conv.thread_id)
+        if pending is not None:
+            await asyncio.wait({pending})
+
+        self.store.add_turn(conv, "user", message.content)
 
         # Updated persona prompt to request specificity and brevity
         system_text = (
@@ -104,47 +167,56 @@ class AskCog(commands.Cog):
             "Answer with specific details: directly address the user’s question, include a concrete example when relevant, and avoid vague language. "
             "Keep your response under 500 characters."
         )
+        if conv.summary:
+            system_text += f"\nSummary of the earlier conversation:\n{conv.summary}"
         payload = {
             "systemInstruction": {"parts": [{"text": system_text}]},
-            "contents": [
-                {"role": e["role"], "parts": [{"text": e["content"]}]}
-                for e in ctx_data["history"]
-            ],
+            "contents": conv.contents(),
             # Lower temperature and max tokens to keep answers focused and concise
             "generationConfig": {"temperature": 0.3, "maxOutputTokens": 100}
         }
 
-        async with message.channel.typing():
-            url = (
-                f"https://generativelanguage.googleapis.com/v1beta/models/"
-                f"{config.GEMINI_MODEL}:generateContent?key={config.GEMINI_API_KEY}"
-            )
-            try:
-                data = await self._call_gemini(url, payload)
-            except RuntimeError as e:
-                if str(e) == "MODEL_OVERLOADED":
-                    return await message.channel.send(
-                        "The AI service is busy right now. Please try again in a moment."
-                    )
-                return await message.channel.send(f"Error: {e}")
-
-        try:
-            parts = data["candidates"][0]["content"]["parts"]
-            reply = "".join(part.get("text", "") for part in parts).strip()
-        except:
-            reply = "Sorry, I couldn't process that."
+        # Stream the answer into a message that is edited as it grows
+        stream = StreamingReply(message.channel.send)
+        await stream.start()
+        usage = {}
 
-        # Append assistant reply and trim again if needed
-        ctx_data["history"].append({"role": "assistant", "content": reply})
-        if len(ctx_data["history"]) > 20:
-            ctx_data["history"] = ctx_data["history"][-20:]
+        async def answer():
+            async for chunk in self.router.stream(payload, usage):
+                await stream.feed(chunk)
 
-        await message.channel.send(reply)
+        try:
+            await self.scheduler.run(
+                message.author.id,
+                answer,
+                PRIORITY_NORMAL,
+                tags={("thread", conv.thread_id), ("message", message.id)},
+                on_queued=lambda pos: stream.status(f"You're #{pos} in the queue…"),
+            )
+        except RequestCancelled:
+            await stream.discard()
+            return
+        except asyncio.CancelledError:
+            await stream.discard()
+            raise
+        except GeminiOverloaded:
+            await stream.fail("The AI service is busy right now. Please try again in a moment.")
+            return
+        except GeminiError as e:
+            await stream.fail(f"Error: {e}")
+            return
+        finally:
+            if usage or stream.text:
+                self.usage.record(message.author.id, *usage_counts(usage, payload, stream.text))
+        reply = (await stream.finish("Sorry, I couldn't process that.")).strip()
+        if not reply:
+            return
 
-    @commands.Cog.listener()
-    async def on_cog_unload(self):
-        # Close the shared HTTP session when the cog is unloaded
-        await self._session.close()
+        self.store.add_turn(conv, "model", reply)
+        # Keep history within the token budget; older turns go into the summary
+        dropped = self.store.pop_overflow(conv, config.AI_HISTORY_TOKEN_BUDGET)
+        if dropped:
+            self._summaries[conv.thread_id] = asyncio.create_task(self._summarize(conv, dropped))
 
 
 async def setup(bot: commands.Bot):
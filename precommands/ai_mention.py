@@ -1,50 +1,48 @@
-import re
-import aiohttp
 import asyncio
-import random
+import functools
+import re
 import discord
 from discord.ext import commands
-import config
-
-class AskCog(commands.Cog):
+from services.gemini import GeminiError
+from services.model_router import get_model_router
+from services.ai_scheduler import PRIORITY_HIGH, RequestCancelled, get_ai_scheduler
+from services.faq_index import match_question, send_faq_answer
+from services.ai_cache import cache_key, get_response_cache
+from services.message_cache import chain_contents, get_message_cache
+from services.streaming_reply import StreamingReply
+from services.usage import QuotaExceeded, get_usage_ledger, usage_counts
+
+class MentionAskCog(commands.Cog):
     """Handles @mention queries by authorized users and returns AI-powered replies (e.g., song lyrics)."""
 
     ALLOWED_USER_IDS = {1344279847647838229, 1353629464709300338, 1121362897424109578, 1384767261897789441}
-    DISCORD_CHAR_LIMIT = 2000
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        # Limit concurrent Gemini calls
-        self._semaphore = asyncio.Semaphore(5)
-        # Shared HTTP session
-        timeout = aiohttp.ClientTimeout(total=30)
-        self._session = aiohttp.ClientSession(timeout=timeout)
-
-    async def _call_gemini(self, url: str, payload: dict) -> dict:
-        max_retries = 3
-        for attempt in range(1, max_retries + 1):
-            async with self._semaphore:
-                try:
-                    async with self._session.post(url, json=payload) as resp:
-                        if resp.status == 200:
-                            return await resp.json()
-                        if resp.status == 503:
-                            backoff = min(2 ** attempt, 10) + random.random()
-                            await asyncio.sleep(backoff)
-                            continue
-                        # consume body on other errors
-                        await resp.text()
-                        break
-                except asyncio.TimeoutError:
-                    if attempt == max_retries:
-                        break
-                    await asyncio.sleep(1 + random.random())
-                    continue
-        # signal generic failure
-        raise RuntimeError("MODEL_ERROR")
+        # Shared client behind a router that fails over to the lighter model
+        self.router = get_model_router()
+        self.scheduler = get_ai_scheduler()
+        self.usage = get_usage_ledger()
+        # Recent messages, so reply chains can be followed without fetching
+        self.messages = get_message_cache()
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        # AskCog cancels the deleted question's AI job
+        self.messages.discard(payload.message_id)
+
+    @commands.Cog.listener()
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent):
+        # Streamed answers are edited in place; keep the cached text current
+        content = payload.data.get("content")
+        if content is not None:
+            self.messages.update_content(payload.message_id, content)
 
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
+        if message.guild is not None:
+            self.messages.add(message)
+
         # ignore bots
         if message.author.bot:
             return
@@ -62,6 +60,18 @@ class AskCog(commands.Cog):
         if not query:
             return
 
+        # Questions a tag already answers skip the model (and the quota)
+        tag = match_question(query)
+        if tag:
+            await send_faq_answer(message.reply, tag, mention_author=False)
+            return
+
+        try:
+            self.usage.check(message.author.id)
+        except QuotaExceeded:
+            await message.reply("You've used today's AI quota. It resets at midnight UTC.")
+            return
+
         # choose system prompt based on user ID
         if message.author.id == 1344279847647838229:
             system_text = (
@@ -75,10 +85,13 @@ class AskCog(commands.Cog):
                 "When asked for lyrics, return the complete lyrics."
             )
 
+        # Follow-ups carry the reply chain they answer, mostly from the local cache
+        context = chain_contents(await self.messages.reply_chain(message), self.bot.user.id)
+
         # prepare the payload (allowing a very long response)
         payload = {
             "systemInstruction": {"parts": [{"text": system_text}]},
-            "contents": [
+            "contents": context + [
                 {"role": "user", "parts": [{"text": query}]}
             ],
             "generationConfig": {
@@ -87,46 +100,56 @@ class AskCog(commands.Cog):
             }
         }
 
-        url = (
-            f"https://generativelanguage.googleapis.com/v1beta/models/"
-            f"{config.GEMINI_MODEL}:generateContent?key={config.GEMINI_API_KEY}"
-        )
-
+        # Show a message right away and grow it as the answer streams in
+        # Sent as a reply so a follow-up to the answer links back to this question
+        reply = StreamingReply(functools.partial(message.reply, mention_author=False))
+        await reply.start()
+
+        # The model that answered, so the cache files the answer under it
+        route = {}
+
+        async def fetch() -> str:
+            usage = {}
+
+            async def answer():
+                async for chunk in self.router.stream(payload, usage, route):
+                    await reply.feed(chunk)
+
+            # Authorised users jump ahead of regular traffic
+            try:
+                await self.scheduler.run(
+                    message.author.id,
+                    answer,
+                    PRIORITY_HIGH,
+                    tags={("message", message.id)},
+                    on_queued=lambda pos: reply.status(f"You're #{pos} in the queue…"),
+                )
+            finally:
+                # Only the caller that actually hit the API is charged
+                if usage or reply.text:
+                    self.usage.record(message.author.id, *usage_counts(usage, payload, reply.text))
+            return reply.text
+
+        # Identical prompts are answered from the cache or share one in-flight call
         try:
-            async with message.channel.typing():
-                data = await self._call_gemini(url, payload)
-
-            parts = data["candidates"][0]["content"]["parts"]
-            full_reply = "".join(p.get("text", "") for p in parts).strip()
-
-            # if it looks truncated, request continuation once
-            if full_reply.endswith("..."):
-                cont_payload = {
-                    "systemInstruction": {"parts":[{"text": system_text}]},
-                    "contents": [
-                        {"role": "user", "parts":[{"text": "Please continue the previous answer in full."}]}
-                    ],
-                    "generationConfig": {
-                        "temperature": 0.3,
-                        "maxOutputTokens": 8192
-                    }
-                }
-                cont_data = await self._call_gemini(url, cont_payload)
-                cont_parts = cont_data["candidates"][0]["content"]["parts"]
-                continuation = "".join(p.get("text", "") for p in cont_parts).strip()
-                full_reply += "\n" + continuation
-
-        except Exception:
-            full_reply = "An error occurred."
-
-        # send in 2k-char chunks
-        for i in range(0, len(full_reply), self.DISCORD_CHAR_LIMIT):
-            await message.channel.send(full_reply[i:i + self.DISCORD_CHAR_LIMIT])
-
-    @commands.Cog.listener()
-    async def on_cog_unload(self):
-        # close session
-        await self._session.close()
+            text, streamed = await get_response_cache().get_or_compute(
+                cache_key(payload, self.router.current_model()),
+                fetch,
+                store_key=lambda: cache_key(payload, route.get("model", self.router.current_model())),
+                abandoned=(RequestCancelled,),
+            )
+            if not streamed:
+                await reply.feed(text)
+        except RequestCancelled:
+            await reply.discard()
+            return
+        except asyncio.CancelledError:
+            await reply.discard()
+            raise
+        except GeminiError:
+            await reply.fail("An error occurred.")
+            return
+        await reply.finish("An error occurred.")
 
 async def setup(bot: commands.Bot):
-    await bot.add_cog(AskCog(bot))
+    await bot.add_cog(MentionAskCog(bot))
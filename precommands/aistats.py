@@ -0,0 +1,102 @@
+import discord
+from discord.ext import commands
+import config
+from services.gemini import get_gemini_client
+from services.ai_cache import get_response_cache
+from services.ai_scheduler import get_ai_scheduler
+from services.model_router import get_model_router
+from services.usage import get_usage_ledger
+from services.faq_index import faq_stats
+from services.message_cache import get_message_cache
+
+class AIStats(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.usage = get_usage_ledger()
+
+    def _top_lines(self, days: int, limit: int) -> str:
+        lines = []
+        for rank, (user_id, prompt, output, calls) in enumerate(self.usage.top(days, limit), start=1):
+            lines.append(f"**{rank}.** <@{user_id}> — {prompt + output:,} tokens ({prompt:,} in / {output:,} out) · {calls} calls")
+        return "\n".join(lines) or "No usage recorded."
+
+    @commands.command(name="aistats")
+    @commands.has_permissions(administrator=True)
+    async def aistats(self, ctx: commands.Context):
+        """
+        Show Gemini latency percentiles, routing, cache hit rate, queue state and today's top AI users.
+        """
+        metrics = get_gemini_client().metrics.summary()
+        cache = get_response_cache().stats()
+        queue = get_ai_scheduler().stats()
+        routing = get_model_router().summary()
+        messages = get_message_cache()
+
+        embed = discord.Embed(title="AI Stats", color=config.EMBED_COLOR)
+        embed.add_field(
+            name="Gemini Calls",
+            value=(
+                f"Calls: {metrics['calls']} · Retries: {metrics['retries']} · Failures: {metrics['failures']}\n"
+                f"Latency p50/p95/p99: {metrics['p50']:.2f}s / {metrics['p95']:.2f}s / {metrics['p99']:.2f}s\n"
+                f"First streamed chunk p50: {metrics['first_chunk_p50']:.2f}s"
+            ),
+            inline=False
+        )
+        decisions = routing["decisions"]
+        models = "\n".join(
+            f"`{name}` overload {m['overload_rate']:.0%} · first chunk p50/p90 "
+            f"{m['first_chunk_p50']:.2f}s / {m['first_chunk_p90']:.2f}s"
+            for name, m in routing["models"].items()
+        )
+        embed.add_field(
+            name="Routing" + (" (on fallback)" if routing["tripped"] else ""),
+            value=(
+                f"Primary: {decisions.get('primary', 0)} · Fallback (overload): {decisions.get('fallback_overload', 0)} · "
+                f"Fallback (tripped): {decisions.get('fallback_tripped', 0)}\n"
+                f"Hedged: {decisions.get('hedged', 0)} · Hedge won: {decisions.get('hedge_won', 0)}\n"
+                f"{models or 'No calls yet.'}"
+            ),
+            inline=False
+        )
+        embed.add_field(
+            name="Response Cache",
+            value=(
+                f"Hit rate: {cache['hit_rate']:.0%} · Entries: {cache['entries']}\n"
+                f"Memory hits: {cache['hits']} · Disk hits: {cache['disk_hits']} · "
+                f"Coalesced: {cache['coalesced']} · Misses: {cache['misses']}\n"
+                f"Answered from tags: {faq_stats['answered']} of {faq_stats['checked']} questions\n"
+                f"Reply-chain hops from cache: {messages.hits} · fetched: {messages.fetches}"
+            ),
+            inline=False
+        )
+        await self.usage.flush()
+        embed.add_field(name="Top Users Today", value=self._top_lines(1, 5), inline=False)
+        embed.add_field(
+            name="Queue",
+            value=(
+                f"Running: {queue['running']} · Waiting: {queue['queued']}\n"
+                f"Completed: {queue['completed']} · Cancelled: {queue['cancelled']}"
+            ),
+            inline=False
+        )
+        await ctx.send(embed=embed)
+
+    @commands.command(name="aiusage")
+    @commands.has_permissions(administrator=True)
+    async def aiusage(self, ctx: commands.Context, days: int = 1):
+        """
+        Show the heaviest AI users over the last <days> days (default: today).
+        """
+        days = max(1, min(days, 90))
+        await self.usage.flush()
+        embed = discord.Embed(
+            title=f"AI Usage — last {days} day{'s' if days != 1 else ''}",
+            description=self._top_lines(days, 10),
+            color=config.EMBED_COLOR
+        )
+        quota = config.AI_DAILY_TOKEN_QUOTA
+        embed.set_footer(text=f"Daily quota: {quota:,} tokens per user" if quota else "No daily quota")
+        await ctx.send(embed=embed)
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(AIStats(bot))
@@ -6,12 +6,10 @@ import asyncio
 import time
 import json
 import os
+from services.corpus import get_dataset
 
 # --- Constants ---
 QUESTIONS_PER_GAME = 5
-WORDS_FILE = 'words_game.json'
-NUMBERS_FILE = 'num_wmg.json'
-FOOD_FILE = 'food_wmg.json'
 LEADERBOARD_FILE = 'leaderboard.json'
 GAME_TIMEOUT = 60.0  # seconds
 
@@ -368,37 +366,14 @@ class MatchGame(commands.Cog):
         self.load_all_data()
 
     def load_all_data(self):
-        """Loads all word and leaderboard data from JSON files."""
-        self.words_animal = self._load_word_file(WORDS_FILE)
-        self.words_number = self._load_word_file(NUMBERS_FILE)
-        self.words_food = self._load_word_file(FOOD_FILE)
+        """Loads the word lists from the compiled corpus and the leaderboard from JSON."""
+        # Validated at corpus build time, so every entry has a term
+        self.words_animal = get_dataset('match_animal')
+        self.words_number = get_dataset('match_number')
+        self.words_food = get_dataset('match_food')
         self.load_leaderboard()
         print("MatchGame data loaded.")
 
-    def _load_word_file(self, file_path):
-        """Helper to load a single word JSON file safely."""
-        if not os.path.exists(file_path):
-            print(f"Warning: Word file not found: {file_path}")
-            return []
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                if isinstance(data, list):
-                    # Filter out any bad entries now
-                    valid_data = [d for d in data if get_term(d) is not None]
-                    if len(valid_data) < len(data):
-                        print(f"Warning: Filtered {len(data) - len(valid_data)} bad entries from {file_path}")
-                    return valid_data
-                else:
-                    print(f"Error: Word file {file_path} is not a JSON list.")
-                    return []
-        except json.JSONDecodeError:
-            print(f"Error: Could not decode JSON from {file_path}")
-            return []
-        except Exception as e:
-            print(f"An unexpected error occurred loading {file_path}: {e}")
-            return []
-
     def load_leaderboard(self):
         """Loads leaderboard data, ensuring all categories exist."""
         default_data = {'animal': {}, 'number': {}, 'food': {}}
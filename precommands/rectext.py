@@ -1,15 +1,188 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 import sqlite3
 import uuid
 import datetime
 import asyncio
+import json
+import logging
+import gzip
+import html
+import os
+import re
+import tempfile
+import time
+from services.scheduler import get_scheduler
+
+logger = logging.getLogger(__name__)
+
+DATABASE_FILE = 'recordings.db'
+FLUSH_INTERVAL_SECONDS = 2
+FLUSH_BATCH_SIZE = 200
+RECORDINGS_PER_PAGE = 10
+RECORDING_SECONDS = 60 * 60
+EXPORT_FORMATS = ('txt', 'ndjson', 'html')
+
+_DURATION = re.compile(r'^(\d+)([mhd])$')
+
+
+def _parse_time(value: str | None) -> int | None:
+    """Parse `2025-06-01`, `2025-06-01T14:30` (UTC) or a relative `30m` / `6h` / `2d` ago."""
+    if value is None:
+        return None
+    match = _DURATION.match(value.lower())
+    if match:
+        amount, unit = int(match.group(1)), match.group(2)
+        seconds = amount * {'m': 60, 'h': 3600, 'd': 86400}[unit]
+        return int(time.time()) - seconds
+    dt = datetime.datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=datetime.timezone.utc)
+    return int(dt.timestamp())
+
+
+def _export_recording(key: str, fmt: str, since: int | None, until: int | None, keyword: str | None) -> tuple[str, int]:
+    """
+    Stream the rows of one recording straight from SQLite into a gzip file.
+    Runs in a worker thread with its own connection; returns (path, row_count).
+    """
+    query = 'SELECT message_id, created_at, message_text, attachments FROM messages WHERE recording_key = ?'
+    params: list = [key]
+    if since is not None:
+        query += ' AND created_at >= ?'
+        params.append(since)
+    if until is not None:
+        query += ' AND created_at <= ?'
+        params.append(until)
+    if keyword:
+        escaped = keyword.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        query += " AND message_text LIKE ? ESCAPE '\\'"
+        params.append(f'%{escaped}%')
+    query += ' ORDER BY id'
+
+    fd, path = tempfile.mkstemp(prefix=f'rec-{key}-', suffix=f'.{fmt}.gz')
+    os.close(fd)
+    count = 0
+    db = sqlite3.connect(DATABASE_FILE)
+    try:
+        with gzip.open(path, 'wt', encoding='utf-8') as out:
+            if fmt == 'html':
+                out.write(
+                    '<!DOCTYPE html><html><head><meta charset="utf-8">'
+                    f'<title>Recording {html.escape(key)}</title></head><body>'
+                    f'<h1>Recording {html.escape(key)}</h1>\n'
+                )
+            for message_id, created_at, text, attachments in db.execute(query, params):
+                count += 1
+                urls = json.loads(attachments) if attachments else []
+                stamp = (
+                    datetime.datetime.fromtimestamp(created_at, datetime.timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')
+                    if created_at else '-'
+                )
+                if fmt == 'ndjson':
+                    out.write(json.dumps({
+                        'message_id': message_id,
+                        'created_at': created_at,
+                        'content': text,
+                        'attachments': urls,
+                    }, ensure_ascii=False) + '\n')
+                elif fmt == 'html':
+                    links = ''.join(
+                        f'<br><a href="{html.escape(u)}">{html.escape(u)}</a>' for u in urls
+                    )
+                    out.write(
+                        f'<p><small>{stamp}</small><br>{html.escape(text or "")}{links}</p>\n'
+                    )
+                else:
+                    out.write(f'[{stamp}] {text}\n')
+                    for u in urls:
+                        out.write(f'    {u}\n')
+            if fmt == 'html':
+                out.write('</body></html>\n')
+    except BaseException:
+        os.remove(path)
+        raise
+    finally:
+        db.close()
+    return path, count
+
+
+class SendRecFlags(commands.FlagConverter):
+    format: str = commands.flag(default='txt', aliases=['fmt'])
+    since: str | None = None
+    until: str | None = None
+    keyword: str | None = None
+
+
+class RecordingsView(discord.ui.View):
+    """Pages through the recordings table, fetching one page per click."""
+
+    def __init__(self, cog: 'RecordText', author: discord.abc.User, total: int):
+        super().__init__(timeout=180)
+        self.cog = cog
+        self.author = author
+        self.page = 1
+        self.max_pages = max(1, -(-total // RECORDINGS_PER_PAGE))
+        self.message: discord.Message | None = None
+
+    def build_embed(self) -> discord.Embed:
+        offset = (self.page - 1) * RECORDINGS_PER_PAGE
+        rows = self.cog.db.execute(
+            '''
+            SELECT r.key, r.user_id, r.channel_id, r.start_time,
+                   (SELECT COUNT(*) FROM messages m WHERE m.recording_key = r.key)
+            FROM recordings r
+            ORDER BY r.id DESC
+            LIMIT ? OFFSET ?
+            ''',
+            (RECORDINGS_PER_PAGE, offset)
+        ).fetchall()
+
+        embed = discord.Embed(title="Recordings", color=discord.Color.blue())
+        for key, user_id, channel_id, start_time, count in rows:
+            status = " (recording)" if key in self.cog.active_recordings else ""
+            embed.add_field(
+                name=f"{key}{status}",
+                value=f"<@{user_id}> in <#{channel_id}> · <t:{start_time}:f> · {count} messages",
+                inline=False
+            )
+        embed.set_footer(text=f"Page {self.page} of {self.max_pages}")
+        self.prev_button.disabled = self.page == 1
+        self.next_button.disabled = self.page == self.max_pages
+        return embed
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.author.id:
+            await interaction.response.send_message("You can't control this list.", ephemeral=True)
+            return False
+        return True
+
+    @discord.ui.button(label="< Previous", style=discord.ButtonStyle.primary)
+    async def prev_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page = max(1, self.page - 1)
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
+
+    @discord.ui.button(label="Next >", style=discord.ButtonStyle.primary)
+    async def next_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page = min(self.max_pages, self.page + 1)
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
+
+    async def on_timeout(self):
+        for item in self.children:
+            item.disabled = True
+        if self.message:
+            try:
+                await self.message.edit(view=self)
+            except discord.NotFound:
+                pass
+
 
 class RecordText(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         # Connect to (or create) the SQLite3 database
-        self.db = sqlite3.connect('recordings.db')
+        self.db = sqlite3.connect(DATABASE_FILE)
+        self.db.execute('PRAGMA journal_mode=WAL')
         self.cursor = self.db.cursor()
 
         # Create tables if they don't exist
@@ -33,10 +206,89 @@ class RecordText(commands.Cog):
             )
             '''
         )
+        # Columns added after the first version of the table
+        for column in ('message_id INTEGER', 'created_at INTEGER', 'attachments TEXT'):
+            try:
+                self.cursor.execute(f'ALTER TABLE messages ADD COLUMN {column}')
+            except sqlite3.OperationalError:
+                # Column already exists
+                pass
+        self.cursor.execute(
+            'CREATE INDEX IF NOT EXISTS idx_messages_recording ON messages (recording_key, id)'
+        )
         self.db.commit()
 
         # Keep track of active recordings in memory
         self.active_recordings = {}
+        # (user_id, channel_id) -> recording keys, so on_message is a single dict lookup
+        self._targets: dict[tuple[int, int], set[str]] = {}
+
+        prefix = self.bot.command_prefix
+        self._prefixes = tuple(prefix) if isinstance(prefix, (list, tuple)) else (prefix,)
+
+        # Captured rows are buffered and written in batches from a worker thread
+        self._buffer: list[tuple] = []
+        self._flush_lock = asyncio.Lock()
+        self._writer = sqlite3.connect(DATABASE_FILE, check_same_thread=False)
+        self.flush_loop.start()
+
+        # Recordings still running before a restart pick up where they left off
+        self.scheduler = get_scheduler()
+        self.scheduler.register("rectext.stop", self._stop_recording_job)
+        for job in self.scheduler.pending("rectext.stop"):
+            self.start_recording(job.payload["key"], job.payload["user_id"], job.payload["channel_id"])
+
+    async def cog_unload(self):
+        self.scheduler.unregister("rectext.stop")
+        self.flush_loop.cancel()
+        await self._flush()
+        self._writer.close()
+        self.db.close()
+
+    def start_recording(self, key: str, user_id: int, channel_id: int):
+        self.active_recordings[key] = {
+            'user_id': user_id,
+            'channel_id': channel_id
+        }
+        self._targets.setdefault((user_id, channel_id), set()).add(key)
+
+    def stop_recording(self, key: str) -> bool:
+        # Stopped early by !stoprec: no "finished" notice later
+        self.scheduler.cancel(f"rectext.stop:{key}")
+        info = self.active_recordings.pop(key, None)
+        if info is None:
+            return False
+        target = (info['user_id'], info['channel_id'])
+        keys = self._targets.get(target)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._targets[target]
+        return True
+
+    def _write_rows(self, rows: list[tuple]):
+        with self._writer:
+            self._writer.executemany(
+                'INSERT INTO messages (recording_key, message_text, message_id, created_at, attachments) '
+                'VALUES (?, ?, ?, ?, ?)',
+                rows
+            )
+
+    async def _flush(self):
+        async with self._flush_lock:
+            if not self._buffer:
+                return
+            rows, self._buffer = self._buffer, []
+            try:
+                await asyncio.to_thread(self._write_rows, rows)
+            except sqlite3.Error as e:
+                logger.error(f"Failed to write {len(rows)} recorded messages: {e}")
+                # Keep them for the next flush
+                self._buffer[:0] = rows
+
+    @tasks.loop(seconds=FLUSH_INTERVAL_SECONDS)
+    async def flush_loop(self):
+        await self._flush()
 
     @commands.command(name='rec')
     @commands.has_permissions(administrator=True)
@@ -46,7 +298,7 @@ class RecordText(commands.Cog):
         """
         # Generate a unique key for this recording
         recording_key = uuid.uuid4().hex[:8]
-        start_ts = int(datetime.datetime.utcnow().timestamp())
+        start_ts = int(time.time())
 
         # Insert a new recording entry
         self.cursor.execute(
@@ -56,25 +308,26 @@ class RecordText(commands.Cog):
         self.db.commit()
 
         # Mark as active
-        self.active_recordings[recording_key] = {
-            'user_id': user.id,
-            'channel_id': ctx.channel.id
-        }
+        self.start_recording(recording_key, user.id, ctx.channel.id)
 
         await ctx.send(f"Recording started for {user.mention}. Key: `{recording_key}`. This will last 60 minutes.")
 
-        # Schedule stopping
-        asyncio.create_task(self._stop_recording_after(recording_key, ctx.channel))
+        # Schedule stopping; persisted, so a restart resumes the recording until then
+        self.scheduler.schedule_in(
+            f"rectext.stop:{recording_key}", "rectext.stop", RECORDING_SECONDS,
+            {"key": recording_key, "user_id": user.id, "channel_id": ctx.channel.id}
+        )
 
-    async def _stop_recording_after(self, key: str, channel: discord.abc.Messageable):
-        # Wait 60 minutes
-        await asyncio.sleep(60 * 60)
+    async def _stop_recording_job(self, payload: dict):
+        key = payload["key"]
         # Remove from active
-        self.active_recordings.pop(key, None)
+        self.stop_recording(key)
         # Notify in channel
-        await channel.send(
-            f"Recording `{key}` finished storing the last 60 minutes. To record again, type `!rec <user>`."
-        )
+        channel = self.bot.get_channel(payload["channel_id"])
+        if channel is not None:
+            await channel.send(
+                f"Recording `{key}` finished storing the last 60 minutes. To record again, type `!rec <user>`."
+            )
 
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
@@ -82,58 +335,76 @@ class RecordText(commands.Cog):
         if message.author.bot:
             return
 
+        # Check active recordings for this author in this channel
+        keys = self._targets.get((message.author.id, message.channel.id))
+        if not keys:
+            return
+
         # Optionally ignore your own commands so you don't record them
-        if message.content.startswith(tuple(self.bot.command_prefix if isinstance(self.bot.command_prefix, (list, tuple)) else [self.bot.command_prefix])):
+        if message.content.startswith(self._prefixes):
             return
 
-        # Check active recordings and store messages
-        for key, info in list(self.active_recordings.items()):
-            if info['user_id'] == message.author.id and info['channel_id'] == message.channel.id:
-                self.cursor.execute(
-                    'INSERT INTO messages (recording_key, message_text) VALUES (?, ?)',
-                    (key, message.content)
-                )
-                self.db.commit()
+        created_at = int(message.created_at.timestamp())
+        attachments = json.dumps([a.url for a in message.attachments]) if message.attachments else None
+        for key in keys:
+            self._buffer.append((key, message.content, message.id, created_at, attachments))
+        if len(self._buffer) >= FLUSH_BATCH_SIZE:
+            await self._flush()
 
         # **DO NOT** call process_commands here anymore!
 
     @commands.command(name='sendrec')
     @commands.has_permissions(administrator=True)
-    async def sendrec(self, ctx: commands.Context, recording_key: str):
+    async def sendrec(self, ctx: commands.Context, recording_key: str, *, flags: SendRecFlags):
         """
-        Send back all recorded messages under <recording_key>, splitting into multiple messages if needed.
+        Send back all recorded messages under <recording_key> as one compressed transcript file.
+        Optional: format:txt|ndjson|html since:<date|30m|6h|2d> until:<date> keyword:<text>
         """
-        # Fetch all messages for this key
-        self.cursor.execute(
-            'SELECT message_text FROM messages WHERE recording_key = ? ORDER BY id',
-            (recording_key,)
+        fmt = flags.format.lower()
+        if fmt not in EXPORT_FORMATS:
+            return await ctx.send(f"Unknown format `{flags.format}`. Use one of: {', '.join(EXPORT_FORMATS)}.")
+        try:
+            since = _parse_time(flags.since)
+            until = _parse_time(flags.until)
+        except ValueError:
+            return await ctx.send("Couldn't parse the time range. Use e.g. `2025-06-01`, `2025-06-01T14:30` or `6h`.")
+
+        # Make sure buffered messages are on disk first
+        await self._flush()
+
+        # Build the file off the event loop, streaming rows as they are read
+        path, count = await asyncio.to_thread(
+            _export_recording, recording_key, fmt, since, until, flags.keyword
         )
-        rows = self.cursor.fetchall()
-        if not rows:
-            return await ctx.send(f"No recording found for key `{recording_key}`.")
+        try:
+            if not count:
+                if flags.since or flags.until or flags.keyword:
+                    return await ctx.send(f"No recorded messages in `{recording_key}` match those filters.")
+                return await ctx.send(f"No recording found for key `{recording_key}`.")
+
+            limit = ctx.guild.filesize_limit if ctx.guild else discord.utils.DEFAULT_FILE_SIZE_LIMIT_BYTES
+            if os.path.getsize(path) > limit:
+                return await ctx.send("The transcript is too large to upload. Narrow it down with `since:`, `until:` or `keyword:`.")
 
-        # Concatenate and chunk
-        full = "\n".join(r[0] for r in rows)
-        chunks = [full[i:i + 2000] for i in range(0, len(full), 2000)]
-        for chunk in chunks:
-            await ctx.send(chunk)
+            await ctx.send(
+                f"Recording `{recording_key}`: {count} messages.",
+                file=discord.File(path, filename=f"recording-{recording_key}.{fmt}.gz")
+            )
+        finally:
+            os.remove(path)
 
     @commands.command(name='viewrec')
     @commands.has_permissions(administrator=True)
     async def viewrec(self, ctx: commands.Context):
         """
-        View all recordings (keys and users) in an embed.
+        Page through all recordings (keys, users, channels and message counts).
         """
-        self.cursor.execute('SELECT key, user_id FROM recordings')
-        rows = self.cursor.fetchall()
-        if not rows:
+        total = self.db.execute('SELECT COUNT(*) FROM recordings').fetchone()[0]
+        if not total:
             return await ctx.send("No recordings found.")
 
-        embed = discord.Embed(title="Recordings", color=discord.Color.blue())
-        for key, user_id in rows:
-            embed.add_field(name=key, value=f'<@{user_id}>', inline=False)
-
-        await ctx.send(embed=embed)
+        view = RecordingsView(self, ctx.author, total)
+        view.message = await ctx.send(embed=view.build_embed(), view=view)
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(RecordText(bot))
@@ -16,12 +16,10 @@ class StopRec(commands.Cog):
         if not record_cog:
             return await ctx.send('Recording functionality is not loaded.')
 
-        # Check if the key is active
-        if recording_key not in record_cog.active_recordings:
+        # Stop recording (False if the key is not active)
+        if not record_cog.stop_recording(recording_key):
             return await ctx.send(f'No active recording found for key `{recording_key}`.')
 
-        # Stop recording
-        record_cog.active_recordings.pop(recording_key)
         await ctx.send(f'Recording `{recording_key}` has been manually stopped. Stored messages remain retrievable via `!sendrec {recording_key}`.')
 
 async def setup(bot: commands.Bot):
@@ -2,6 +2,7 @@ import discord
 from discord.ext import commands
 import re
 import asyncio
+from services.scheduler import get_scheduler
 
 BYPASS_ROLE_ID = 1381992457897775125
 
@@ -91,6 +92,23 @@ class SwearFilter(commands.Cog):
         # Simple cooldown tracker (30s per user)
         self._last_warning: dict[int, float] = {}
 
+        # Deleting the message and the warning is a persistent job, not a sleeping task per warning
+        self.scheduler = get_scheduler()
+        self.scheduler.register("automod.cleanup", self._cleanup_job)
+
+    async def cog_unload(self):
+        self.scheduler.unregister("automod.cleanup")
+
+    async def _cleanup_job(self, payload: dict):
+        channel = self.bot.get_channel(payload["channel_id"])
+        if channel is None:
+            return
+        for message_id in (payload["message_id"], payload["warning_id"]):
+            try:
+                await channel.get_partial_message(message_id).delete()
+            except (discord.NotFound, discord.Forbidden):
+                pass
+
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
         # Ignore bots (including itself)
@@ -125,15 +143,10 @@ class SwearFilter(commands.Cog):
                 except (discord.HTTPException, OSError):
                     return
 
-                await asyncio.sleep(10)
-                try:
-                    await message.delete()
-                except (discord.NotFound, discord.Forbidden):
-                    pass
-                try:
-                    await warning_msg.delete()
-                except (discord.NotFound, discord.Forbidden):
-                    pass
+                self.scheduler.schedule_in(
+                    f"automod.cleanup:{warning_msg.id}", "automod.cleanup", 10,
+                    {"channel_id": message.channel.id, "message_id": message.id, "warning_id": warning_msg.id}
+                )
 
                 return  # stop after first matched swear
 
@@ -1,12 +1,16 @@
 import discord
 from discord.ext import commands
 import json
+import logging
 import os
-import asyncio
 import datetime
 from datetime import timezone, timedelta
 from discord.ui import View, Button
 import config  # Ensure config.EMBED_COLOR is defined as an integer (e.g., 0x2ecc71)
+from services.corpus import get_dataset
+from services.scheduler import get_scheduler
+
+logger = logging.getLogger(__name__)
 
 class KorQuizOfTheDay(commands.Cog):
     QUIZ_CHANNEL_ID = 1379145101187485899             # Replace with your quiz channel ID
@@ -19,16 +23,14 @@ class KorQuizOfTheDay(commands.Cog):
         self.bot = bot
 
         cog_folder = os.path.dirname(__file__)
-        base_path = os.path.abspath(os.path.join(cog_folder, ".."))
 
         # Paths for persistent JSON databases
         self.answer_db_path = os.path.join(cog_folder, "kor_quiz_answer_users.json")
         self.leaderboard_db_path = os.path.join(cog_folder, "kor_quiz_leaderboard.json")
         self.progress_path = os.path.join(cog_folder, "kor_progress.json")
 
-        # Load quiz entries from kor_quiz.json
-        with open(os.path.join(base_path, "kor_quiz.json"), encoding="utf-8") as f:
-            self.quizzes = json.load(f)
+        # Quiz entries from kor_quiz.json, via the compiled corpus (services.corpus)
+        self.quizzes = get_dataset("kr_quiz")
 
         # Load or initialize persistent state
         self._load_progress()
@@ -41,8 +43,18 @@ class KorQuizOfTheDay(commands.Cog):
         self.leaderboard_msg = None
         self.quiz_msg = None
 
+        # Daily quiz at 05:00 local time and the next day's button removal, as persistent jobs
+        self.scheduler = get_scheduler()
+        self.scheduler.register("kr_quiz.post", self._daily_post)
+        self.scheduler.register("kr_quiz.remove_buttons", self._remove_buttons_job)
+        self.scheduler.schedule_daily("kr_quiz.post", "kr_quiz.post", datetime.time(5, 0), KorQuizOfTheDay.LOCALE_TZ)
+
         self.task_started = False
 
+    async def cog_unload(self):
+        self.scheduler.unregister("kr_quiz.post")
+        self.scheduler.unregister("kr_quiz.remove_buttons")
+
     def _load_progress(self):
         default = {"quizzes": 0}
         if os.path.isfile(self.progress_path):
@@ -167,7 +179,7 @@ class KorQuizOfTheDay(commands.Cog):
                     self.quiz_msg = None
 
             # If today’s quiz is still active, re-register the persistent view
-            if self.quiz_msg:
+            if self.quiz_msg and self.quizzes:
                 idx = self.progress.get("quizzes", 0) - 1
                 if idx < 0:
                     idx += len(self.quizzes)
@@ -186,33 +198,22 @@ class KorQuizOfTheDay(commands.Cog):
                 )
                 self.bot.add_view(view)
 
-                # If we have a stored "sent_ts", schedule removal based on it
+                # Quizzes sent before removals were persisted have no job yet
                 sent_ts = self.leaderboard_data.get("sent_ts")
-                if sent_ts:
-                    asyncio.create_task(self._schedule_remove(sent_ts))
+                if sent_ts and not self.scheduler.has("kr_quiz.remove_buttons"):
+                    self._schedule_remove(sent_ts)
 
-            # Start daily scheduler
-            self.bot.loop.create_task(self._daily_scheduler())
             self.task_started = True
 
-    async def _daily_scheduler(self):
-        while True:
-            now = datetime.datetime.now(KorQuizOfTheDay.LOCALE_TZ)
-            # Send new quiz at 7:39 PM BST
-            target_today = now.replace(hour=5, minute=0, second=0, microsecond=0)
-            if now >= target_today:
-                target = target_today + datetime.timedelta(days=1)
-            else:
-                target = target_today
-
-            await asyncio.sleep((target - now).total_seconds())
-            await self.send_quiz_of_the_day()
-            self._save_progress()
+    async def _daily_post(self, payload: dict):
+        await self.send_quiz_of_the_day()
+        self._save_progress()
 
-            # No "sleep + edit" here; removal is handled by _schedule_remove.
-            # Loop then waits until next day's 19:39.
-
-    def _next_index(self) -> int:
+    def _next_index(self) -> int | None:
+        if not self.quizzes:
+            # The corpus leaves a dataset empty when its source is unreadable
+            logger.warning("No quizzes in the corpus; nothing to post")
+            return None
         current = self.progress.get("quizzes", 0) % len(self.quizzes)
         self.progress["quizzes"] = (current + 1) % len(self.quizzes)
         return current
@@ -220,6 +221,8 @@ class KorQuizOfTheDay(commands.Cog):
     async def send_quiz_of_the_day(self):
         # 1) Determine today's index
         idx = self._next_index()
+        if idx is None:
+            return
         entry = self.quizzes[idx]
 
         quiz_channel = self.bot.get_channel(KorQuizOfTheDay.QUIZ_CHANNEL_ID)
@@ -302,29 +305,32 @@ class KorQuizOfTheDay(commands.Cog):
         self._save_leaderboard(self.leaderboard_data)
 
         # 11) Schedule removal 23 hours after send
-        asyncio.create_task(self._schedule_remove(self.leaderboard_data["sent_ts"]))
+        self._schedule_remove(self.leaderboard_data["sent_ts"])
 
-    async def _schedule_remove(self, sent_ts_iso: str):
+    def _schedule_remove(self, sent_ts_iso: str):
         """
-        Calculate time difference between now and (sent_ts + 23h).
-        If already ≥ 23h, edit immediately; otherwise sleep remaining seconds, then remove buttons + add answer.
+        Schedule removing the buttons and revealing the answer 23 hours after sent_ts.
+        The job is persisted, so it still runs (late, if need be) across restarts.
         """
         sent_dt = datetime.datetime.fromisoformat(sent_ts_iso)
         sent_dt = sent_dt.replace(tzinfo=KorQuizOfTheDay.LOCALE_TZ)
 
         target_dt = sent_dt + datetime.timedelta(hours=23)
-        now = datetime.datetime.now(KorQuizOfTheDay.LOCALE_TZ)
-        delay = (target_dt - now).total_seconds()
+        self.scheduler.schedule_at("kr_quiz.remove_buttons", "kr_quiz.remove_buttons", target_dt.timestamp())
 
-        if delay <= 0:
-            await self._do_remove_buttons()
-        else:
-            await asyncio.sleep(delay)
-            await self._do_remove_buttons()
+    async def _remove_buttons_job(self, payload: dict):
+        # May run on startup before on_ready has fetched the quiz message
+        qz_channel = self.bot.get_channel(KorQuizOfTheDay.QUIZ_CHANNEL_ID)
+        if not self.quiz_msg and self.leaderboard_data.get("quiz_message_id") and qz_channel:
+            try:
+                self.quiz_msg = await qz_channel.fetch_message(self.leaderboard_data["quiz_message_id"])
+            except Exception:
+                self.quiz_msg = None
+        await self._do_remove_buttons()
 
     async def _do_remove_buttons(self):
         """Remove buttons and reveal answer on self.quiz_msg, if still present."""
-        if not self.quiz_msg:
+        if not self.quiz_msg or not self.quizzes:
             return
 
         idx = self.progress.get("quizzes", 0) - 1
@@ -2,14 +2,18 @@
 import discord
 from discord.ext import commands
 import json
+import logging
 import os
-import asyncio
 import datetime
 import random
 import re
 from datetime import timezone, timedelta
 from io import BytesIO
-from PIL import Image, ImageDraw, ImageFont
+from services.corpus import get_dataset
+from services.scheduler import get_scheduler
+from services.cards import get_card_renderer, render_korean_card
+
+logger = logging.getLogger(__name__)
 
 class DayoftheDay(commands.Cog):
     WORD_CHANNEL_ID    = 1378636496117960895
@@ -22,9 +26,6 @@ class DayoftheDay(commands.Cog):
     LOCALE_TZ  = timezone(timedelta(hours=1))   # UTC+1 for BST
     START_DATE = datetime.date(2025, 1, 1)
 
-    FONT_PATH    = os.path.join(os.path.dirname(__file__), "NanumGothic-Bold.ttf")
-    IMAGE_SIZE   = (550, 190)
-
     BG_COLORS = [
         "#FFCDD2",  # slightly darker pink
         "#C8E6C9",  # pale green
@@ -38,17 +39,12 @@ class DayoftheDay(commands.Cog):
         "#F8BBD0",  # soft rose
     ]
 
-    MAIN_FONT_SIZE = 80
-    SUB_FONT_SIZE  = 30
-
     def __init__(self, bot: commands.Bot):
         self.bot = bot
 
-        base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-        with open(os.path.join(base_path, "words.json"), encoding="utf-8") as f:
-            self.words = json.load(f)
-        with open(os.path.join(base_path, "phrases.json"), encoding="utf-8") as f:
-            self.phrases = json.load(f)
+        # Shared, memory-mapped entries from the compiled corpus (services.corpus)
+        self.words = get_dataset("kr_words")
+        self.phrases = get_dataset("kr_phrases")
 
         cog_folder = os.path.dirname(__file__)
         self.progress_path = os.path.join(cog_folder, "progress.json")
@@ -56,6 +52,14 @@ class DayoftheDay(commands.Cog):
 
         self.task_started = False
 
+        # Daily at 05:00 local time; a post missed while the bot was down goes out on startup
+        self.scheduler = get_scheduler()
+        self.scheduler.register("oftheday.post", self._daily_post)
+        self.scheduler.schedule_daily("oftheday.post", "oftheday.post", datetime.time(5, 0), DayoftheDay.LOCALE_TZ)
+
+    async def cog_unload(self):
+        self.scheduler.unregister("oftheday.post")
+
     def _load_progress(self):
         default = {"words": 0, "phrases": 0}
         if os.path.isfile(self.progress_path):
@@ -79,24 +83,20 @@ class DayoftheDay(commands.Cog):
     @commands.Cog.listener()
     async def on_ready(self):
         if not self.task_started:
-            self.bot.loop.create_task(self._daily_scheduler())
+            self._prerender_next("words", self.words)
+            self._prerender_next("phrases", self.phrases)
             self.task_started = True
 
-    async def _daily_scheduler(self):
-        while True:
-            now = datetime.datetime.now(DayoftheDay.LOCALE_TZ)
-            target_today = now.replace(hour=5, minute=0, second=0, microsecond=0)
-            if now >= target_today:
-                target = target_today + datetime.timedelta(days=1)
-            else:
-                target = target_today
-
-            await asyncio.sleep((target - now).total_seconds())
-            await self.send_word_of_the_day()
-            await self.send_phrase_of_the_day()
-            self._save_progress()
+    async def _daily_post(self, payload: dict):
+        await self.send_word_of_the_day()
+        await self.send_phrase_of_the_day()
+        self._save_progress()
 
-    def _next_index(self, key: str, data_list: list) -> int:
+    def _next_index(self, key: str, data_list: list) -> int | None:
+        if not data_list:
+            # The corpus leaves a dataset empty when its source is unreadable
+            logger.warning(f"No {key} in the corpus; nothing to post")
+            return None
         current = self.progress.get(key, 0) % len(data_list)
         self.progress[key] = (current + 1) % len(data_list)
         return current
@@ -107,95 +107,31 @@ class DayoftheDay(commands.Cog):
         match = re.search(r"\(([^)]+)\)", details_en)
         return match.group(1) if match else ""
 
-    def _build_word_image(self, korean_word: str, romanization: str, meaning: str):
-        bg_hex = random.choice(DayoftheDay.BG_COLORS)
-        bg_color = tuple(int(bg_hex[i : i + 2], 16) for i in (1, 3, 5))
-
-        brightness = (bg_color[0] * 299 + bg_color[1] * 587 + bg_color[2] * 114) / 1000
-        font_color = (255, 255, 255) if brightness < 128 else (0, 0, 0)
-
-        img = Image.new("RGB", DayoftheDay.IMAGE_SIZE, color=bg_color)
-        draw = ImageDraw.Draw(img)
-
-        # Dynamically adjust main font size to fit width
-        max_width = DayoftheDay.IMAGE_SIZE[0] - 20
-        font_size = DayoftheDay.MAIN_FONT_SIZE
-        while font_size > 10:
-            try:
-                main_font = ImageFont.truetype(DayoftheDay.FONT_PATH, font_size)
-            except Exception:
-                main_font = ImageFont.load_default()
-                break
-            bbox_main = draw.textbbox((0, 0), korean_word, font=main_font)
-            w_main = bbox_main[2] - bbox_main[0]
-            if w_main <= max_width:
-                break
-            font_size -= 2
-
-        try:
-            sub_font = ImageFont.truetype(DayoftheDay.FONT_PATH, DayoftheDay.SUB_FONT_SIZE)
-        except Exception:
-            sub_font = ImageFont.load_default()
-
-        bbox_main = draw.textbbox((0, 0), korean_word, font=main_font)
-        w_main = bbox_main[2] - bbox_main[0]
-        h_main = bbox_main[3] - bbox_main[1]
-
-        rom_line = f"[{romanization}]" if romanization else ""
-        mean_line = meaning if meaning else ""
-
-        if rom_line:
-            bbox_rom = draw.textbbox((0, 0), rom_line, font=sub_font)
-            w_rom = bbox_rom[2] - bbox_rom[0]
-            h_rom = bbox_rom[3] - bbox_rom[1]
-        else:
-            w_rom = h_rom = 0
-
-        if mean_line:
-            bbox_mean = draw.textbbox((0, 0), mean_line, font=sub_font)
-            w_mean = bbox_mean[2] - bbox_mean[0]
-            h_mean = bbox_mean[3] - bbox_mean[1]
-        else:
-            w_mean = h_mean = 0
-
-        spacing = 8
-        block_height = h_main
-        if rom_line:
-            block_height += spacing + h_rom
-        if mean_line:
-            block_height += spacing + h_mean
-
-        y_start = (DayoftheDay.IMAGE_SIZE[1] - block_height) // 2
-
-        x_main = (DayoftheDay.IMAGE_SIZE[0] - w_main) // 2
-        draw.text((x_main, y_start), korean_word, font=main_font, fill=font_color)
-
-        current_y = y_start + h_main
-
-        if rom_line:
-            current_y += spacing
-            x_rom = (DayoftheDay.IMAGE_SIZE[0] - w_rom) // 2
-            draw.text((x_rom, current_y), rom_line, font=sub_font, fill=font_color)
-            current_y += h_rom
-
-        if mean_line:
-            current_y += spacing
-            x_mean = (DayoftheDay.IMAGE_SIZE[0] - w_mean) // 2
-            draw.text((x_mean, current_y), mean_line, font=sub_font, fill=font_color)
-
-        buffer = BytesIO()
-        img.save(buffer, format="PNG")
-        buffer.seek(0)
-        return buffer, bg_hex
+    def _card_args(self, entry: dict, key: str, idx: int) -> tuple:
+        roman = entry.get("romanization", "") or self._extract_romanization(entry.get("details_en", ""))
+        # Colour seeded by the entry, so a card rendered ahead of time matches one rendered at post time
+        bg_hex = random.Random(f"{key}-{idx}").choice(DayoftheDay.BG_COLORS)
+        return (entry.get("korean", "N/A"), roman, entry.get("english", ""), bg_hex)
+
+    def _prerender_next(self, key: str, data_list: list):
+        """Start rendering the card for the next post of `key`, so it is ready when the post is due."""
+        if not data_list:
+            logger.warning(f"No {key} in the corpus; not prerendering a card")
+            return
+        idx = self.progress.get(key, 0) % len(data_list)
+        get_card_renderer().prerender(
+            f"oftheday-{key}", render_korean_card, *self._card_args(data_list[idx], key, idx)
+        )
 
     async def send_word_of_the_day(self):
         idx = self._next_index("words", self.words)
+        if idx is None:
+            return
         entry = self.words[idx]
         channel = self.bot.get_channel(DayoftheDay.WORD_CHANNEL_ID)
         if channel is None:
             return
 
-        roman = entry.get("romanization", "") or self._extract_romanization(entry.get("details_en", ""))
         meaning = entry.get("english", "")
 
         now = datetime.datetime.now(DayoftheDay.LOCALE_TZ)
@@ -205,11 +141,10 @@ class DayoftheDay(commands.Cog):
             display_date = now.date()
         date_str = display_date.strftime("%Y-%m-%d (%A)")
 
-        img_buffer, bg_hex = self._build_word_image(
-            entry.get("korean", "N/A"),
-            roman,
-            meaning
-        )
+        card_args = self._card_args(entry, "words", idx)
+        png = await get_card_renderer().take("oftheday-words", render_korean_card, *card_args)
+        self._prerender_next("words", self.words)
+        img_buffer, bg_hex = BytesIO(png), card_args[-1]
 
         embed_color = int(bg_hex.lstrip("#"), 16)
 
@@ -233,12 +168,13 @@ class DayoftheDay(commands.Cog):
 
     async def send_phrase_of_the_day(self):
         idx = self._next_index("phrases", self.phrases)
+        if idx is None:
+            return
         entry = self.phrases[idx]
         channel = self.bot.get_channel(DayoftheDay.PHRASE_CHANNEL_ID)
         if channel is None:
             return
 
-        roman = entry.get("romanization", "") or self._extract_romanization(entry.get("details_en", ""))
         meaning = entry.get("english", "")
 
         now = datetime.datetime.now(DayoftheDay.LOCALE_TZ)
@@ -248,11 +184,10 @@ class DayoftheDay(commands.Cog):
             display_date = now.date()
         date_str = display_date.strftime("%Y-%m-%d (%A)")
 
-        img_buffer, bg_hex = self._build_word_image(
-            entry.get("korean", "N/A"),
-            roman,
-            meaning
-        )
+        card_args = self._card_args(entry, "phrases", idx)
+        png = await get_card_renderer().take("oftheday-phrases", render_korean_card, *card_args)
+        self._prerender_next("phrases", self.phrases)
+        img_buffer, bg_hex = BytesIO(png), card_args[-1]
 
         embed_color = int(bg_hex.lstrip("#"), 16)
 
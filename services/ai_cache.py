@@ -0,0 +1,188 @@
+import asyncio
+import collections
+import hashlib
+import json
+import sqlite3
+import time
+
+import config
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+class _Abandoned(Exception):
+    """The caller computing an answer gave up on it; a waiting caller takes over."""
+
+
+def cache_key(payload: dict, model: str) -> str:
+    """Hash of the normalized prompt, system prompt, model and generation config."""
+    system = " ".join(
+        _normalize(p.get("text", "")) for p in payload.get("systemInstruction", {}).get("parts", [])
+    )
+    turns = [
+        [c.get("role", "user"), " ".join(_normalize(p.get("text", "")) for p in c.get("parts", []))]
+        for c in payload.get("contents", [])
+    ]
+    material = json.dumps(
+        {
+            "model": model,
+            "system": system,
+            "contents": turns,
+            "generationConfig": payload.get("generationConfig", {}),
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Exact-match cache for model answers.
+
+    In-memory LRU bounded by `max_entries`, entries expire after `ttl`
+    seconds, and optionally mirrored to SQLite so answers survive restarts.
+    Concurrent requests for the same key are collapsed: the first caller
+    computes, the others await the same future. If that caller is cancelled
+    or gives up, one of the waiters computes instead.
+    """
+
+    def __init__(self, ttl: float, max_entries: int, db_path: str | None = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: collections.OrderedDict[str, tuple[float, str]] = collections.OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+        self.db = None
+        if db_path:
+            self.db = sqlite3.connect(db_path)
+            with self.db:
+                self.db.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS responses (
+                        key      TEXT PRIMARY KEY,
+                        response TEXT,
+                        expires  REAL
+                    )
+                    """
+                )
+                self.db.execute("CREATE INDEX IF NOT EXISTS idx_responses_expires ON responses(expires)")
+                self.db.execute("DELETE FROM responses WHERE expires < ?", (time.time(),))
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires, text = entry
+            if expires > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return text
+            del self._entries[key]
+
+        if self.db is not None:
+            row = self.db.execute(
+                "SELECT response, expires FROM responses WHERE key = ? AND expires > ?", (key, now)
+            ).fetchone()
+            if row:
+                self.disk_hits += 1
+                self._remember(key, row[0], row[1])
+                return row[0]
+        return None
+
+    def _remember(self, key: str, text: str, expires: float):
+        self._entries[key] = (expires, text)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def put(self, key: str, text: str):
+        expires = time.time() + self.ttl
+        self._remember(key, text, expires)
+        if self.db is not None:
+            with self.db:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, expires) VALUES (?, ?, ?)",
+                    (key, text, expires)
+                )
+
+    async def get_or_compute(self, key: str, compute, store_key=None, abandoned=()) -> tuple[str, bool]:
+        """
+        Return (text, computed). `computed` is True only for the caller that
+        actually ran `compute`; hits and coalesced waiters get False.
+        Empty answers are not cached.
+
+        `store_key()`, if given, is called after computing for the key to
+        store the answer under (e.g. for the model that actually answered).
+        Exceptions in `abandoned`, like cancellation, mean this caller gave
+        up rather than that the computation failed: they are raised here
+        only, and a waiter starts over instead.
+        """
+        while True:
+            text = self.get(key)
+            if text is not None:
+                return text, False
+
+            pending = self._inflight.get(key)
+            if pending is None:
+                break
+            try:
+                text = await asyncio.shield(pending)
+            except _Abandoned:
+                continue
+            self.coalesced += 1
+            return text, False
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            text = await compute()
+        except (asyncio.CancelledError, *abandoned):
+            future.set_exception(_Abandoned())
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark as retrieved so an unawaited failure isn't logged twice
+            future.exception()
+            raise
+        else:
+            if text:
+                self.put(store_key() if store_key is not None else key, text)
+            future.set_result(text)
+            return text, True
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.disk_hits + self.misses + self.coalesced
+        served = self.hits + self.disk_hits + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "hit_rate": served / lookups if lookups else 0.0,
+        }
+
+
+_cache: ResponseCache | None = None
+
+
+def get_response_cache() -> ResponseCache:
+    global _cache
+    if _cache is None:
+        _cache = ResponseCache(
+            config.AI_CACHE_TTL,
+            config.AI_CACHE_MAX_ENTRIES,
+            config.AI_CACHE_DB if config.AI_CACHE_PERSIST else None,
+        )
+    return _cache
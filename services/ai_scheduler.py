@@ -0,0 +1,223 @@
+import asyncio
+import collections
+import contextlib
+import logging
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# Priority classes, served strictly in this order
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+# How often a waiting job's queue position is re-checked for its on_queued callback
+POSITION_REFRESH_SECONDS = 5
+
+
+class RequestCancelled(Exception):
+    """The queued request was dropped (thread locked, message deleted, ...)."""
+
+
+class _Ticket:
+    __slots__ = ("user_id", "priority", "tags", "future", "task", "dropped")
+
+    def __init__(self, user_id: int, priority: int, tags: frozenset):
+        self.user_id = user_id
+        self.priority = priority
+        self.tags = tags
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.task: asyncio.Task | None = None
+        self.dropped = False
+
+
+class AIScheduler:
+    """
+    Fair scheduler in front of the Gemini client.
+
+    At most `slots` AI jobs run at once. Waiting jobs are grouped by
+    priority class; within a class, users take turns (round-robin), so one
+    user with many queued questions only gets every n-th free slot.
+
+    Jobs carry tags such as ("thread", id) or ("message", id); `cancel(tag)`
+    drops matching queued jobs and cancels matching running ones. run()
+    executes each job in a task of its own, so a cancellation stops only
+    that job, never the listener that submitted it.
+    """
+
+    def __init__(self, slots: int):
+        self.slots = slots
+        self.running: set[_Ticket] = set()
+        # priority -> user_id -> queued tickets; dict order is the round-robin order
+        self._queues: dict[int, collections.OrderedDict[int, collections.deque]] = {
+            PRIORITY_HIGH: collections.OrderedDict(),
+            PRIORITY_NORMAL: collections.OrderedDict(),
+            PRIORITY_LOW: collections.OrderedDict(),
+        }
+        self.completed = 0
+        self.cancelled = 0
+
+    def queued(self) -> int:
+        return sum(len(q) for users in self._queues.values() for q in users.values())
+
+    def _order(self) -> list[_Ticket]:
+        """Waiting tickets in the order they would be granted."""
+        order = []
+        for priority in sorted(self._queues):
+            lanes = [list(q) for q in self._queues[priority].values()]
+            depth = max((len(lane) for lane in lanes), default=0)
+            for i in range(depth):
+                order.extend(lane[i] for lane in lanes if i < len(lane))
+        return order
+
+    def position(self, ticket: _Ticket) -> int:
+        """1-based place in line, 0 if already running or gone."""
+        try:
+            return self._order().index(ticket) + 1
+        except ValueError:
+            return 0
+
+    def _pop_next(self) -> _Ticket | None:
+        for priority in sorted(self._queues):
+            users = self._queues[priority]
+            while users:
+                user_id, lane = next(iter(users.items()))
+                ticket = lane.popleft()
+                if lane:
+                    users.move_to_end(user_id)
+                else:
+                    del users[user_id]
+                return ticket
+        return None
+
+    def _dispatch(self):
+        while len(self.running) < self.slots:
+            ticket = self._pop_next()
+            if ticket is None:
+                return
+            if ticket.future.done():
+                continue
+            self.running.add(ticket)
+            ticket.future.set_result(None)
+
+    def _remove(self, ticket: _Ticket):
+        users = self._queues[ticket.priority]
+        lane = users.get(ticket.user_id)
+        if lane is None:
+            return
+        with contextlib.suppress(ValueError):
+            lane.remove(ticket)
+        if not lane:
+            del users[ticket.user_id]
+
+    async def _report_position(self, ticket: _Ticket, on_queued):
+        """Await `on_queued(position)` whenever the ticket's place in line changes."""
+        shown = 0
+        while not ticket.future.done():
+            position = self.position(ticket)
+            if position and position != shown:
+                try:
+                    await on_queued(position)
+                except Exception:
+                    logger.exception("Queue position callback failed")
+                shown = position
+            await asyncio.wait({ticket.future}, timeout=POSITION_REFRESH_SECONDS)
+
+    @contextlib.asynccontextmanager
+    async def slot(self, user_id: int, priority: int = PRIORITY_NORMAL, tags=(), on_queued=None):
+        """
+        Wait for a turn, run the body, release the slot; yields the ticket.
+
+        `on_queued(position)` is awaited while the job waits, each time its
+        position changes. Raises RequestCancelled if the job is dropped
+        before it starts. A cancel() after that only reaches the body
+        through run().
+        """
+        ticket = _Ticket(user_id, priority, frozenset(tags))
+        self._queues[priority].setdefault(user_id, collections.deque()).append(ticket)
+        self._dispatch()
+
+        reporter = None
+        if not ticket.future.done() and on_queued is not None:
+            reporter = asyncio.create_task(self._report_position(ticket, on_queued))
+
+        try:
+            await ticket.future
+        except (asyncio.CancelledError, RequestCancelled):
+            self._remove(ticket)
+            if ticket in self.running:
+                # Granted and cancelled in the same tick: hand the slot on
+                self.running.discard(ticket)
+                self._dispatch()
+            raise
+        finally:
+            if reporter is not None:
+                reporter.cancel()
+        if ticket.dropped:
+            # Cancelled after being granted but before it got to run
+            self.running.discard(ticket)
+            self._dispatch()
+            raise RequestCancelled()
+
+        try:
+            yield ticket
+        finally:
+            self.running.discard(ticket)
+            self.completed += 1
+            self._dispatch()
+
+    async def run(self, user_id: int, job, priority: int = PRIORITY_NORMAL, tags=(), on_queued=None):
+        """
+        Wait for a turn and return the result of `job()`, run in its own task.
+
+        Raises RequestCancelled if a matching cancel() drops the job, whether
+        it was still queued or already running.
+        """
+        async with self.slot(user_id, priority, tags, on_queued) as ticket:
+            ticket.task = asyncio.create_task(job())
+            try:
+                await asyncio.wait({ticket.task})
+            except asyncio.CancelledError:
+                # The caller itself was cancelled; take the job down with it
+                ticket.task.cancel()
+                raise
+            if ticket.task.cancelled():
+                raise RequestCancelled()
+            return ticket.task.result()
+
+    def cancel(self, tag) -> int:
+        """Drop queued jobs and cancel running jobs carrying `tag`; returns how many were hit."""
+        hit = 0
+        for ticket in self._order():
+            if tag in ticket.tags:
+                self._remove(ticket)
+                ticket.future.set_exception(RequestCancelled(tag))
+                hit += 1
+        for ticket in list(self.running):
+            if tag in ticket.tags and not ticket.dropped:
+                # Marked first, so a repeated cancel() doesn't count the job again
+                ticket.dropped = True
+                if ticket.task is not None:
+                    ticket.task.cancel()
+                hit += 1
+        self.cancelled += hit
+        return hit
+
+    def stats(self) -> dict:
+        return {
+            "running": len(self.running),
+            "queued": self.queued(),
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+        }
+
+
+_scheduler: AIScheduler | None = None
+
+
+def get_ai_scheduler() -> AIScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = AIScheduler(config.AI_SCHEDULER_SLOTS)
+    return _scheduler
@@ -0,0 +1,211 @@
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import time
+
+import aiohttp
+import discord
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024  # bytes read from the CDN per iteration
+EVICT_BATCH = 32
+
+
+def _move_into_place(tmp_path: str, path: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    os.replace(tmp_path, path)
+
+
+def _remove_if_exists(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _remove_all(paths: list[str]):
+    for path in paths:
+        _remove_if_exists(path)
+
+
+class AttachmentStore:
+    """
+    Content-addressed local copy of Discord attachments.
+
+    Blobs are stored as <root>/<sha[:2]>/<sha256>, so the same file posted twice
+    is kept once. The store is capped at `max_bytes`; the least recently used
+    blobs are evicted first.
+    """
+
+    def __init__(self, root: str, max_bytes: int, concurrency: int = 4):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._concurrency = concurrency
+        os.makedirs(root, exist_ok=True)
+
+        self.db = sqlite3.connect(os.path.join(root, "index.db"))
+        with self.db:
+            self.db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS blobs (
+                    sha256      TEXT PRIMARY KEY,
+                    size        INTEGER,
+                    last_access REAL
+                )
+                """
+            )
+            self.db.execute("CREATE INDEX IF NOT EXISTS idx_blobs_last_access ON blobs(last_access)")
+            self.db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS attachments (
+                    attachment_id INTEGER PRIMARY KEY,
+                    message_id    INTEGER,
+                    channel_id    INTEGER,
+                    sha256        TEXT,
+                    filename      TEXT,
+                    content_type  TEXT
+                )
+                """
+            )
+            self.db.execute("CREATE INDEX IF NOT EXISTS idx_attachments_sha256 ON attachments(sha256)")
+        self.total_bytes = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+
+        # Bounded concurrency for downloads, one pooled session for all of them
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._session: aiohttp.ClientSession | None = None
+        # attachment_id -> in-flight download
+        self._pending: dict[int, asyncio.Task] = {}
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self._concurrency, ttl_dns_cache=300)
+            timeout = aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=60)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self._session
+
+    def _blob_path(self, sha256: str) -> str:
+        return os.path.join(self.root, sha256[:2], sha256)
+
+    def schedule(self, message: discord.Message):
+        """Start archiving every attachment on `message` in the background."""
+        for att in message.attachments:
+            if att.id in self._pending or att.size > self.max_bytes:
+                continue
+            task = asyncio.create_task(self._archive(att, message))
+            self._pending[att.id] = task
+            task.add_done_callback(lambda _t, aid=att.id: self._pending.pop(aid, None))
+
+    async def _archive(self, att: discord.Attachment, message: discord.Message) -> str | None:
+        tmp_path = os.path.join(self.root, f".tmp-{att.id}")
+        try:
+            async with self._semaphore:
+                downloaded = await self._download(att, tmp_path)
+            if downloaded is None:
+                return None
+            sha256, size = downloaded
+            path = self._blob_path(sha256)
+            # Duplicate content keeps the existing blob; the temp file is removed below
+            if not await asyncio.to_thread(os.path.exists, path):
+                await asyncio.to_thread(_move_into_place, tmp_path, path)
+        finally:
+            # Failed, cancelled or duplicate downloads leave nothing behind
+            await asyncio.to_thread(_remove_if_exists, tmp_path)
+
+        now = time.time()
+        with self.db:
+            # Only the download that creates the row counts the blob, even if
+            # the same content finished downloading twice at once
+            created = self.db.execute(
+                "INSERT OR IGNORE INTO blobs (sha256, size, last_access) VALUES (?, ?, ?)",
+                (sha256, size, now)
+            ).rowcount
+            if created:
+                self.total_bytes += size
+            else:
+                self.db.execute("UPDATE blobs SET last_access = ? WHERE sha256 = ?", (now, sha256))
+            self.db.execute(
+                "INSERT OR REPLACE INTO attachments (attachment_id, message_id, channel_id, sha256, filename, content_type) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (att.id, message.id, message.channel.id, sha256, att.filename, att.content_type)
+            )
+        await self._evict()
+        return path
+
+    async def _download(self, att: discord.Attachment, tmp_path: str) -> tuple[str, int] | None:
+        """Stream an attachment into `tmp_path`; returns (sha256, size), or None on failure."""
+        digest = hashlib.sha256()
+        size = 0
+        fh = None
+        try:
+            async with self._get_session().get(att.url) as resp:
+                if resp.status != 200:
+                    logger.warning(f"Archiving attachment {att.id} failed with HTTP {resp.status}")
+                    return None
+                # Stream straight to disk, never holding the whole file; file I/O runs off the loop
+                fh = await asyncio.to_thread(open, tmp_path, "wb")
+                async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+                    digest.update(chunk)
+                    await asyncio.to_thread(fh.write, chunk)
+                    size += len(chunk)
+        except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+            logger.error(f"Error archiving attachment {att.id}: {e}")
+            return None
+        finally:
+            if fh is not None:
+                fh.close()
+        return digest.hexdigest(), size
+
+    async def _evict(self):
+        paths = []
+        while self.total_bytes > self.max_bytes:
+            rows = self.db.execute(
+                "SELECT sha256, size FROM blobs ORDER BY last_access LIMIT ?", (EVICT_BATCH,)
+            ).fetchall()
+            if not rows:
+                self.total_bytes = 0
+                break
+            with self.db:
+                for sha256, size in rows:
+                    paths.append(self._blob_path(sha256))
+                    self.db.execute("DELETE FROM blobs WHERE sha256 = ?", (sha256,))
+                    self.db.execute("DELETE FROM attachments WHERE sha256 = ?", (sha256,))
+                    self.total_bytes -= size
+                    if self.total_bytes <= self.max_bytes:
+                        break
+        if paths:
+            await asyncio.to_thread(_remove_all, paths)
+
+    async def get(self, attachment_id: int, wait: float = 10.0) -> tuple[str, str] | None:
+        """
+        Return (path, filename) of the local copy of an attachment, or None.
+        Waits up to `wait` seconds if the download is still in flight.
+        """
+        task = self._pending.get(attachment_id)
+        if task is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(task), wait)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                return None
+
+        row = self.db.execute(
+            "SELECT sha256, filename FROM attachments WHERE attachment_id = ?", (attachment_id,)
+        ).fetchone()
+        if not row:
+            return None
+        sha256, filename = row
+        path = self._blob_path(sha256)
+        if not os.path.exists(path):
+            return None
+        with self.db:
+            self.db.execute("UPDATE blobs SET last_access = ? WHERE sha256 = ?", (time.time(), sha256))
+        return path, filename
+
+    async def close(self):
+        for task in list(self._pending.values()):
+            task.cancel()
+        if self._session is not None:
+            await self._session.close()
+        self.db.close()
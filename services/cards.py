@@ -0,0 +1,208 @@
+"""
+Image cards for the of-the-day posts, rendered off the event loop.
+
+The render_* functions are pure (text in, PNG bytes out) so they can run
+in a worker process. Each process keeps its own LRU of loaded fonts, and
+the main line's font size is found by binary search instead of loading a
+new font for every 2pt step.
+"""
+import asyncio
+import functools
+import logging
+import multiprocessing
+import os
+import textwrap
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+
+from PIL import Image, ImageDraw, ImageFont
+
+import config
+
+logger = logging.getLogger(__name__)
+
+FONT_PATH = os.path.join(os.path.dirname(__file__), "..", "server_utilities", "NanumGothic-Bold.ttf")
+MIN_FONT_SIZE = 10
+
+# Korean word/phrase cards (server_utilities/oftheday.py)
+KOREAN_CARD_SIZE = (550, 190)
+KOREAN_MAIN_FONT_SIZE = 80
+KOREAN_SUB_FONT_SIZE = 30
+KOREAN_SPACING = 8
+
+# English word/phrase cards (server_utilities/eng_oftheday.py)
+ENGLISH_CARD_SIZE = (1000, 350)
+ENGLISH_MAIN_FONT_SIZE = 50
+ENGLISH_SUB_FONT_SIZE = 20
+ENGLISH_LINE_SPACING = 12
+
+
+@functools.lru_cache(maxsize=config.CARD_FONT_CACHE_SIZE)
+def load_font(path: str, size: int) -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
+    try:
+        return ImageFont.truetype(path, size)
+    except OSError:
+        logger.warning(f"Could not load font {path}; using Pillow's default")
+        return ImageFont.load_default()
+
+
+def _size(font, text: str) -> tuple[int, int]:
+    bbox = font.getbbox(text)
+    return bbox[2] - bbox[0], bbox[3] - bbox[1]
+
+
+def fit_font(text: str, max_size: int, max_width: int, path: str = FONT_PATH):
+    """The largest font (down to MIN_FONT_SIZE) in which `text` is at most `max_width` wide."""
+    lo, hi = MIN_FONT_SIZE, max_size
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if _size(load_font(path, mid), text)[0] <= max_width:
+            lo = mid
+        else:
+            hi = mid - 1
+    return load_font(path, lo)
+
+
+def wrap_lines(text: str, font, max_width: int) -> list[str]:
+    """Wrap `text` into lines no wider than `max_width` in `font`."""
+    lines = []
+    # First split by existing newlines, then wrap each paragraph
+    for paragraph in text.split("\n"):
+        # initial wrap by an approximate character count
+        for line in textwrap.wrap(paragraph, width=60):
+            # If a wrapped line still exceeds max_width, split it further
+            while font.getbbox(line)[2] > max_width:
+                # split roughly in half and find a space near midpoint
+                mid = len(line) // 2
+                split_index = line.rfind(" ", 0, mid)
+                if split_index == -1:
+                    split_index = mid
+                lines.append(line[:split_index])
+                line = line[split_index:].lstrip()
+            lines.append(line)
+    return lines
+
+
+def _hex_to_rgb(bg_hex: str) -> tuple[int, int, int]:
+    return tuple(int(bg_hex[i : i + 2], 16) for i in (1, 3, 5))
+
+
+def _draw_centered(size: tuple[int, int], bg_hex: str, font_color, rows: list[tuple[str, object]], spacing: int) -> bytes:
+    """Draw (text, font) rows as one vertically centred block, each row centred horizontally."""
+    img = Image.new("RGB", size, color=_hex_to_rgb(bg_hex))
+    draw = ImageDraw.Draw(img)
+    measured = [(text, font, *_size(font, text)) for text, font in rows]
+    block_height = sum(h for _, _, _, h in measured) + spacing * (len(measured) - 1)
+    y = (size[1] - block_height) // 2
+    for text, font, w, h in measured:
+        draw.text(((size[0] - w) // 2, y), text, font=font, fill=font_color)
+        y += h + spacing
+
+    buffer = BytesIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def render_korean_card(korean_word: str, romanization: str, meaning: str, bg_hex: str) -> bytes:
+    bg_color = _hex_to_rgb(bg_hex)
+    brightness = (bg_color[0] * 299 + bg_color[1] * 587 + bg_color[2] * 114) / 1000
+    font_color = (255, 255, 255) if brightness < 128 else (0, 0, 0)
+
+    main_font = fit_font(korean_word, KOREAN_MAIN_FONT_SIZE, KOREAN_CARD_SIZE[0] - 20)
+    sub_font = load_font(FONT_PATH, KOREAN_SUB_FONT_SIZE)
+    rows = [(korean_word, main_font)]
+    if romanization:
+        rows.append((f"[{romanization}]", sub_font))
+    if meaning:
+        rows.append((meaning, sub_font))
+    return _draw_centered(KOREAN_CARD_SIZE, bg_hex, font_color, rows, KOREAN_SPACING)
+
+
+def render_english_card(main_text: str, pronunciation: str, meanings: tuple[str, ...], bg_hex: str) -> bytes:
+    """Word cards pass one meaning; phrase cards pass the English and the Korean meaning."""
+    max_text_width = ENGLISH_CARD_SIZE[0] - 40  # margin of 20px each side
+    main_font = fit_font(main_text, ENGLISH_MAIN_FONT_SIZE, max_text_width)
+    sub_font = load_font(FONT_PATH, ENGLISH_SUB_FONT_SIZE)
+    rows = [(main_text, main_font)]
+    if pronunciation:
+        rows.append((f"[{pronunciation}]", sub_font))
+    for meaning in meanings:
+        if meaning:
+            rows.extend((line, sub_font) for line in wrap_lines(meaning, sub_font, max_text_width))
+    # Always dark text on the pale backgrounds
+    return _draw_centered(ENGLISH_CARD_SIZE, bg_hex, (0, 0, 0), rows, ENGLISH_LINE_SPACING)
+
+
+class CardRenderer:
+    """
+    Runs render_* functions in a small process pool (config.CARD_RENDER_WORKERS;
+    0 renders in a thread instead), so Pillow never blocks the gateway.
+
+    prerender() starts a card ahead of its post; take() returns it if it was
+    rendered from the same arguments, and renders from scratch otherwise.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._pool: ProcessPoolExecutor | None = None
+        self._ahead: dict[str, tuple[tuple, asyncio.Task]] = {}
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # forkserver: workers don't inherit the bot's sockets and threads
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("forkserver"))
+        return self._pool
+
+    async def render(self, fn, *args) -> bytes:
+        if self.workers <= 0:
+            return await asyncio.to_thread(fn, *args)
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._executor(), fn, *args)
+        except BrokenProcessPool:
+            logger.warning("Card render pool broke; starting a new one")
+            self._pool = None
+            return await loop.run_in_executor(self._executor(), fn, *args)
+
+    def prerender(self, key: str, fn, *args):
+        previous = self._ahead.pop(key, None)
+        if previous is not None:
+            previous[1].cancel()
+        self._ahead[key] = (args, asyncio.get_running_loop().create_task(self.render(fn, *args)))
+
+    async def take(self, key: str, fn, *args) -> bytes:
+        ahead = self._ahead.pop(key, None)
+        if ahead is not None:
+            ahead_args, task = ahead
+            if ahead_args == args:
+                try:
+                    return await task
+                except Exception as e:
+                    logger.error(f"Pre-rendered card {key} failed: {e}")
+            else:
+                task.cancel()
+        return await self.render(fn, *args)
+
+    def close(self):
+        for _, task in self._ahead.values():
+            task.cancel()
+        self._ahead.clear()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+_renderer: CardRenderer | None = None
+
+
+def get_card_renderer() -> CardRenderer:
+    global _renderer
+    if _renderer is None:
+        _renderer = CardRenderer(config.CARD_RENDER_WORKERS)
+    return _renderer
+
+
+def close_card_renderer():
+    if _renderer is not None:
+        _renderer.close()
@@ -0,0 +1,148 @@
+import sqlite3
+import time
+
+import config
+from services.gemini import estimate_text_tokens
+
+
+class Conversation:
+    """One !ask thread: who owns it, when it locks, a rolling summary and the recent turns."""
+
+    def __init__(self, thread_id: int, user_id: int, lock_at: float, summary: str = ""):
+        self.thread_id = thread_id
+        self.user_id = user_id
+        self.lock_at = lock_at
+        self.summary = summary
+        # Each turn: {"id", "role", "content", "tokens"}
+        self.turns: list[dict] = []
+
+    def history_tokens(self) -> int:
+        return sum(t["tokens"] for t in self.turns)
+
+    def contents(self) -> list[dict]:
+        return [{"role": t["role"], "parts": [{"text": t["content"]}]} for t in self.turns]
+
+
+class ConversationStore:
+    """
+    SQLite-backed store for !ask conversations.
+
+    Open conversations are kept in memory; every change is written through
+    so a restart can pick threads back up where they were.
+    """
+
+    def __init__(self, db_path: str):
+        self.db = sqlite3.connect(db_path)
+        with self.db:
+            self.db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS conversations (
+                    thread_id INTEGER PRIMARY KEY,
+                    user_id   INTEGER,
+                    lock_at   REAL,
+                    summary   TEXT DEFAULT ''
+                )
+                """
+            )
+            self.db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS turns (
+                    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+                    thread_id INTEGER,
+                    role      TEXT,
+                    content   TEXT,
+                    tokens    INTEGER
+                )
+                """
+            )
+            self.db.execute("CREATE INDEX IF NOT EXISTS idx_turns_thread ON turns(thread_id, id)")
+        self.open: dict[int, Conversation] = {}
+
+    def load(self) -> dict[int, Conversation]:
+        """Read every stored conversation into memory, including ones already past their lock time."""
+        self.open = {}
+        for thread_id, user_id, lock_at, summary in self.db.execute(
+            "SELECT thread_id, user_id, lock_at, summary FROM conversations"
+        ):
+            self.open[thread_id] = Conversation(thread_id, user_id, lock_at, summary or "")
+        for turn_id, thread_id, role, content, tokens in self.db.execute(
+            "SELECT id, thread_id, role, content, tokens FROM turns ORDER BY thread_id, id"
+        ):
+            conv = self.open.get(thread_id)
+            if conv is not None:
+                conv.turns.append({"id": turn_id, "role": role, "content": content, "tokens": tokens})
+        return self.open
+
+    def get(self, thread_id: int) -> Conversation | None:
+        return self.open.get(thread_id)
+
+    def create(self, thread_id: int, user_id: int, lifetime: float) -> Conversation:
+        conv = Conversation(thread_id, user_id, time.time() + lifetime)
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO conversations (thread_id, user_id, lock_at, summary) VALUES (?, ?, ?, '')",
+                (thread_id, user_id, conv.lock_at)
+            )
+            self.db.execute("DELETE FROM turns WHERE thread_id = ?", (thread_id,))
+        self.open[thread_id] = conv
+        return conv
+
+    def add_turn(self, conv: Conversation, role: str, content: str):
+        tokens = estimate_text_tokens(content)
+        with self.db:
+            cur = self.db.execute(
+                "INSERT INTO turns (thread_id, role, content, tokens) VALUES (?, ?, ?, ?)",
+                (conv.thread_id, role, content, tokens)
+            )
+        conv.turns.append({"id": cur.lastrowid, "role": role, "content": content, "tokens": tokens})
+
+    def pop_overflow(self, conv: Conversation, budget: int) -> list[dict]:
+        """
+        Drop the oldest turns once the history is over `budget` tokens.
+
+        Trims down to half the budget so compaction doesn't run on every
+        message, keeps at least the latest exchange, and never leaves a model
+        turn first. Returns the dropped turns so they can be summarised.
+        """
+        if conv.history_tokens() <= budget:
+            return []
+        target = budget // 2
+        dropped = []
+        total = conv.history_tokens()
+        while conv.turns and (total > target or conv.turns[0]["role"] != "user"):
+            if conv.turns[0]["role"] == "user" and len(conv.turns) <= 2:
+                break
+            turn = conv.turns.pop(0)
+            total -= turn["tokens"]
+            dropped.append(turn)
+        if dropped:
+            with self.db:
+                self.db.execute(
+                    "DELETE FROM turns WHERE thread_id = ? AND id <= ?",
+                    (conv.thread_id, dropped[-1]["id"])
+                )
+        return dropped
+
+    def set_summary(self, conv: Conversation, summary: str):
+        conv.summary = summary
+        with self.db:
+            self.db.execute(
+                "UPDATE conversations SET summary = ? WHERE thread_id = ?", (summary, conv.thread_id)
+            )
+
+    def evict(self, thread_id: int):
+        self.open.pop(thread_id, None)
+        with self.db:
+            self.db.execute("DELETE FROM turns WHERE thread_id = ?", (thread_id,))
+            self.db.execute("DELETE FROM conversations WHERE thread_id = ?", (thread_id,))
+
+
+_store: ConversationStore | None = None
+
+
+def get_conversation_store() -> ConversationStore:
+    global _store
+    if _store is None:
+        _store = ConversationStore(config.AI_CONVERSATIONS_DB)
+        _store.load()
+    return _store
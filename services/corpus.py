@@ -0,0 +1,267 @@
+"""
+The learning content (words, phrases, quizzes, match-game words) compiled
+into one read-only file shared by every content cog.
+
+The file is built from the JSON sources, which are validated on the way:
+
+    python -m services.corpus
+
+and memory-mapped on first use; entries are decoded only when a cog reads
+them. The bot rebuilds the file at startup when a source is newer,
+leaving out entries that fail validation.
+"""
+import array
+import json
+import logging
+import mmap
+import os
+import struct
+from collections.abc import Sequence
+
+import config
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+MAGIC = b"CRP1"
+
+
+class CorpusError(ValueError):
+    """A source file is missing or malformed."""
+
+
+class Source:
+    __slots__ = ("file", "required", "optional", "term_keys", "quiz", "may_be_missing")
+
+    def __init__(self, file: str, required: tuple[str, ...] = (), optional: tuple[str, ...] = (),
+                 term_keys: tuple[str, ...] = (), quiz: bool = False, may_be_missing: bool = False):
+        self.file = file
+        # String fields every entry must have / may have
+        self.required = required
+        self.optional = optional
+        # At least one of these string fields (the match games' answer)
+        self.term_keys = term_keys
+        # question / options / answer_index entries
+        self.quiz = quiz
+        # The match game always played on with a word file missing
+        self.may_be_missing = may_be_missing
+
+
+MATCH_TERM_KEYS = ("definition", "translation", "meaning")
+
+SOURCES = {
+    "kr_words": Source("words.json", ("korean", "english"), ("details_en", "details_ko", "romanization")),
+    "kr_phrases": Source("phrases.json", ("korean", "english"), ("details_en", "details_ko", "romanization")),
+    "en_words": Source("eng_words.json", ("word", "meaning"), ("pronunciation",)),
+    "en_phrases": Source("eng_phrases.json", ("phrase", "meaning"), ("korean_pronunciation", "korean_meaning")),
+    "kr_quiz": Source("kor_quiz.json", quiz=True),
+    "en_quiz": Source("eng_quiz.json", quiz=True),
+    "match_animal": Source("words_game.json", term_keys=MATCH_TERM_KEYS, may_be_missing=True),
+    "match_number": Source("num_wmg.json", term_keys=MATCH_TERM_KEYS, may_be_missing=True),
+    "match_food": Source("food_wmg.json", term_keys=MATCH_TERM_KEYS, may_be_missing=True),
+}
+
+
+def _check_entry(source: Source, entry) -> str | None:
+    """What is wrong with `entry`, or None."""
+    if not isinstance(entry, dict):
+        return "not an object"
+    for key in source.required:
+        if not isinstance(entry.get(key), str):
+            return f"{key!r} missing or not a string"
+    for key in source.optional:
+        if key in entry and not isinstance(entry[key], str):
+            return f"{key!r} is not a string"
+    if source.term_keys and not any(isinstance(entry.get(k), str) for k in source.term_keys):
+        return f"none of {', '.join(source.term_keys)}"
+    if source.quiz:
+        options = entry.get("options")
+        if not isinstance(entry.get("question"), str):
+            return "'question' missing or not a string"
+        if not isinstance(options, list) or len(options) < 2 or not all(isinstance(o, str) for o in options):
+            return "'options' must be a list of at least two strings"
+        answer = entry.get("answer_index")
+        if not isinstance(answer, int) or isinstance(answer, bool) or not 0 <= answer < len(options):
+            return "'answer_index' is not an index into 'options'"
+    return None
+
+
+def load_source(name: str, source: Source, strict: bool = True) -> list[dict]:
+    """
+    The validated entries of one source. Strict, any problem raises
+    CorpusError; otherwise malformed entries are dropped and an unreadable
+    file counts as empty, with the problems logged.
+    """
+    path = os.path.join(BASE_DIR, source.file)
+    try:
+        if not os.path.exists(path):
+            if source.may_be_missing:
+                logger.warning(f"Corpus source {source.file} not found; {name} will be empty")
+                return []
+            raise CorpusError(f"{source.file}: file not found")
+        try:
+            with open(path, encoding="utf-8") as f:
+                entries = json.load(f)
+        except json.JSONDecodeError as e:
+            raise CorpusError(f"{source.file}: invalid JSON: {e}") from e
+        if not isinstance(entries, list):
+            raise CorpusError(f"{source.file}: expected a JSON list")
+    except CorpusError as e:
+        if strict:
+            raise
+        logger.error(f"{e}; {name} will be empty")
+        return []
+
+    problems = []
+    valid = []
+    for i, entry in enumerate(entries):
+        problem = _check_entry(source, entry)
+        if problem is None:
+            valid.append(entry)
+        else:
+            problems.append(f"{source.file}[{i}]: {problem}")
+    if problems:
+        report = "\n".join(problems[:20]) + (f"\n... {len(problems) - 20} more" if len(problems) > 20 else "")
+        if strict:
+            raise CorpusError(report)
+        logger.warning(f"Skipping {len(problems)} malformed entries in {source.file}:\n{report}")
+    if not valid and not source.may_be_missing:
+        if strict:
+            raise CorpusError(f"{source.file}: no entries")
+        logger.error(f"{source.file}: no usable entries; {name} will be empty")
+    return valid
+
+
+def build_corpus(out_path: str | None = None, strict: bool = True) -> int:
+    """
+    Validate every source and write the corpus file; returns the number of entries.
+    Strict, raises CorpusError, leaving any existing file in place, if a
+    source is invalid; otherwise builds from what is valid (see load_source()).
+
+    Layout: MAGIC, uint32 header length, JSON header (dataset -> [first
+    entry, count]), a uint32 offsets table with one offset per entry plus
+    the end, then each entry as compact UTF-8 JSON. Offsets are relative to
+    the start of the entry data. Written to a temp file and swapped in
+    atomically.
+    """
+    out_path = out_path or config.CORPUS_FILE
+    datasets = {}
+    blobs: list[bytes] = []
+    for name, source in SOURCES.items():
+        entries = load_source(name, source, strict)
+        datasets[name] = [len(blobs), len(entries)]
+        blobs.extend(
+            json.dumps(entry, ensure_ascii=False, separators=(",", ":")).encode("utf-8") for entry in entries
+        )
+
+    offsets = array.array("I", [0])
+    for blob in blobs:
+        offsets.append(offsets[-1] + len(blob))
+
+    header = json.dumps({"datasets": datasets}).encode("utf-8")
+    # Keep the offsets table 4-byte aligned
+    header += b" " * (-(len(MAGIC) + 4 + len(header)) % 4)
+
+    tmp_path = out_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        offsets.tofile(f)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp_path, out_path)
+    return len(blobs)
+
+
+def source_mtime() -> float:
+    """Newest modification time among the corpus sources."""
+    paths = [os.path.join(BASE_DIR, source.file) for source in SOURCES.values()]
+    return max((os.path.getmtime(p) for p in paths if os.path.exists(p)), default=0.0)
+
+
+class Dataset(Sequence):
+    """One source's entries; indexing decodes a single entry from the mapped file."""
+
+    def __init__(self, corpus: "Corpus", first: int, count: int):
+        self._corpus = corpus
+        self._first = first
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("corpus index out of range")
+        return self._corpus.entry(self._first + index)
+
+
+class Corpus:
+    """Read-only, memory-mapped corpus produced by build_corpus()."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:4] != MAGIC:
+            raise ValueError(f"{path} is not a corpus file")
+        (header_len,) = struct.unpack_from("<I", self._mm, 4)
+        header = json.loads(self._mm[8:8 + header_len].decode("utf-8"))
+        self._datasets: dict[str, list[int]] = header["datasets"]
+        total = sum(count for _, count in self._datasets.values())
+        table_start = 8 + header_len
+        self._offsets = memoryview(self._mm)[table_start:table_start + 4 * (total + 1)].cast("I")
+        self._data_start = table_start + 4 * (total + 1)
+        self.mtime = os.path.getmtime(path)
+
+    def entry(self, i: int) -> dict:
+        start = self._data_start + self._offsets[i]
+        end = self._data_start + self._offsets[i + 1]
+        return json.loads(self._mm[start:end].decode("utf-8"))
+
+    def dataset(self, name: str) -> Dataset:
+        first, count = self._datasets[name]
+        return Dataset(self, first, count)
+
+    def close(self):
+        self._offsets.release()
+        self._mm.close()
+        self._file.close()
+
+
+_corpus: Corpus | None = None
+
+
+def get_corpus() -> Corpus:
+    """
+    The shared corpus, mapped on first use. A missing or stale file is
+    rebuilt first, skipping (and logging) whatever doesn't validate, so one
+    bad entry never keeps the content cogs from loading. `python -m
+    services.corpus` is the strict check.
+    """
+    global _corpus
+    if _corpus is not None:
+        return _corpus
+    path = config.CORPUS_FILE
+    if not os.path.exists(path) or source_mtime() > os.path.getmtime(path):
+        count = build_corpus(path, strict=False)
+        logger.info(f"Corpus rebuilt with {count} entries")
+    _corpus = Corpus(path)
+    return _corpus
+
+
+def get_dataset(name: str) -> Dataset:
+    return get_corpus().dataset(name)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    try:
+        print(f"Compiled {build_corpus()} entries into {config.CORPUS_FILE}")
+    except CorpusError as e:
+        raise SystemExit(f"Corpus sources are invalid:\n{e}")
@@ -0,0 +1,288 @@
+"""
+BM25 index over tag text and tag PDFs, used to answer FAQ-style AI questions
+locally before calling Gemini.
+
+The index is built offline into a single file:
+
+    python -m services.faq_index
+
+and memory-mapped on first use. The bot rebuilds it in the background when
+tags.db or tag_files/ is newer than the index.
+"""
+import array
+import asyncio
+import collections
+import json
+import logging
+import math
+import mmap
+import os
+import re
+import struct
+import sqlite3
+import time
+
+import config
+from services.tag_files import send_tag_file
+from services.tag_index import TAGS_DB, get_tag_index
+
+try:
+    from pypdf import PdfReader
+except ImportError:
+    PdfReader = None
+
+logger = logging.getLogger(__name__)
+
+TAG_FILES_DIR = "tag_files"
+MAGIC = b"FAQ1"
+K1 = 1.2
+B = 0.75
+# Tag names are short and precise; count their words several times
+NAME_WEIGHT = 3
+# How often to compare the index against tags.db / tag_files
+STALE_CHECK_SECONDS = 60
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+STOPWORDS = frozenset("""
+a an and are as at be but by can could do does for from get give had has have how i if in is it
+its me my of on or please send share should so some tell than that the their them then there
+these they this to us was we what when where which who why will with would you your
+""".split())
+
+
+def tokenize(text: str) -> list[str]:
+    return [
+        w for w in _WORD.findall(text.lower())
+        if w not in STOPWORDS and (len(w) > 1 or not w.isascii())
+    ]
+
+
+def extract_pdf_text(path: str) -> str:
+    """Plain text of a PDF, or "" when pypdf isn't installed or the file can't be read."""
+    if PdfReader is None:
+        return ""
+    try:
+        reader = PdfReader(path)
+        return "\n".join(page.extract_text() or "" for page in reader.pages)
+    except Exception as e:
+        logger.warning(f"Could not read text from {path}: {e}")
+        return ""
+
+
+def collect_documents(db_path: str = TAGS_DB) -> list[tuple[str, str]]:
+    """(tag, text) for every tag: name, message and, for PDFs, the document text."""
+    db = sqlite3.connect(db_path)
+    try:
+        rows = db.execute("SELECT tag, message, file_path FROM tags").fetchall()
+    except sqlite3.OperationalError:
+        rows = []
+    finally:
+        db.close()
+
+    if PdfReader is None and any(p and p.lower().endswith(".pdf") for _, _, p in rows):
+        logger.info("pypdf is not installed; indexing tag text without PDF contents")
+
+    docs = []
+    for tag, message, file_path in rows:
+        name = tag.replace("-", " ").replace("_", " ")
+        parts = [(name + " ") * NAME_WEIGHT, message or ""]
+        if file_path and file_path.lower().endswith(".pdf") and os.path.exists(file_path):
+            parts.append(extract_pdf_text(file_path))
+        docs.append((tag, "\n".join(parts)))
+    return docs
+
+
+def build_index(out_path: str | None = None, db_path: str = TAGS_DB) -> int:
+    """
+    Tokenize every tag and write the index file; returns the number of documents.
+
+    Layout: MAGIC, uint32 header length, JSON header (tags, doc lengths,
+    avgdl, term -> [offset, df]), then per term `df` doc ids followed by
+    `df` term frequencies as native uint32. Written to a temp file and
+    swapped in atomically.
+    """
+    out_path = out_path or config.AI_FAQ_INDEX
+    docs = collect_documents(db_path)
+    postings: dict[str, list[tuple[int, int]]] = collections.defaultdict(list)
+    lengths = []
+    for doc_id, (_, text) in enumerate(docs):
+        counts = collections.Counter(tokenize(text))
+        lengths.append(sum(counts.values()))
+        for term, tf in counts.items():
+            postings[term].append((doc_id, tf))
+
+    terms = {}
+    body = array.array("I")
+    for term in sorted(postings):
+        entries = postings[term]
+        terms[term] = [len(body) * 4, len(entries)]
+        body.extend(doc_id for doc_id, _ in entries)
+        body.extend(tf for _, tf in entries)
+
+    header = json.dumps({
+        "tags": [tag for tag, _ in docs],
+        "lengths": lengths,
+        "avgdl": sum(lengths) / len(lengths) if lengths else 0.0,
+        "terms": terms,
+    }, ensure_ascii=False).encode("utf-8")
+    # Keep the postings 4-byte aligned
+    header += b" " * (-(len(MAGIC) + 4 + len(header)) % 4)
+
+    tmp_path = out_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        body.tofile(f)
+    os.replace(tmp_path, out_path)
+    return len(docs)
+
+
+def source_mtime(db_path: str = TAGS_DB) -> float:
+    """Newest modification time among the inputs of the index."""
+    paths = [db_path, TAG_FILES_DIR]
+    if os.path.isdir(TAG_FILES_DIR):
+        paths.extend(os.path.join(TAG_FILES_DIR, name) for name in os.listdir(TAG_FILES_DIR))
+    return max((os.path.getmtime(p) for p in paths if os.path.exists(p)), default=0.0)
+
+
+class FAQIndex:
+    """Read-only, memory-mapped BM25 index produced by build_index()."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:4] != MAGIC:
+            raise ValueError(f"{path} is not an FAQ index")
+        (header_len,) = struct.unpack_from("<I", self._mm, 4)
+        header = json.loads(self._mm[8:8 + header_len].decode("utf-8"))
+        self.tags: list[str] = header["tags"]
+        self.lengths: list[int] = header["lengths"]
+        self.avgdl: float = header["avgdl"] or 1.0
+        self.terms: dict[str, list[int]] = header["terms"]
+        self._postings = memoryview(self._mm)[8 + header_len:]
+        self.mtime = os.path.getmtime(path)
+
+    def _idf(self, df: int) -> float:
+        n = len(self.tags)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str, limit: int = 3) -> list[tuple[str, float, float]]:
+        """
+        Best matches as (tag, bm25 score, coverage). Coverage is the share of
+        the query's idf weight found in that tag; unknown words count against it.
+        """
+        query_terms = set(tokenize(query))
+        if not query_terms or not self.tags:
+            return []
+        scores: dict[int, float] = collections.defaultdict(float)
+        matched: dict[int, float] = collections.defaultdict(float)
+        total_idf = 0.0
+        for term in query_terms:
+            entry = self.terms.get(term)
+            if entry is None:
+                total_idf += self._idf(0)
+                continue
+            offset, df = entry
+            idf = self._idf(df)
+            total_idf += idf
+            doc_ids = self._postings[offset:offset + 4 * df].cast("I")
+            tfs = self._postings[offset + 4 * df:offset + 8 * df].cast("I")
+            for doc_id, tf in zip(doc_ids, tfs):
+                norm = K1 * (1 - B + B * self.lengths[doc_id] / self.avgdl)
+                scores[doc_id] += idf * tf * (K1 + 1) / (tf + norm)
+                matched[doc_id] += idf
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [(self.tags[d], score, matched[d] / total_idf) for d, score in best]
+
+    def best(self, query: str) -> str | None:
+        """The tag that answers `query`, or None unless the match is confident."""
+        results = self.search(query, limit=2)
+        if not results:
+            return None
+        tag, score, coverage = results[0]
+        if score < config.AI_FAQ_MIN_SCORE or coverage < config.AI_FAQ_MIN_COVERAGE:
+            return None
+        if len(results) > 1 and score < results[1][1] * config.AI_FAQ_MIN_MARGIN:
+            return None
+        return tag
+
+    def close(self):
+        self._postings.release()
+        self._mm.close()
+        self._file.close()
+
+
+_index: FAQIndex | None = None
+_rebuild: asyncio.Task | None = None
+_checked_at = 0.0
+# Questions looked up / answered locally, for !aistats
+faq_stats: collections.Counter[str] = collections.Counter()
+
+
+async def _rebuild_index():
+    global _index
+    try:
+        count = await asyncio.to_thread(build_index)
+    except Exception:
+        logger.exception("Rebuilding the FAQ index failed")
+        return
+    old, _index = _index, FAQIndex(config.AI_FAQ_INDEX)
+    if old is not None:
+        old.close()
+    logger.info(f"FAQ index rebuilt with {count} tags")
+
+
+def get_faq_index() -> FAQIndex | None:
+    """
+    The loaded index, mapping the file on first use. If the file is missing
+    or older than the tags, a rebuild starts in the background and the
+    current index (possibly None) is returned meanwhile.
+    """
+    global _index, _rebuild, _checked_at
+    if not config.AI_FAQ_ENABLED:
+        return None
+    path = config.AI_FAQ_INDEX
+    if _index is None and os.path.exists(path):
+        try:
+            _index = FAQIndex(path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable FAQ index {path}: {e}")
+
+    now = time.monotonic()
+    if _index is None or now - _checked_at >= STALE_CHECK_SECONDS:
+        _checked_at = now
+        stale = _index is None or source_mtime() > _index.mtime
+        if stale and (_rebuild is None or _rebuild.done()):
+            _rebuild = asyncio.get_running_loop().create_task(_rebuild_index())
+    return _index
+
+
+def match_question(question: str) -> str | None:
+    """Tag that confidently answers `question`, if any."""
+    index = get_faq_index()
+    if index is None:
+        return None
+    faq_stats["checked"] += 1
+    tag = index.best(question)
+    # The tag may have been removed since the index was built
+    if tag is None or get_tag_index().get(tag) is None:
+        return None
+    faq_stats["answered"] += 1
+    return tag
+
+
+async def send_faq_answer(send, tag: str, **kwargs):
+    """Answer with the tag's message (and file) through `send`."""
+    tag_message, file_path = get_tag_index().get(tag)
+    title = tag.replace("-", " ").title()
+    content = f"📌 **{title}**\n{tag_message}" if tag_message else f"📌 **{title}**"
+    if file_path:
+        return await send_tag_file(send, tag, content, file_path, **kwargs)
+    return await send(content, **kwargs)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(f"Indexed {build_index()} tags into {config.AI_FAQ_INDEX}")
@@ -0,0 +1,304 @@
+import asyncio
+import collections
+import json
+import logging
+import random
+import time
+
+import aiohttp
+
+import config
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class GeminiError(RuntimeError):
+    """Request failed for a reason other than overload (bad request, auth, ...)."""
+
+
+class GeminiOverloaded(GeminiError):
+    """Every attempt was rejected with 429/5xx or timed out."""
+
+
+def extract_text(data: dict) -> str:
+    """Join the text parts of the first candidate of a generateContent response."""
+    parts = data["candidates"][0]["content"]["parts"]
+    return "".join(p.get("text", "") for p in parts).strip()
+
+
+def chunk_text(data: dict) -> str:
+    """Text of one streamed chunk; the final chunk may only carry finishReason/usage."""
+    try:
+        parts = data["candidates"][0]["content"]["parts"]
+    except (KeyError, IndexError):
+        return ""
+    return "".join(p.get("text", "") for p in parts)
+
+
+def estimate_text_tokens(text: str) -> int:
+    """Rough token estimate for a piece of text (4 chars per token)."""
+    return len(text) // 4 + 1
+
+
+def estimate_tokens(payload: dict) -> int:
+    """Rough token estimate for the prompt plus the output budget."""
+    chars = 0
+    for part in payload.get("systemInstruction", {}).get("parts", []):
+        chars += len(part.get("text", ""))
+    for content in payload.get("contents", []):
+        for part in content.get("parts", []):
+            chars += len(part.get("text", ""))
+    max_output = payload.get("generationConfig", {}).get("maxOutputTokens", 0)
+    return chars // 4 + 1 + max_output
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `per_minute / 60` tokens per second."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1.0):
+        # Never ask for more than the bucket can ever hold
+        amount = min(amount, self.capacity)
+        # The lock keeps waiters in FIFO order
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+class GeminiMetrics:
+    """Counters and a rolling window of per-call latencies."""
+
+    def __init__(self, window: int = 1000):
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+        self.status_counts: collections.Counter = collections.Counter()
+        self.latencies: collections.deque = collections.deque(maxlen=window)
+        # Time to first streamed chunk
+        self.first_chunk: collections.deque = collections.deque(maxlen=window)
+
+    def record(self, latency: float, status):
+        self.calls += 1
+        self.status_counts[status] += 1
+        self.latencies.append(latency)
+
+    def percentile(self, pct: float, samples=None) -> float:
+        samples = self.latencies if samples is None else samples
+        if not samples:
+            return 0.0
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def summary(self) -> dict:
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "retries": self.retries,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "first_chunk_p50": self.percentile(50, self.first_chunk),
+            "statuses": dict(self.status_counts),
+        }
+
+
+class GeminiClient:
+    """
+    Bot-wide Gemini client.
+
+    One pooled HTTP session (keep-alive, DNS cache), one global concurrency
+    limit, request/token-per-minute buckets (retries take a request token
+    too) and a shared retry policy with jittered exponential backoff. The
+    concurrency slot is only held for the HTTP request itself, never while
+    backing off.
+    """
+
+    def __init__(self):
+        self._session: aiohttp.ClientSession | None = None
+        self._semaphore = asyncio.Semaphore(config.GEMINI_MAX_CONCURRENCY)
+        self._requests = TokenBucket(config.GEMINI_REQUESTS_PER_MINUTE)
+        self._tokens = TokenBucket(config.GEMINI_TOKENS_PER_MINUTE)
+        self.metrics = GeminiMetrics()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=config.GEMINI_MAX_CONCURRENCY * 2,
+                ttl_dns_cache=300,
+                keepalive_timeout=60,
+            )
+            timeout = aiohttp.ClientTimeout(total=config.GEMINI_TIMEOUT)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=timeout,
+                headers={"x-goog-api-key": config.GEMINI_API_KEY},
+            )
+        return self._session
+
+    def url(self, model: str, method: str = "generateContent") -> str:
+        return f"{config.GEMINI_API_BASE}/models/{model}:{method}"
+
+    @staticmethod
+    def _backoff(attempt: int, retry_after: str | None = None) -> float:
+        if retry_after:
+            try:
+                # Honour the server's hint, but never park a request for longer than the cap
+                return min(max(float(retry_after), 0.0), config.GEMINI_RETRY_AFTER_MAX)
+            except ValueError:
+                pass
+        # Full jitter: uniform(0, min(cap, base * 2^attempt))
+        return random.uniform(0, min(config.GEMINI_BACKOFF_CAP, config.GEMINI_BACKOFF_BASE * 2 ** attempt))
+
+    async def generate(
+        self, payload: dict, model: str | None = None, max_retries: int | None = None, usage: dict | None = None
+    ) -> dict:
+        """
+        POST generateContent with rate limiting and retries; returns the JSON response.
+        `usage`, if given, is updated with the response's usageMetadata.
+        """
+        model = model or config.GEMINI_MODEL
+        attempts = max_retries or config.GEMINI_MAX_RETRIES
+        url = self.url(model)
+        await self._tokens.acquire(estimate_tokens(payload))
+
+        last_error = "no attempts made"
+        for attempt in range(attempts):
+            if attempt:
+                self.metrics.retries += 1
+            # Every attempt is a request against the per-minute limit, retries included
+            await self._requests.acquire()
+            retry_after = None
+            started = time.perf_counter()
+            try:
+                async with self._semaphore:
+                    async with self._get_session().post(url, json=payload) as resp:
+                        if resp.status == 200:
+                            data = await resp.json()
+                            self.metrics.record(time.perf_counter() - started, resp.status)
+                            if usage is not None:
+                                usage.update(data.get("usageMetadata", {}))
+                            return data
+                        body = await resp.text()
+                        retry_after = resp.headers.get("Retry-After")
+                self.metrics.record(time.perf_counter() - started, resp.status)
+                if resp.status not in RETRY_STATUSES:
+                    self.metrics.failures += 1
+                    raise GeminiError(f"Error {resp.status}: {body[:500]}")
+                last_error = f"HTTP {resp.status}"
+            except (asyncio.TimeoutError, aiohttp.ClientConnectionError) as e:
+                self.metrics.record(time.perf_counter() - started, "timeout")
+                last_error = type(e).__name__
+            logger.warning(f"Gemini {model} attempt {attempt + 1}/{attempts} failed ({last_error})")
+            if attempt + 1 < attempts:
+                await asyncio.sleep(self._backoff(attempt + 1, retry_after))
+
+        self.metrics.failures += 1
+        raise GeminiOverloaded(f"MODEL_OVERLOADED ({last_error})")
+
+    async def stream_generate(
+        self, payload: dict, model: str | None = None, max_retries: int | None = None, usage: dict | None = None
+    ):
+        """
+        POST streamGenerateContent (SSE) and yield text chunks as they arrive.
+        Failed attempts are retried only until the first chunk has been yielded.
+        `usage`, if given, is updated with the usageMetadata of the stream.
+        """
+        model = model or config.GEMINI_MODEL
+        attempts = max_retries or config.GEMINI_MAX_RETRIES
+        url = self.url(model, "streamGenerateContent")
+        await self._tokens.acquire(estimate_tokens(payload))
+        # A long answer may stream for longer than GEMINI_TIMEOUT; only bound the gaps
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=config.GEMINI_TIMEOUT)
+
+        last_error = "no attempts made"
+        for attempt in range(attempts):
+            if attempt:
+                self.metrics.retries += 1
+            await self._requests.acquire()
+            retry_after = None
+            started = time.perf_counter()
+            yielded = False
+            try:
+                async with self._semaphore:
+                    async with self._get_session().post(
+                        url, params={"alt": "sse"}, json=payload, timeout=timeout
+                    ) as resp:
+                        if resp.status == 200:
+                            async for raw in resp.content:
+                                line = raw.decode("utf-8").strip()
+                                if not line.startswith("data:"):
+                                    continue
+                                try:
+                                    data = json.loads(line[5:])
+                                except ValueError as e:
+                                    self.metrics.failures += 1
+                                    raise GeminiError(f"Malformed stream event: {line[:200]}") from e
+                                if usage is not None and "usageMetadata" in data:
+                                    usage.update(data["usageMetadata"])
+                                text = chunk_text(data)
+                                if not text:
+                                    continue
+                                if not yielded:
+                                    self.metrics.first_chunk.append(time.perf_counter() - started)
+                                    yielded = True
+                                yield text
+                            self.metrics.record(time.perf_counter() - started, resp.status)
+                            return
+                        body = await resp.text()
+                        retry_after = resp.headers.get("Retry-After")
+                self.metrics.record(time.perf_counter() - started, resp.status)
+                if resp.status not in RETRY_STATUSES:
+                    self.metrics.failures += 1
+                    raise GeminiError(f"Error {resp.status}: {body[:500]}")
+                last_error = f"HTTP {resp.status}"
+            except (asyncio.TimeoutError, aiohttp.ClientConnectionError, aiohttp.ClientPayloadError) as e:
+                self.metrics.record(time.perf_counter() - started, "timeout")
+                if yielded:
+                    # Part of the answer is already on screen; a retry would repeat it
+                    self.metrics.failures += 1
+                    raise GeminiError(f"Stream interrupted: {type(e).__name__}") from e
+                last_error = type(e).__name__
+            logger.warning(f"Gemini {model} stream attempt {attempt + 1}/{attempts} failed ({last_error})")
+            if attempt + 1 < attempts:
+                await asyncio.sleep(self._backoff(attempt + 1, retry_after))
+
+        self.metrics.failures += 1
+        raise GeminiOverloaded(f"MODEL_OVERLOADED ({last_error})")
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+_client: GeminiClient | None = None
+
+
+def get_gemini_client() -> GeminiClient:
+    global _client
+    if _client is None:
+        _client = GeminiClient()
+    return _client
+
+
+async def close_gemini_client():
+    if _client is not None:
+        await _client.close()
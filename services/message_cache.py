@@ -0,0 +1,148 @@
+import collections
+
+import discord
+
+import config
+from services.gemini import estimate_text_tokens
+
+# Longer messages are cut before caching; the context budget would drop them anyway
+MAX_CACHED_CHARS = 4000
+
+
+class CachedMessage:
+    __slots__ = ("id", "channel_id", "author_id", "author_name", "content", "reference_id")
+
+    def __init__(self, id: int, channel_id: int, author_id: int, author_name: str,
+                 content: str, reference_id: int | None):
+        self.id = id
+        self.channel_id = channel_id
+        self.author_id = author_id
+        self.author_name = author_name
+        self.content = content
+        self.reference_id = reference_id
+
+    @classmethod
+    def from_message(cls, message: discord.Message) -> "CachedMessage":
+        return cls(
+            message.id,
+            message.channel.id,
+            message.author.id,
+            message.author.display_name,
+            message.content[:MAX_CACHED_CHARS],
+            message.reference.message_id if message.reference else None,
+        )
+
+
+class MessageCache:
+    """
+    Bounded id -> message map of recent messages, used to walk reply chains
+    without REST calls. discord.py's own cache is a deque searched linearly;
+    this is a plain LRU dict with O(1) lookups.
+    """
+
+    def __init__(self, max_items: int):
+        self.max_items = max_items
+        self._items: collections.OrderedDict[int, CachedMessage] = collections.OrderedDict()
+        self.hits = 0
+        self.fetches = 0
+
+    def put(self, entry: CachedMessage):
+        self._items[entry.id] = entry
+        self._items.move_to_end(entry.id)
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+
+    def add(self, message: discord.Message) -> CachedMessage:
+        entry = CachedMessage.from_message(message)
+        self.put(entry)
+        return entry
+
+    def get(self, message_id: int) -> CachedMessage | None:
+        return self._items.get(message_id)
+
+    def update_content(self, message_id: int, content: str):
+        entry = self._items.get(message_id)
+        if entry is not None:
+            entry.content = content[:MAX_CACHED_CHARS]
+
+    def discard(self, message_id: int):
+        self._items.pop(message_id, None)
+
+    async def reply_chain(
+        self,
+        message: discord.Message,
+        budget: int | None = None,
+        max_fetches: int | None = None,
+        max_depth: int | None = None,
+    ) -> list[CachedMessage]:
+        """
+        Messages `message` replies to, oldest first.
+
+        Walks message.reference hop by hop: the gateway-resolved parent and
+        cached messages are free, otherwise up to `max_fetches` REST fetches
+        are spent. Stops when the next message would exceed `budget` tokens.
+        """
+        budget = config.AI_CONTEXT_TOKEN_BUDGET if budget is None else budget
+        max_fetches = config.AI_CONTEXT_MAX_FETCHES if max_fetches is None else max_fetches
+        max_depth = config.AI_CONTEXT_MAX_DEPTH if max_depth is None else max_depth
+
+        if message.reference is None:
+            return []
+        # Replies usually arrive with their parent already resolved
+        resolved = message.reference.resolved
+        if isinstance(resolved, discord.Message):
+            self.add(resolved)
+
+        chain: list[CachedMessage] = []
+        used = 0
+        fetches = 0
+        next_id = message.reference.message_id
+        seen = {message.id}
+        while next_id and next_id not in seen and len(chain) < max_depth:
+            seen.add(next_id)
+            entry = self.get(next_id)
+            if entry is not None:
+                self.hits += 1
+            elif fetches < max_fetches:
+                fetches += 1
+                self.fetches += 1
+                try:
+                    entry = self.add(await message.channel.fetch_message(next_id))
+                except discord.HTTPException:
+                    break
+            else:
+                break
+            cost = estimate_text_tokens(entry.content)
+            if used + cost > budget:
+                break
+            used += cost
+            chain.append(entry)
+            next_id = entry.reference_id
+        chain.reverse()
+        return chain
+
+
+def chain_contents(chain: list[CachedMessage], bot_id: int) -> list[dict]:
+    """
+    Gemini `contents` for a reply chain: this bot's (`bot_id`) messages as
+    model turns, everyone else's, other bots included, as named user turns.
+    """
+    contents = []
+    for entry in chain:
+        if not entry.content:
+            continue
+        if entry.author_id == bot_id:
+            contents.append({"role": "model", "parts": [{"text": entry.content}]})
+        else:
+            contents.append({"role": "user", "parts": [{"text": f"{entry.author_name}: {entry.content}"}]})
+    return contents
+
+
+_cache: MessageCache | None = None
+
+
+def get_message_cache() -> MessageCache:
+    global _cache
+    if _cache is None:
+        _cache = MessageCache(config.AI_CONTEXT_CACHE_SIZE)
+    return _cache
@@ -0,0 +1,249 @@
+import asyncio
+import collections
+import logging
+import time
+
+import config
+from services.gemini import GeminiClient, GeminiOverloaded, estimate_tokens, get_gemini_client
+
+logger = logging.getLogger(__name__)
+
+
+class ModelStats:
+    """Rolling latency and overload rate for one model."""
+
+    def __init__(self, window: int):
+        self.first_chunk: collections.deque[float] = collections.deque(maxlen=window * 5)
+        self.latencies: collections.deque[float] = collections.deque(maxlen=window * 5)
+        # True = overloaded, False = answered
+        self.outcomes: collections.deque[bool] = collections.deque(maxlen=window)
+
+    @staticmethod
+    def _percentile(samples, pct: float) -> float:
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+    def overload_rate(self) -> float:
+        return sum(self.outcomes) / len(self.outcomes) if self.outcomes else 0.0
+
+    def hedge_delay(self) -> float | None:
+        """p90 time to first chunk, or None until there are enough samples to trust it."""
+        if len(self.first_chunk) < config.AI_HEDGE_MIN_SAMPLES:
+            return None
+        return max(self._percentile(self.first_chunk, 90), 0.05)
+
+    def summary(self) -> dict:
+        return {
+            "calls": len(self.latencies),
+            "overload_rate": self.overload_rate(),
+            "first_chunk_p50": self._percentile(self.first_chunk, 50) if self.first_chunk else 0.0,
+            "first_chunk_p90": self._percentile(self.first_chunk, 90) if self.first_chunk else 0.0,
+            "p50": self._percentile(self.latencies, 50) if self.latencies else 0.0,
+        }
+
+
+class ModelRouter:
+    """
+    Picks the model for each Gemini call.
+
+    The primary model gets a single attempt when a fallback is configured;
+    if it is overloaded, the request moves to the lighter fallback model
+    instead of backing off on the same one. When the primary's recent
+    overload rate crosses AI_ROUTER_OVERLOAD_THRESHOLD, traffic goes
+    straight to the fallback for AI_ROUTER_COOLDOWN seconds.
+
+    Short streamed prompts can be hedged: if the first chunk hasn't arrived
+    after the model's p90 time-to-first-chunk, a duplicate request is sent
+    and whichever answers first wins.
+    """
+
+    def __init__(self, client: GeminiClient, primary: str, fallback: str | None = None):
+        self.client = client
+        self.primary = primary
+        self.fallback = fallback if fallback and fallback != primary else None
+        self.stats: dict[str, ModelStats] = collections.defaultdict(lambda: ModelStats(config.AI_ROUTER_WINDOW))
+        self.decisions: collections.Counter[str] = collections.Counter()
+        self._tripped_until = 0.0
+
+    def current_model(self) -> str:
+        """The model a call made now would start on."""
+        if self.fallback and time.monotonic() < self._tripped_until:
+            return self.fallback
+        return self.primary
+
+    def _pick(self) -> str:
+        model = self.current_model()
+        self.decisions["primary" if model == self.primary else "fallback_tripped"] += 1
+        return model
+
+    def _attempts(self, model: str) -> int | None:
+        # Fail over fast from the primary; the last resort keeps the full retry budget
+        return 1 if model == self.primary and self.fallback else None
+
+    def _record(self, model: str, overloaded: bool):
+        stats = self.stats[model]
+        stats.outcomes.append(overloaded)
+        if (
+            overloaded
+            and model == self.primary
+            and self.fallback
+            and len(stats.outcomes) >= 5
+            and stats.overload_rate() >= config.AI_ROUTER_OVERLOAD_THRESHOLD
+            and time.monotonic() >= self._tripped_until
+        ):
+            self._tripped_until = time.monotonic() + config.AI_ROUTER_COOLDOWN
+            self.decisions["tripped"] += 1
+            logger.warning(
+                f"{model} overload rate {stats.overload_rate():.0%}; routing to {self.fallback} "
+                f"for {config.AI_ROUTER_COOLDOWN}s"
+            )
+
+    def _should_hedge(self, payload: dict) -> bool:
+        if not config.AI_HEDGE_ENABLED:
+            return False
+        max_output = payload.get("generationConfig", {}).get("maxOutputTokens", 0)
+        return estimate_tokens(payload) - max_output <= config.AI_HEDGE_MAX_PROMPT_TOKENS
+
+    async def generate(self, payload: dict, usage: dict | None = None) -> dict:
+        """generateContent on the routed model, falling back once on overload."""
+        model = self._pick()
+        started = time.perf_counter()
+        try:
+            data = await self.client.generate(payload, model, max_retries=self._attempts(model), usage=usage)
+        except GeminiOverloaded:
+            self._record(model, True)
+            if model == self.fallback or not self.fallback:
+                raise
+            self.decisions["fallback_overload"] += 1
+            model = self.fallback
+            started = time.perf_counter()
+            try:
+                data = await self.client.generate(payload, model, usage=usage)
+            except GeminiOverloaded:
+                self._record(model, True)
+                raise
+        self._record(model, False)
+        self.stats[model].latencies.append(time.perf_counter() - started)
+        return data
+
+    async def stream(self, payload: dict, usage: dict | None = None, route: dict | None = None):
+        """
+        streamGenerateContent on the routed model; yields text chunks.
+        `route`, if given, gets the model that answered under "model".
+        """
+        model = self._pick()
+        delay = self.stats[model].hedge_delay() if self._should_hedge(payload) else None
+        try:
+            if delay is None:
+                async for chunk in self._stream_one(model, payload, usage):
+                    yield chunk
+            else:
+                async for chunk in self._hedged(model, payload, delay, usage):
+                    yield chunk
+        except GeminiOverloaded:
+            # Only raised before anything was yielded, so switching models is safe
+            if model == self.fallback or not self.fallback:
+                raise
+        else:
+            if route is not None:
+                route["model"] = model
+            return
+        self.decisions["fallback_overload"] += 1
+        async for chunk in self._stream_one(self.fallback, payload, usage):
+            yield chunk
+        if route is not None:
+            route["model"] = self.fallback
+
+    async def _stream_one(self, model: str, payload: dict, usage: dict | None = None):
+        started = time.perf_counter()
+        first = True
+        try:
+            async for chunk in self.client.stream_generate(
+                payload, model, max_retries=self._attempts(model), usage=usage
+            ):
+                if first:
+                    self.stats[model].first_chunk.append(time.perf_counter() - started)
+                    first = False
+                yield chunk
+        except GeminiOverloaded:
+            self._record(model, True)
+            raise
+        self._record(model, False)
+        self.stats[model].latencies.append(time.perf_counter() - started)
+
+    async def _pump(self, model: str, payload: dict, queue: asyncio.Queue, usage: dict | None):
+        try:
+            async for chunk in self._stream_one(model, payload, usage):
+                queue.put_nowait(("chunk", chunk))
+            queue.put_nowait(("done", None))
+        except Exception as e:
+            queue.put_nowait(("error", e))
+
+    async def _first_item(self, queues: list[asyncio.Queue]) -> tuple[tuple, int]:
+        """First non-error item across the racers; an error only if every racer failed."""
+        getters = {asyncio.create_task(q.get()): i for i, q in enumerate(queues)}
+        failed = None
+        try:
+            while getters:
+                done, _ = await asyncio.wait(getters, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    i = getters.pop(task)
+                    item = task.result()
+                    if item[0] != "error":
+                        return item, i
+                    failed = (item, i)
+            return failed
+        finally:
+            for task in getters:
+                task.cancel()
+
+    async def _hedged(self, model: str, payload: dict, delay: float, usage: dict | None):
+        # Each racer reports its own usage; only the winner's is kept
+        usages = [{}, {}]
+        queues = [asyncio.Queue()]
+        racers = [asyncio.create_task(self._pump(model, payload, queues[0], usages[0]))]
+        try:
+            try:
+                item, winner = await asyncio.wait_for(queues[0].get(), delay), 0
+            except asyncio.TimeoutError:
+                self.decisions["hedged"] += 1
+                queues.append(asyncio.Queue())
+                racers.append(asyncio.create_task(self._pump(model, payload, queues[1], usages[1])))
+                item, winner = await self._first_item(queues)
+                if winner == 1 and item[0] != "error":
+                    self.decisions["hedge_won"] += 1
+            for i, racer in enumerate(racers):
+                if i != winner:
+                    racer.cancel()
+
+            while True:
+                kind, value = item
+                if kind == "chunk":
+                    yield value
+                elif kind == "done":
+                    if usage is not None:
+                        usage.update(usages[winner])
+                    return
+                else:
+                    raise value
+                item = await queues[winner].get()
+        finally:
+            for racer in racers:
+                racer.cancel()
+
+    def summary(self) -> dict:
+        return {
+            "decisions": dict(self.decisions),
+            "models": {model: stats.summary() for model, stats in self.stats.items()},
+            "tripped": time.monotonic() < self._tripped_until,
+        }
+
+
+_router: ModelRouter | None = None
+
+
+def get_model_router() -> ModelRouter:
+    global _router
+    if _router is None:
+        _router = ModelRouter(get_gemini_client(), config.GEMINI_MODEL, config.GEMINI_FALLBACK_MODEL)
+    return _router
@@ -0,0 +1,72 @@
+"""
+Whole-channel permission overwrite updates for the ticket commands.
+
+Each command computes the complete new overwrite map and applies it with a
+single channel.edit(overwrites=...), instead of one set_permissions call
+per member.
+"""
+import asyncio
+import json
+import logging
+import random
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+BASE_DELAY_SECONDS = 1.0
+
+Overwrites = dict[discord.Role | discord.Member | discord.Object, discord.PermissionOverwrite]
+
+
+def copy_overwrites(channel: discord.abc.GuildChannel) -> Overwrites:
+    """Independent copies of the channel's current overwrites, safe to modify."""
+    return {
+        target: discord.PermissionOverwrite.from_pair(*overwrite.pair())
+        for target, overwrite in channel.overwrites.items()
+    }
+
+
+def dump_member_overwrites(overwrites: Overwrites) -> str:
+    """JSON of the members' overwrites as raw allow/deny bits, for restoring them exactly."""
+    saved = {}
+    for target, overwrite in overwrites.items():
+        if isinstance(target, discord.Member):
+            allow, deny = overwrite.pair()
+            saved[str(target.id)] = [allow.value, deny.value]
+    return json.dumps(saved)
+
+
+def load_member_overwrites(saved: str) -> dict[int, discord.PermissionOverwrite]:
+    return {
+        int(target_id): discord.PermissionOverwrite.from_pair(
+            discord.Permissions(allow), discord.Permissions(deny)
+        )
+        for target_id, (allow, deny) in json.loads(saved).items()
+    }
+
+
+async def apply_overwrites(channel: discord.abc.GuildChannel, overwrites: Overwrites, reason: str | None = None):
+    """
+    Replace every overwrite on `channel` in one request.
+
+    discord.py already waits out ordinary 429s; this retries the ones it
+    gives up on (RateLimited, or a 429 after its own retries) and 5xx
+    errors, with exponential backoff. Other errors are raised at once.
+    """
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            await channel.edit(overwrites=overwrites, reason=reason)
+            return
+        except discord.RateLimited as e:
+            if attempt == MAX_ATTEMPTS:
+                raise
+            delay = e.retry_after
+        except discord.HTTPException as e:
+            if attempt == MAX_ATTEMPTS or (e.status != 429 and e.status < 500):
+                raise
+            delay = BASE_DELAY_SECONDS * 2 ** (attempt - 1)
+        delay += random.uniform(0, delay / 4)
+        logger.warning(f"Overwrite update on channel {channel.id} throttled; retry {attempt} in {delay:.1f}s")
+        await asyncio.sleep(delay)
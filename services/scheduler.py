@@ -0,0 +1,256 @@
+"""
+One persistent scheduler for the daily posts and for delayed actions.
+
+Jobs live in a SQLite table and, while the bot runs, in a heap ordered by
+due time; a single timer task sleeps until the earliest one. Cogs register
+a handler per job kind and schedule jobs by id, so rescheduling an id
+replaces the old job. Jobs that came due while the bot was down run once
+as soon as the scheduler starts.
+"""
+import asyncio
+import datetime
+import heapq
+import json
+import logging
+import sqlite3
+import time
+from typing import Awaitable, Callable
+from zoneinfo import ZoneInfo
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on one timer sleep, so wall-clock jumps (suspend, NTP) are noticed
+MAX_SLEEP_SECONDS = 300
+# Jobs running this much later than due are logged as caught up
+LATE_LOG_SECONDS = 60
+
+Handler = Callable[[dict], Awaitable[None]]
+
+
+def tz_name(tz: datetime.tzinfo) -> str:
+    """A storable name for `tz`: the IANA key, or a fixed offset like "+01:00"."""
+    if isinstance(tz, ZoneInfo):
+        return tz.key
+    offset = tz.utcoffset(None)
+    if offset is None:
+        raise ValueError(f"Cannot store time zone {tz!r}")
+    minutes = int(offset.total_seconds()) // 60
+    sign = "+" if minutes >= 0 else "-"
+    return f"{sign}{abs(minutes) // 60:02d}:{abs(minutes) % 60:02d}"
+
+
+def resolve_tz(name: str) -> datetime.tzinfo:
+    if name[0] in "+-":
+        hours, minutes = name[1:].split(":")
+        offset = datetime.timedelta(hours=int(hours), minutes=int(minutes))
+        return datetime.timezone(offset if name[0] == "+" else -offset)
+    return ZoneInfo(name)
+
+
+def next_daily(at: str, tz: str, after: float) -> float:
+    """Epoch seconds of the first `at` ("HH:MM", wall clock in `tz`) strictly after `after`."""
+    zone = resolve_tz(tz)
+    hour, minute = map(int, at.split(":"))
+    now = datetime.datetime.fromtimestamp(after, zone)
+    target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if target.timestamp() <= after:
+        target = (now + datetime.timedelta(days=1)).replace(hour=hour, minute=minute, second=0, microsecond=0)
+    return target.timestamp()
+
+
+class Job:
+    __slots__ = ("job_id", "kind", "run_at", "payload", "daily_at", "timezone")
+
+    def __init__(self, job_id: str, kind: str, run_at: float, payload: dict,
+                 daily_at: str | None = None, timezone: str | None = None):
+        self.job_id = job_id
+        self.kind = kind
+        self.run_at = run_at
+        self.payload = payload
+        # Recurring jobs: wall-clock "HH:MM" and the zone it is read in
+        self.daily_at = daily_at
+        self.timezone = timezone
+
+
+class Scheduler:
+    """
+    Heap of jobs backed by the `jobs` table, run by one timer task.
+
+    Heap entries are (run_at, seq, job_id); a cancelled or rescheduled job
+    leaves a stale entry that is skipped when popped. Due jobs whose kind
+    has no handler yet (its cog isn't loaded) wait until one is registered.
+
+    Delivery is at most once: a one-shot job is deleted, and a recurring
+    job moved to its next occurrence, before its handler runs. A job that
+    was due several times during downtime runs once.
+    """
+
+    def __init__(self, db_path: str):
+        self.db = sqlite3.connect(db_path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        # Every schedule/fire commits on the event loop; skip the fsync per commit
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        with self.db:
+            self.db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id   TEXT PRIMARY KEY,
+                    kind     TEXT,
+                    run_at   REAL,
+                    payload  TEXT,
+                    daily_at TEXT,
+                    timezone TEXT
+                )
+                """
+            )
+        self.jobs: dict[str, Job] = {}
+        self._heap: list[tuple[float, int, str]] = []
+        self._seq = 0
+        self._handlers: dict[str, Handler] = {}
+        # kind -> ids of due jobs waiting for a handler
+        self._parked: dict[str, list[str]] = {}
+        self._running: set[asyncio.Task] = set()
+        self._wake = asyncio.Event()
+        self._timer: asyncio.Task | None = None
+        for job_id, kind, run_at, payload, daily_at, timezone in self.db.execute(
+            "SELECT job_id, kind, run_at, payload, daily_at, timezone FROM jobs"
+        ):
+            self._add(Job(job_id, kind, run_at, json.loads(payload or "{}"), daily_at, timezone))
+
+    def _add(self, job: Job):
+        self.jobs[job.job_id] = job
+        self._seq += 1
+        heapq.heappush(self._heap, (job.run_at, self._seq, job.job_id))
+        self._wake.set()
+
+    def _save(self, job: Job):
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO jobs (job_id, kind, run_at, payload, daily_at, timezone) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job.job_id, job.kind, job.run_at, json.dumps(job.payload), job.daily_at, job.timezone)
+            )
+
+    # ---------- handlers -----------------------------------------------------
+
+    def register(self, kind: str, handler: Handler):
+        self._handlers[kind] = handler
+        for job_id in self._parked.pop(kind, ()):
+            job = self.jobs.get(job_id)
+            if job is not None:
+                self._seq += 1
+                heapq.heappush(self._heap, (job.run_at, self._seq, job_id))
+        self._wake.set()
+
+    def unregister(self, kind: str):
+        self._handlers.pop(kind, None)
+
+    # ---------- jobs ---------------------------------------------------------
+
+    def schedule_at(self, job_id: str, kind: str, run_at: float, payload: dict | None = None):
+        """Run `kind`'s handler with `payload` at epoch `run_at`, replacing any job with this id."""
+        job = Job(job_id, kind, run_at, payload or {})
+        self._save(job)
+        self._add(job)
+
+    def schedule_in(self, job_id: str, kind: str, delay: float, payload: dict | None = None):
+        self.schedule_at(job_id, kind, time.time() + delay, payload)
+
+    def schedule_daily(self, job_id: str, kind: str, at: datetime.time, tz: datetime.tzinfo,
+                       payload: dict | None = None):
+        """
+        Run every day at `at` in `tz`. Calling this again with the same time
+        keeps the stored next run, so an occurrence missed while the bot was
+        down still runs.
+        """
+        daily_at, timezone = at.strftime("%H:%M"), tz_name(tz)
+        existing = self.jobs.get(job_id)
+        if existing is not None and (existing.daily_at, existing.timezone) == (daily_at, timezone):
+            return
+        job = Job(job_id, kind, next_daily(daily_at, timezone, time.time()), payload or {}, daily_at, timezone)
+        self._save(job)
+        self._add(job)
+
+    def cancel(self, job_id: str):
+        if self.jobs.pop(job_id, None) is not None:
+            with self.db:
+                self.db.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+
+    def has(self, job_id: str) -> bool:
+        return job_id in self.jobs
+
+    def pending(self, kind: str) -> list[Job]:
+        return [job for job in self.jobs.values() if job.kind == kind]
+
+    # ---------- timer --------------------------------------------------------
+
+    def start(self):
+        if self._timer is None or self._timer.done():
+            self._timer = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            now = time.time()
+            while self._heap and self._heap[0][0] <= now:
+                run_at, _, job_id = heapq.heappop(self._heap)
+                job = self.jobs.get(job_id)
+                if job is None or job.run_at != run_at:
+                    # Cancelled or rescheduled since this entry was pushed
+                    continue
+                self._fire(job, now)
+            timeout = MAX_SLEEP_SECONDS
+            if self._heap:
+                timeout = min(timeout, self._heap[0][0] - now)
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _fire(self, job: Job, now: float):
+        handler = self._handlers.get(job.kind)
+        if handler is None:
+            self._parked.setdefault(job.kind, []).append(job.job_id)
+            return
+        if now - job.run_at > LATE_LOG_SECONDS:
+            logger.info(f"Running job {job.job_id} {(now - job.run_at) / 60:.0f} min late (missed while offline)")
+        if job.daily_at:
+            job.run_at = next_daily(job.daily_at, job.timezone, now)
+            self._save(job)
+            self._seq += 1
+            heapq.heappush(self._heap, (job.run_at, self._seq, job.job_id))
+        else:
+            self.cancel(job.job_id)
+        task = asyncio.get_running_loop().create_task(self._call(handler, job))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _call(self, handler: Handler, job: Job):
+        try:
+            await handler(job.payload)
+        except Exception:
+            logger.exception(f"Scheduled job {job.job_id} ({job.kind}) failed")
+
+    def close(self):
+        if self._timer is not None:
+            self._timer.cancel()
+        for task in self._running:
+            task.cancel()
+        self.db.close()
+
+
+_scheduler: Scheduler | None = None
+
+
+def get_scheduler() -> Scheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = Scheduler(config.SCHEDULER_DB)
+    return _scheduler
+
+
+def close_scheduler():
+    if _scheduler is not None:
+        _scheduler.close()
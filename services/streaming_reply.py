@@ -0,0 +1,124 @@
+import asyncio
+import time
+
+import discord
+
+import config
+
+DISCORD_CHAR_LIMIT = 2000
+PLACEHOLDER = "…"
+
+
+def split_point(text: str, limit: int = DISCORD_CHAR_LIMIT) -> int:
+    """Where to cut `text` so the head fits in one message: last newline, else last space."""
+    if len(text) <= limit:
+        return len(text)
+    cut = text.rfind("\n", 0, limit)
+    if cut < limit // 2:
+        cut = text.rfind(" ", 0, limit)
+    if cut < limit // 2:
+        cut = limit
+    return cut
+
+
+class StreamingReply:
+    """
+    Shows a streamed answer as it arrives.
+
+    A placeholder message is sent immediately, then edited as text comes in.
+    Edits are coalesced to at most one per `interval` seconds. When the text
+    outgrows one message, the message is finalised at a line boundary and a
+    new one is started.
+
+    `send` is any coroutine function that posts a message and returns it
+    (channel.send, message.reply, interaction.followup.send with wait=True).
+    """
+
+    def __init__(self, send, interval: float | None = None, limit: int = DISCORD_CHAR_LIMIT):
+        self._send = send
+        self.interval = config.AI_STREAM_EDIT_INTERVAL if interval is None else interval
+        self.limit = limit
+        self.messages: list[discord.Message] = []
+        self.text = ""
+        self._current = ""
+        self._shown = ""
+        self._last_edit = 0.0
+        self._flush_task: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+
+    async def start(self):
+        self.messages.append(await self._send(PLACEHOLDER))
+        # The first real text replaces the placeholder without waiting
+        self._last_edit = 0.0
+
+    async def status(self, note: str):
+        """Replace the placeholder with a status line (e.g. queue position) until text arrives."""
+        async with self._lock:
+            if self.messages and not self.text:
+                await self.messages[-1].edit(content=note)
+
+    async def feed(self, chunk: str):
+        self.text += chunk
+        self._current += chunk
+        while len(self._current) > self.limit:
+            cut = split_point(self._current, self.limit)
+            head, self._current = self._current[:cut].rstrip(), self._current[cut:].lstrip()
+            async with self._lock:
+                await self._edit(head)
+                self.messages.append(await self._send(self._current[:self.limit] or PLACEHOLDER))
+                self._shown = self._current[:self.limit]
+                self._last_edit = time.monotonic()
+
+        wait = self.interval - (time.monotonic() - self._last_edit)
+        if wait <= 0:
+            await self._flush()
+        elif self._flush_task is None or self._flush_task.done():
+            # Make sure trailing text shows up even if the stream stalls
+            self._flush_task = asyncio.create_task(self._flush_later(wait))
+
+    async def _flush_later(self, delay: float):
+        await asyncio.sleep(delay)
+        await self._flush()
+
+    async def _flush(self):
+        async with self._lock:
+            if self._current and self._current != self._shown:
+                await self._edit(self._current)
+
+    async def _edit(self, content: str):
+        await self.messages[-1].edit(content=content)
+        self._shown = content
+        self._last_edit = time.monotonic()
+
+    async def discard(self):
+        """Delete everything posted so far (the request was cancelled)."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+        for message in self.messages:
+            try:
+                await message.delete()
+            except discord.HTTPException:
+                pass
+        self.messages.clear()
+
+    async def fail(self, error: str) -> str:
+        """
+        Finish after an error: `error` replaces an empty reply, and is noted
+        under a partial one so a cut-off answer doesn't look complete.
+        """
+        if self.text.strip():
+            await self.feed(f"\n\n*{error}*")
+        return await self.finish(error)
+
+    async def finish(self, fallback: str = "An error occurred.") -> str:
+        """Write out whatever is left; returns the full text."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+        if not self.messages:
+            await self.start()
+        if not self.text.strip():
+            async with self._lock:
+                await self._edit(fallback)
+            return ""
+        await self._flush()
+        return self.text
@@ -0,0 +1,182 @@
+import asyncio
+import hashlib
+import io
+import os
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlparse
+
+import aiohttp
+import discord
+
+import config
+
+# Re-use a CDN link only while it has at least this long left to live
+URL_EXPIRY_MARGIN = 10 * 60
+# Attachment URLs without an `ex=` expiry are trusted for this long
+DEFAULT_URL_TTL = 12 * 60 * 60
+# Remembered upload links, keyed by file hash
+MAX_LINKS = 1024
+# A re-used link is checked with a HEAD request first; give up on it after this long
+LINK_CHECK_TIMEOUT = 5
+
+
+def _url_expiry(url: str) -> float:
+    ex = parse_qs(urlparse(url).query).get("ex")
+    if ex:
+        try:
+            return float(int(ex[0], 16))
+        except ValueError:
+            pass
+    return time.time() + DEFAULT_URL_TTL
+
+
+def _read(path: str) -> bytes:
+    with open(path, "rb") as fh:
+        return fh.read()
+
+
+class TagFile:
+    __slots__ = ("tag", "path", "filename", "sha256", "size", "data")
+
+    def __init__(self, tag: str, path: str, data: bytes):
+        self.tag = tag
+        self.path = path
+        self.filename = os.path.basename(path)
+        self.sha256 = hashlib.sha256(data).hexdigest()
+        self.size = len(data)
+        self.data: bytes | None = data
+
+
+class TagFileCache:
+    """
+    Per-tag cache of file attachments.
+
+    The first send of a tag reads the file once (off the event loop) and
+    keeps its bytes, so later sends re-upload from memory. File bytes are
+    kept under a total budget, evicting the least recently used tags first.
+    Tag commands call invalidate() whenever a tag is changed, renamed or
+    removed.
+
+    With config.TAG_FILE_REUSE_UPLOADS (on by default), the attachment URL
+    of an upload is also remembered under the file's hash, and later sends
+    post that link instead of the file while it is unexpired and still
+    reachable (its message may have been deleted, e.g. with a closed ticket).
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes_used = 0
+        self._entries: OrderedDict[str, TagFile] = OrderedDict()
+        # sha256 -> (attachment URL, expiry epoch)
+        self._links: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._session: aiohttp.ClientSession | None = None
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, tag: str, path: str) -> TagFile:
+        entry = self._entries.get(tag)
+        if entry is not None and entry.path == path and entry.data is not None:
+            self._entries.move_to_end(tag)
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        data = await asyncio.to_thread(_read, path)
+        self.invalidate(tag)
+        entry = TagFile(tag, path, data)
+        if entry.size > self.max_bytes:
+            # Caching it would evict everything else and then itself; send it uncached
+            return entry
+        self._entries[tag] = entry
+        self.bytes_used += entry.size
+        self._trim()
+        return entry
+
+    def _trim(self):
+        for entry in self._entries.values():
+            if self.bytes_used <= self.max_bytes:
+                break
+            if entry.data is not None:
+                entry.data = None
+                self.bytes_used -= entry.size
+        for tag in [t for t, e in self._entries.items() if e.data is None]:
+            del self._entries[tag]
+
+    def remember_upload(self, entry: TagFile, message: discord.Message | None):
+        if message is None or not message.attachments:
+            return
+        url = message.attachments[0].url
+        self._links[entry.sha256] = (url, _url_expiry(url))
+        self._links.move_to_end(entry.sha256)
+        while len(self._links) > MAX_LINKS:
+            self._links.popitem(last=False)
+
+    async def live_link(self, entry: TagFile) -> str | None:
+        """A previous upload of this file's bytes that can still be linked, or None."""
+        link = self._links.get(entry.sha256)
+        if link is None:
+            return None
+        url, expires = link
+        if time.time() < expires - URL_EXPIRY_MARGIN:
+            try:
+                async with self._get_session().head(url) as resp:
+                    if resp.status == 200:
+                        return url
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                pass
+        self._links.pop(entry.sha256, None)
+        return None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=LINK_CHECK_TIMEOUT))
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+
+    def invalidate(self, tag: str):
+        entry = self._entries.pop(tag, None)
+        if entry is not None and entry.data is not None:
+            self.bytes_used -= entry.size
+
+    def file_for(self, entry: TagFile) -> discord.File:
+        if entry.data is not None:
+            return discord.File(io.BytesIO(entry.data), filename=entry.filename)
+        return discord.File(entry.path, filename=entry.filename)
+
+
+_cache: TagFileCache | None = None
+
+
+def get_tag_file_cache() -> TagFileCache:
+    global _cache
+    if _cache is None:
+        _cache = TagFileCache(config.TAG_FILE_CACHE_MAX_BYTES)
+    return _cache
+
+
+async def close_tag_file_cache():
+    if _cache is not None:
+        await _cache.close()
+
+
+async def send_tag_file(send, tag: str, tag_message: str | None, file_path: str, **kwargs):
+    """
+    Send a tag that carries a file through `send` (channel.send, message.reply,
+    followup.send, ...). Uploads the cached bytes, or links a live earlier
+    upload of the same file when config.TAG_FILE_REUSE_UPLOADS is set.
+    """
+    cache = get_tag_file_cache()
+    entry = await cache.get(tag, file_path)
+    if config.TAG_FILE_REUSE_UPLOADS:
+        url = await cache.live_link(entry)
+        if url is not None:
+            content = f"{tag_message}\n{url}" if tag_message else url
+            return await send(content, **kwargs)
+
+    sent = await send(tag_message or "", file=cache.file_for(entry), **kwargs)
+    cache.remember_upload(entry, sent)
+    return sent
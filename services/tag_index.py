@@ -0,0 +1,212 @@
+import bisect
+import difflib
+import re
+import sqlite3
+
+TAGS_DB = "tags.db"
+
+_TOKEN_SPLIT = re.compile(r"[-_\s]+")
+
+
+def _tokens(name: str) -> set[str]:
+    return {t for t in _TOKEN_SPLIT.split(name.lower()) if t}
+
+
+def _trigrams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TagIndex:
+    """
+    In-memory view of tags.db used by the ?tag listener and /tag autocomplete.
+
+    - exact:    tag name -> (message, file_path)
+    - tokens:   hyphen/space separated word -> tag names
+    - trigrams: padded 3-char shingles -> tag names
+
+    Partial matches are order-agnostic and keep the old LIKE '%term%'
+    semantics: terms of 3+ chars intersect trigram postings, shorter terms
+    scan the token vocabulary. Fuzzy suggestions only score tags that share
+    trigrams with the query.
+
+    The index is built once from the database and kept in sync by the tag
+    commands through put(), remove() and rename().
+    """
+
+    FUZZY_CANDIDATES = 50
+
+    def __init__(self, rows=()):
+        self.exact: dict[str, tuple[str | None, str | None]] = {}
+        self.tokens: dict[str, set[str]] = {}
+        self.trigrams: dict[str, set[str]] = {}
+        # Sorted lowercase names for prefix autocomplete
+        self._sorted: list[tuple[str, str]] = []
+        for tag, message, file_path in rows:
+            self._add(tag, message, file_path)
+        self._sorted.sort()
+
+    @classmethod
+    def from_db(cls, db_path: str = TAGS_DB) -> "TagIndex":
+        db = sqlite3.connect(db_path)
+        try:
+            rows = db.execute("SELECT tag, message, file_path FROM tags").fetchall()
+        except sqlite3.OperationalError:
+            # tags table not created yet
+            rows = []
+        finally:
+            db.close()
+        return cls(rows)
+
+    def __len__(self) -> int:
+        return len(self.exact)
+
+    # ---------- maintenance --------------------------------------------------
+
+    def _add(self, tag: str, message, file_path, *, keep_sorted: bool = False):
+        self.exact[tag] = (message, file_path)
+        lower = tag.lower()
+        for token in _tokens(tag):
+            self.tokens.setdefault(token, set()).add(tag)
+        for gram in _trigrams(lower):
+            self.trigrams.setdefault(gram, set()).add(tag)
+        if keep_sorted:
+            bisect.insort(self._sorted, (lower, tag))
+        else:
+            self._sorted.append((lower, tag))
+
+    def _discard(self, tag: str):
+        self.exact.pop(tag, None)
+        lower = tag.lower()
+        for token in _tokens(tag):
+            bucket = self.tokens.get(token)
+            if bucket is not None:
+                bucket.discard(tag)
+                if not bucket:
+                    del self.tokens[token]
+        for gram in _trigrams(lower):
+            bucket = self.trigrams.get(gram)
+            if bucket is not None:
+                bucket.discard(tag)
+                if not bucket:
+                    del self.trigrams[gram]
+        pos = bisect.bisect_left(self._sorted, (lower, tag))
+        if pos < len(self._sorted) and self._sorted[pos] == (lower, tag):
+            del self._sorted[pos]
+
+    def put(self, tag: str, message, file_path):
+        """Insert or replace a tag (mirrors REPLACE INTO tags)."""
+        if tag in self.exact:
+            self._discard(tag)
+        self._add(tag, message, file_path, keep_sorted=True)
+
+    def remove(self, tag: str):
+        if tag in self.exact:
+            self._discard(tag)
+
+    def rename(self, old: str, new: str, file_path=None):
+        """Rename a tag; `file_path` replaces the stored path when given."""
+        entry = self.exact.get(old)
+        if entry is None:
+            return
+        message, old_path = entry
+        self._discard(old)
+        self.put(new, message, file_path if file_path is not None else old_path)
+
+    # ---------- lookups ------------------------------------------------------
+
+    def get(self, tag: str):
+        return self.exact.get(tag)
+
+    def _containing(self, term: str) -> set[str]:
+        """Tags whose lowercase name contains `term` (same semantics as LIKE '%term%')."""
+        if len(term) >= 3:
+            grams = [term[i:i + 3] for i in range(len(term) - 2)]
+            postings = sorted((self.trigrams.get(g, set()) for g in grams), key=len)
+            candidates = set(postings[0])
+            for p in postings[1:]:
+                candidates &= p
+                if not candidates:
+                    break
+        else:
+            # Too short for trigrams: scan the token vocabulary instead of every tag
+            candidates = set()
+            for token, tags in self.tokens.items():
+                if term in token:
+                    candidates |= tags
+        return {t for t in candidates if term in t.lower()}
+
+    def partial(self, terms: list[str]) -> list[str]:
+        """Tags containing every term, in any order."""
+        result = None
+        # Longest terms first: their trigram postings are the most selective
+        for term in sorted(terms, key=len, reverse=True):
+            matches = self._containing(term)
+            result = matches if result is None else result & matches
+            if not result:
+                return []
+        return sorted(result or ())
+
+    def fuzzy(self, query: str, n: int = 5, cutoff: float = 0.6) -> list[str]:
+        """Close matches for `query`, ranked like difflib.get_close_matches."""
+        counts: dict[str, int] = {}
+        for gram in _trigrams(query.lower()):
+            for tag in self.trigrams.get(gram, ()):
+                counts[tag] = counts.get(tag, 0) + 1
+        if not counts:
+            return []
+        candidates = sorted(counts, key=counts.get, reverse=True)[:self.FUZZY_CANDIDATES]
+
+        matcher = difflib.SequenceMatcher()
+        matcher.set_seq2(query)
+        scored = []
+        for tag in candidates:
+            matcher.set_seq1(tag.lower())
+            if matcher.real_quick_ratio() >= cutoff and matcher.quick_ratio() >= cutoff:
+                ratio = matcher.ratio()
+                if ratio >= cutoff:
+                    scored.append((ratio, tag))
+        scored.sort(key=lambda x: (-x[0], x[1]))
+        return [tag for _, tag in scored[:n]]
+
+    def complete(self, current: str, limit: int = 25) -> list[str]:
+        """Autocomplete: prefix matches first, then partial and fuzzy matches."""
+        current = current.strip().lower()
+        if not current:
+            return [tag for _, tag in self._sorted[:limit]]
+
+        results: list[str] = []
+        seen: set[str] = set()
+
+        def extend(tags):
+            for tag in tags:
+                if tag not in seen:
+                    seen.add(tag)
+                    results.append(tag)
+                    if len(results) >= limit:
+                        return True
+            return False
+
+        key = current.replace(" ", "-")
+        pos = bisect.bisect_left(self._sorted, (key, ""))
+        prefix = []
+        while pos < len(self._sorted) and len(prefix) < limit and self._sorted[pos][0].startswith(key):
+            prefix.append(self._sorted[pos][1])
+            pos += 1
+        if extend(prefix):
+            return results
+        if extend(self.partial(current.split())):
+            return results
+        extend(self.fuzzy(key, n=limit))
+        return results
+
+
+_index: TagIndex | None = None
+
+
+def get_tag_index() -> TagIndex:
+    """Shared index, built from tags.db on first use."""
+    global _index
+    if _index is None:
+        _index = TagIndex.from_db()
+    return _index
@@ -0,0 +1,190 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+
+import config
+from services.tickets import Ticket
+from services.transcripts import TranscriptWriter
+
+logger = logging.getLogger(__name__)
+
+FLUSH_BATCH_SIZE = 20
+# Longest transcript text indexed per ticket
+MAX_INDEXED_CHARS = 2 * 1024 * 1024
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+
+def match_expression(query: str) -> str | None:
+    """
+    FTS5 MATCH expression for free text: every word must appear, the last
+    one as a prefix. Words are quoted, so FTS5 operators typed by users
+    can't cause syntax errors.
+    """
+    terms = _TERM.findall(query)
+    if not terms:
+        return None
+    quoted = [f'"{t}"' for t in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+class ArchivedTicket:
+    __slots__ = ("channel_id", "name", "owner_id", "category", "opened_at", "closed_at",
+                 "participants", "message_count", "snippet")
+
+    def __init__(self, channel_id: int, name: str, owner_id: int, category: str, opened_at: int,
+                 closed_at: int, participants: list[int], message_count: int, snippet: str = ""):
+        self.channel_id = channel_id
+        self.name = name
+        self.owner_id = owner_id
+        self.category = category
+        self.opened_at = opened_at
+        self.closed_at = closed_at
+        self.participants = participants
+        self.message_count = message_count
+        self.snippet = snippet
+
+
+class TicketArchive:
+    """
+    Full-text archive of closed ticket transcripts (SQLite FTS5).
+
+    Closing a ticket only queues its metadata and the transcript's text
+    file; a background flush indexes queued tickets in one transaction from
+    a worker thread. Searches rank tickets with bm25, the ticket name
+    weighted above the body, and return highlighted snippets.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.db = sqlite3.connect(db_path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        with self.db:
+            self.db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS archived_tickets (
+                    channel_id    INTEGER PRIMARY KEY,
+                    name          TEXT,
+                    owner_id      INTEGER,
+                    category      TEXT,
+                    opened_at     INTEGER,
+                    closed_at     INTEGER,
+                    participants  TEXT,
+                    message_count INTEGER
+                )
+                """
+            )
+            self.db.execute("CREATE INDEX IF NOT EXISTS idx_archived_owner ON archived_tickets(owner_id, closed_at)")
+            # rowid = channel_id
+            self.db.execute(
+                """
+                CREATE VIRTUAL TABLE IF NOT EXISTS ticket_search USING fts5(
+                    name, body, tokenize = 'unicode61 remove_diacritics 2'
+                )
+                """
+            )
+        # (ArchivedTicket, text file path) waiting to be indexed
+        self._pending: list[tuple[ArchivedTicket, str | None]] = []
+        self._flush_lock = asyncio.Lock()
+        self._writer = sqlite3.connect(db_path, check_same_thread=False)
+
+    def enqueue(self, ticket: Ticket, name: str, category: str, transcript: TranscriptWriter):
+        """Queue a closed ticket; takes over the transcript's text file."""
+        participants = sorted(set(transcript.counts) | {ticket.user_id})
+        record = ArchivedTicket(
+            ticket.channel_id, name, ticket.user_id, category, ticket.created_epoch(),
+            int(time.time()), participants, transcript.message_count
+        )
+        self._pending.append((record, transcript.take_text()))
+        if len(self._pending) >= FLUSH_BATCH_SIZE:
+            asyncio.get_running_loop().create_task(self.flush())
+
+    def _index(self, batch: list[tuple[ArchivedTicket, str | None]]):
+        with self._writer:
+            for t, text_path in batch:
+                body = ""
+                if text_path:
+                    try:
+                        with open(text_path, encoding="utf-8") as f:
+                            body = f.read(MAX_INDEXED_CHARS)
+                    except FileNotFoundError:
+                        logger.warning(f"Transcript text for ticket {t.channel_id} is gone; indexing its name only")
+                self._writer.execute(
+                    "INSERT OR REPLACE INTO archived_tickets "
+                    "(channel_id, name, owner_id, category, opened_at, closed_at, participants, message_count) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (t.channel_id, t.name, t.owner_id, t.category, t.opened_at, t.closed_at,
+                     json.dumps(t.participants), t.message_count)
+                )
+                self._writer.execute("DELETE FROM ticket_search WHERE rowid = ?", (t.channel_id,))
+                self._writer.execute(
+                    "INSERT INTO ticket_search (rowid, name, body) VALUES (?, ?, ?)", (t.channel_id, t.name, body)
+                )
+        for _, text_path in batch:
+            if text_path:
+                try:
+                    os.remove(text_path)
+                except FileNotFoundError:
+                    pass
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, []
+            try:
+                await asyncio.to_thread(self._index, batch)
+            except (sqlite3.Error, OSError) as e:
+                logger.error(f"Failed to index {len(batch)} archived tickets: {e}")
+                # Keep them for the next flush
+                self._pending[:0] = batch
+
+    def search(self, query: str, limit: int, offset: int = 0) -> tuple[int, list[ArchivedTicket]]:
+        """(total matches, one page of tickets, best first)."""
+        expression = match_expression(query)
+        if expression is None:
+            return 0, []
+        try:
+            total = self.db.execute(
+                "SELECT COUNT(*) FROM ticket_search WHERE ticket_search MATCH ?", (expression,)
+            ).fetchone()[0]
+            rows = self.db.execute(
+                """
+                SELECT a.channel_id, a.name, a.owner_id, a.category, a.opened_at, a.closed_at,
+                       a.participants, a.message_count,
+                       snippet(ticket_search, 1, '**', '**', '…', 16)
+                FROM ticket_search
+                JOIN archived_tickets a ON a.channel_id = ticket_search.rowid
+                WHERE ticket_search MATCH ?
+                ORDER BY bm25(ticket_search, 5.0, 1.0)
+                LIMIT ? OFFSET ?
+                """,
+                (expression, limit, offset)
+            ).fetchall()
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Ticket search for {query!r} failed: {e}")
+            return 0, []
+        return total, [
+            ArchivedTicket(c, n, o, cat, op, cl, json.loads(p), mc, snip)
+            for c, n, o, cat, op, cl, p, mc, snip in rows
+        ]
+
+    async def close(self):
+        await self.flush()
+        self._writer.close()
+        self.db.close()
+
+
+_archive: TicketArchive | None = None
+
+
+def get_ticket_archive() -> TicketArchive:
+    global _archive
+    if _archive is None:
+        _archive = TicketArchive(config.TICKET_ARCHIVE_DB)
+    return _archive
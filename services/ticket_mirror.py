@@ -0,0 +1,200 @@
+import asyncio
+import json
+import logging
+import sqlite3
+
+import discord
+
+import config
+from services.transcripts import TranscriptMessage, TranscriptWriter, export_channel
+
+logger = logging.getLogger(__name__)
+
+FLUSH_BATCH_SIZE = 100
+
+_COLUMNS = (
+    "message_id, channel_id, author_id, author_name, avatar_url, is_bot, "
+    "created_at, edited, content, attachments, embeds"
+)
+
+
+def _row(channel_id: int, m: TranscriptMessage) -> tuple:
+    return (
+        m.id, channel_id, m.author_id, m.author_name, m.avatar_url, int(m.is_bot),
+        m.created_at, int(m.edited), m.content, json.dumps(m.attachments), json.dumps(m.embeds),
+    )
+
+
+def _from_row(row: tuple) -> TranscriptMessage:
+    message_id, _, author_id, author_name, avatar_url, is_bot, created_at, edited, content, attachments, embeds = row
+    return TranscriptMessage(
+        message_id, author_id, author_name, avatar_url, bool(is_bot), created_at, bool(edited), content,
+        [tuple(a) for a in json.loads(attachments)], [tuple(e) for e in json.loads(embeds)],
+    )
+
+
+class TicketMirror:
+    """
+    Local copy of the messages in ticket channels, kept current from
+    gateway events so closing a ticket doesn't have to crawl its history.
+
+    Changes are buffered and written in batches from a worker thread.
+    A channel is `complete` once the mirror has seen it from creation or
+    has backfilled it; only complete channels are exported from local data.
+    Channels that were complete at the last shutdown start out `resumable`
+    instead, and only become complete again once catch_up() has fetched
+    what was posted while the bot was offline.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.db = sqlite3.connect(db_path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        with self.db:
+            self.db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS ticket_messages (
+                    message_id  INTEGER PRIMARY KEY,
+                    channel_id  INTEGER,
+                    author_id   INTEGER,
+                    author_name TEXT,
+                    avatar_url  TEXT,
+                    is_bot      INTEGER,
+                    created_at  REAL,
+                    edited      INTEGER,
+                    content     TEXT,
+                    attachments TEXT,
+                    embeds      TEXT
+                )
+                """
+            )
+            self.db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_ticket_messages_channel ON ticket_messages(channel_id, message_id)"
+            )
+            self.db.execute("CREATE TABLE IF NOT EXISTS mirrored_channels (channel_id INTEGER PRIMARY KEY)")
+        self.complete: set[int] = set()
+        self.resumable: set[int] = {c for (c,) in self.db.execute("SELECT channel_id FROM mirrored_channels")}
+
+        # Pending (sql, params) in arrival order, written by one worker thread
+        self._buffer: list[tuple[str, tuple]] = []
+        self._flush_lock = asyncio.Lock()
+        self._writer = sqlite3.connect(db_path, check_same_thread=False)
+
+    # ---------- buffered changes ---------------------------------------------
+
+    def _queue(self, sql: str, params: tuple):
+        self._buffer.append((sql, params))
+        if len(self._buffer) >= FLUSH_BATCH_SIZE:
+            asyncio.get_running_loop().create_task(self.flush())
+
+    def put(self, message: discord.Message):
+        self._queue(
+            f"INSERT OR REPLACE INTO ticket_messages ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            _row(message.channel.id, TranscriptMessage.from_message(message))
+        )
+
+    def edit(self, message_id: int, content: str | None = None, embeds: list[tuple[str, str]] | None = None):
+        if content is not None:
+            self._queue(
+                "UPDATE ticket_messages SET content = ?, edited = 1 WHERE message_id = ?", (content, message_id)
+            )
+        if embeds is not None:
+            self._queue("UPDATE ticket_messages SET embeds = ? WHERE message_id = ?", (json.dumps(embeds), message_id))
+
+    def delete(self, message_id: int):
+        self._queue("DELETE FROM ticket_messages WHERE message_id = ?", (message_id,))
+
+    def mark_complete(self, channel_id: int):
+        self.complete.add(channel_id)
+        self._queue("INSERT OR IGNORE INTO mirrored_channels (channel_id) VALUES (?)", (channel_id,))
+
+    def forget(self, channel_id: int):
+        """Drop a channel's messages once its transcript has been posted."""
+        self.complete.discard(channel_id)
+        self.resumable.discard(channel_id)
+        self._queue("DELETE FROM ticket_messages WHERE channel_id = ?", (channel_id,))
+        self._queue("DELETE FROM mirrored_channels WHERE channel_id = ?", (channel_id,))
+
+    def _write(self, ops: list[tuple[str, tuple]]):
+        with self._writer:
+            for sql, params in ops:
+                self._writer.execute(sql, params)
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self._buffer:
+                return
+            ops, self._buffer = self._buffer, []
+            try:
+                await asyncio.to_thread(self._write, ops)
+            except sqlite3.Error as e:
+                logger.error(f"Failed to write {len(ops)} ticket mirror changes: {e}")
+                # Keep them for the next flush
+                self._buffer[:0] = ops
+
+    # ---------- backfill and export ------------------------------------------
+
+    async def backfill(self, channel: discord.TextChannel):
+        """Copy a channel that existed before mirroring started, then mark it complete."""
+        async for message in channel.history(limit=None, oldest_first=True):
+            self.put(message)
+        self.mark_complete(channel.id)
+        await self.flush()
+
+    async def catch_up(self, channel: discord.TextChannel):
+        """
+        Fetch the messages a resumable channel received while the bot was
+        offline, then mark it complete. Edits and deletions made during
+        that time are not replayed.
+        """
+        (last,) = self.db.execute(
+            "SELECT MAX(message_id) FROM ticket_messages WHERE channel_id = ?", (channel.id,)
+        ).fetchone()
+        after = discord.Object(id=last) if last is not None else None
+        async for message in channel.history(limit=None, after=after, oldest_first=True):
+            self.put(message)
+        self.resumable.discard(channel.id)
+        self.mark_complete(channel.id)
+        await self.flush()
+
+    def _render(self, writer: TranscriptWriter, channel_id: int):
+        db = sqlite3.connect(self.db_path)
+        try:
+            rows = db.execute(
+                f"SELECT {_COLUMNS} FROM ticket_messages WHERE channel_id = ? ORDER BY message_id", (channel_id,)
+            )
+            writer.render_all(_from_row(row) for row in rows)
+        finally:
+            db.close()
+
+    async def export_local(self, channel_id: int, title: str) -> TranscriptWriter:
+        """Transcript from mirrored data only; works after the channel is gone."""
+        await self.flush()
+        writer = TranscriptWriter(title)
+        try:
+            await asyncio.to_thread(self._render, writer, channel_id)
+        except BaseException:
+            writer.discard()
+            raise
+        return writer
+
+    async def export(self, channel: discord.TextChannel) -> TranscriptWriter:
+        """Transcript of a ticket channel, from the mirror when it is complete, otherwise from its history."""
+        if channel.id in self.complete:
+            return await self.export_local(channel.id, f"#{channel.name}")
+        return await export_channel(channel)
+
+    async def close(self):
+        await self.flush()
+        self._writer.close()
+        self.db.close()
+
+
+_mirror: TicketMirror | None = None
+
+
+def get_ticket_mirror() -> TicketMirror:
+    global _mirror
+    if _mirror is None:
+        _mirror = TicketMirror(config.TICKET_MIRROR_DB)
+    return _mirror
@@ -0,0 +1,113 @@
+import asyncio
+import logging
+
+import discord
+
+import config
+from services.tickets import TicketStore, get_ticket_store
+
+logger = logging.getLogger(__name__)
+
+# Pause between pool channel creations, to stay clear of the channel-create rate limit
+CREATE_INTERVAL_SECONDS = 2.0
+# After a failed creation (e.g. a long 429), wait this long before trying again
+RETRY_AFTER_SECONDS = 60.0
+
+
+class TicketChannelPool:
+    """
+    Hidden, pre-created ticket channels, so opening a ticket is one channel
+    edit (rename + overwrites) instead of a channel creation.
+
+    Claims take channels synchronously, so a burst of requests gets
+    distinct channels until the pool is empty; after that claim() returns
+    None and the caller creates the channel as before. Refilling runs in a
+    single background task that creates channels one at a time.
+    """
+
+    def __init__(self, store: TicketStore, size: int, category_id: int):
+        self.store = store
+        self.size = size
+        self.category_id = category_id
+        self._refill: asyncio.Task | None = None
+        # Taken from the pool but not yet renamed into a ticket
+        self.claiming: set[int] = set()
+        self.claimed = 0
+        self.missed = 0
+
+    def prune(self, guild: discord.Guild):
+        """Forget pool entries whose channels no longer exist."""
+        for channel_id in list(self.store.pool):
+            if guild.get_channel(channel_id) is None:
+                self.store.pool_discard(channel_id)
+
+    def replenish(self, guild: discord.Guild):
+        if self.size <= 0 or len(self.store.pool) >= self.size:
+            return
+        if self._refill is None or self._refill.done():
+            self._refill = asyncio.get_running_loop().create_task(self._fill(guild))
+
+    async def _fill(self, guild: discord.Guild):
+        while len(self.store.pool) < self.size:
+            category = guild.get_channel(self.category_id)
+            if not isinstance(category, discord.CategoryChannel):
+                logger.error(f"Ticket pool category {self.category_id} not found")
+                return
+            try:
+                channel = await guild.create_text_channel(
+                    name=f"{config.TICKET_POOL_PREFIX}-{len(self.store.pool) + 1}",
+                    category=category,
+                    overwrites={guild.default_role: discord.PermissionOverwrite(view_channel=False)},
+                    reason="Ticket channel pool"
+                )
+            except discord.HTTPException as e:
+                logger.warning(f"Could not create a ticket pool channel, retrying in {RETRY_AFTER_SECONDS}s: {e}")
+                await asyncio.sleep(RETRY_AFTER_SECONDS)
+                continue
+            self.store.pool_add(channel.id)
+            await asyncio.sleep(CREATE_INTERVAL_SECONDS)
+
+    async def claim(
+        self, guild: discord.Guild, name: str, overwrites: dict
+    ) -> discord.TextChannel | None:
+        """A pool channel turned into a ticket channel, or None if the pool can't serve one."""
+        try:
+            while (channel_id := self.store.pool_take()) is not None:
+                channel = guild.get_channel(channel_id)
+                if not isinstance(channel, discord.TextChannel):
+                    continue
+                self.claiming.add(channel_id)
+                try:
+                    # Name and every overwrite in a single PATCH
+                    await channel.edit(name=name, overwrites=overwrites, reason="Ticket opened")
+                except discord.NotFound:
+                    continue
+                except discord.HTTPException as e:
+                    logger.warning(f"Could not claim pool channel {channel_id}: {e}")
+                    # Still hidden; keep it for later
+                    self.store.pool_add(channel_id)
+                    break
+                finally:
+                    self.claiming.discard(channel_id)
+                self.claimed += 1
+                return channel
+            self.missed += 1
+            return None
+        finally:
+            self.replenish(guild)
+
+
+_pool: TicketChannelPool | None = None
+
+
+def get_ticket_pool() -> TicketChannelPool:
+    global _pool
+    if _pool is None:
+        _pool = TicketChannelPool(get_ticket_store(), config.TICKET_POOL_SIZE, config.DEV_SUPPORT_CATEGORY_ID)
+    return _pool
+
+
+def is_pool_channel(channel: discord.abc.GuildChannel) -> bool:
+    """Whether `channel` is waiting in the pool or being claimed. Matched by id: ticket names come from users."""
+    pool = get_ticket_pool()
+    return channel.id in pool.store.pool or channel.id in pool.claiming
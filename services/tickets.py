@@ -0,0 +1,308 @@
+import asyncio
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+import config
+
+# Per-type databases used before the ticket store; imported once into TICKETS_DB
+LEGACY_TICKET_DBS = {"dev": "dev_tickets.db", "api": "api_tickets.db"}
+LEGACY_HOLD_DB = "tickethold.db"
+# PRAGMA user_version of TICKETS_DB once the legacy databases have been imported
+SCHEMA_LEGACY_IMPORTED = 1
+
+
+class Ticket:
+    __slots__ = ("channel_id", "user_id", "kind", "created", "last_activity", "reminded_at")
+
+    def __init__(self, channel_id: int, user_id: int, kind: str, created: str,
+                 last_activity: float | None = None, reminded_at: float | None = None):
+        self.channel_id = channel_id
+        self.user_id = user_id
+        self.kind = kind
+        # ISO timestamp, as the ticket databases always stored it
+        self.created = created
+        # Epoch seconds of the last message from a member, and of the last reminder sent since
+        self.last_activity = last_activity if last_activity is not None else time.time()
+        self.reminded_at = reminded_at
+
+    def created_epoch(self) -> int:
+        try:
+            return int(datetime.fromisoformat(self.created).timestamp())
+        except (TypeError, ValueError):
+            return 0
+
+
+class TicketStore:
+    """
+    Open tickets and their hold state, shared by the ticket panel, the
+    ticket listener and the ticket commands.
+
+    One SQLite connection; every ticket is also kept in memory, indexed by
+    channel and by owner, so lookups never touch the database. Writes go
+    through immediately, except activity timestamps: touch() only updates
+    memory, and flush_activity() writes the changed ones in one transaction.
+
+    The panel registers a ticket right after creating its channel, while
+    the listener sees the channel through the gateway, often first.
+    wait_for() lets the listener await the registration instead of polling.
+    """
+
+    def __init__(self, db_path: str):
+        self.db = sqlite3.connect(db_path)
+        with self.db:
+            self.db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS tickets (
+                    channel_id INTEGER PRIMARY KEY,
+                    user_id    INTEGER,
+                    kind       TEXT,
+                    created    TEXT
+                )
+                """
+            )
+            self.db.execute("CREATE INDEX IF NOT EXISTS idx_tickets_user ON tickets(user_id)")
+            for column in ("last_activity REAL", "reminded_at REAL"):
+                try:
+                    self.db.execute(f"ALTER TABLE tickets ADD COLUMN {column}")
+                except sqlite3.OperationalError:
+                    # Column already exists
+                    pass
+            # Lets the inactivity sweep read only the stale tickets
+            self.db.execute("CREATE INDEX IF NOT EXISTS idx_tickets_activity ON tickets(last_activity)")
+            self.db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS ticket_hold (
+                    channel_id INTEGER PRIMARY KEY,
+                    hold_time  TEXT
+                )
+                """
+            )
+            # Members' overwrites from before the hold, restored by unhold (JSON, see services.overwrites)
+            try:
+                self.db.execute("ALTER TABLE ticket_hold ADD COLUMN overwrites TEXT")
+            except sqlite3.OperationalError:
+                # Column already exists
+                pass
+            # Pre-created, hidden channels waiting to become tickets (see services.ticket_pool)
+            self.db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS ticket_pool (
+                    channel_id INTEGER PRIMARY KEY,
+                    created    REAL
+                )
+                """
+            )
+        self.by_channel: dict[int, Ticket] = {}
+        self.by_user: dict[int, set[int]] = {}
+        # channel_id -> ISO hold time
+        self.holds: dict[int, str] = {}
+        # Pool channel ids, oldest first
+        self.pool: list[int] = []
+        self._waiters: dict[int, list[asyncio.Future]] = {}
+        # Channels whose last_activity changed since the last flush
+        self._dirty_activity: set[int] = set()
+
+    def load(self):
+        if self.db.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_LEGACY_IMPORTED:
+            # Stores from before the marker that already hold tickets were imported then
+            if self.db.execute("SELECT COUNT(*) FROM tickets").fetchone()[0] == 0:
+                self._import_legacy()
+            with self.db:
+                self.db.execute(f"PRAGMA user_version = {SCHEMA_LEGACY_IMPORTED}")
+        # Tickets from before activity tracking start their inactivity clock now
+        with self.db:
+            self.db.execute("UPDATE tickets SET last_activity = ? WHERE last_activity IS NULL", (time.time(),))
+        self.by_channel = {}
+        self.by_user = {}
+        for row in self.db.execute(
+            "SELECT channel_id, user_id, kind, created, last_activity, reminded_at FROM tickets"
+        ):
+            self._index(Ticket(*row))
+        self.holds = dict(self.db.execute("SELECT channel_id, hold_time FROM ticket_hold"))
+        self.pool = [c for (c,) in self.db.execute("SELECT channel_id FROM ticket_pool ORDER BY created")]
+
+    def _import_legacy(self):
+        with self.db:
+            for kind, path in LEGACY_TICKET_DBS.items():
+                if not os.path.exists(path):
+                    continue
+                legacy = sqlite3.connect(path)
+                try:
+                    rows = legacy.execute("SELECT user_id, channel_id, created FROM tickets").fetchall()
+                except sqlite3.OperationalError:
+                    rows = []
+                finally:
+                    legacy.close()
+                self.db.executemany(
+                    "INSERT OR IGNORE INTO tickets (channel_id, user_id, kind, created) VALUES (?, ?, ?, ?)",
+                    [(channel_id, user_id, kind, created) for user_id, channel_id, created in rows]
+                )
+            if os.path.exists(LEGACY_HOLD_DB):
+                legacy = sqlite3.connect(LEGACY_HOLD_DB)
+                try:
+                    rows = legacy.execute("SELECT channel_id, hold_time FROM ticket_hold").fetchall()
+                except sqlite3.OperationalError:
+                    rows = []
+                finally:
+                    legacy.close()
+                self.db.executemany(
+                    "INSERT OR IGNORE INTO ticket_hold (channel_id, hold_time) VALUES (?, ?)", rows
+                )
+
+    def _index(self, ticket: Ticket):
+        self.by_channel[ticket.channel_id] = ticket
+        self.by_user.setdefault(ticket.user_id, set()).add(ticket.channel_id)
+
+    # ---------- tickets ------------------------------------------------------
+
+    def get(self, channel_id: int) -> Ticket | None:
+        return self.by_channel.get(channel_id)
+
+    def for_user(self, user_id: int, kind: str | None = None) -> list[Ticket]:
+        tickets = [self.by_channel[c] for c in self.by_user.get(user_id, ())]
+        return [t for t in tickets if kind is None or t.kind == kind]
+
+    def register(self, channel_id: int, user_id: int, kind: str) -> Ticket:
+        ticket = Ticket(channel_id, user_id, kind, datetime.utcnow().isoformat())
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO tickets (channel_id, user_id, kind, created, last_activity) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (channel_id, user_id, kind, ticket.created, ticket.last_activity)
+            )
+        self._index(ticket)
+        for future in self._waiters.pop(channel_id, ()):
+            if not future.done():
+                future.set_result(ticket)
+        return ticket
+
+    def remove(self, channel_id: int):
+        ticket = self.by_channel.pop(channel_id, None)
+        if ticket is not None:
+            channels = self.by_user.get(ticket.user_id)
+            if channels is not None:
+                channels.discard(channel_id)
+                if not channels:
+                    del self.by_user[ticket.user_id]
+        self.holds.pop(channel_id, None)
+        self._dirty_activity.discard(channel_id)
+        with self.db:
+            self.db.execute("DELETE FROM tickets WHERE channel_id = ?", (channel_id,))
+            self.db.execute("DELETE FROM ticket_hold WHERE channel_id = ?", (channel_id,))
+
+    async def wait_for(self, channel_id: int, timeout: float) -> Ticket | None:
+        """The ticket for `channel_id`, waiting up to `timeout` seconds for it to be registered."""
+        ticket = self.by_channel.get(channel_id)
+        if ticket is not None:
+            return ticket
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(channel_id, []).append(future)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            waiters = self._waiters.get(channel_id)
+            if waiters and future in waiters:
+                waiters.remove(future)
+                if not waiters:
+                    del self._waiters[channel_id]
+
+    # ---------- activity -----------------------------------------------------
+
+    def touch(self, channel_id: int, when: float):
+        """Record activity in a ticket channel. Memory only; see flush_activity()."""
+        ticket = self.by_channel.get(channel_id)
+        if ticket is None or when <= ticket.last_activity:
+            return
+        ticket.last_activity = when
+        self._dirty_activity.add(channel_id)
+
+    def flush_activity(self):
+        if not self._dirty_activity:
+            return
+        rows = [
+            (self.by_channel[c].last_activity, c) for c in self._dirty_activity if c in self.by_channel
+        ]
+        self._dirty_activity.clear()
+        with self.db:
+            self.db.executemany("UPDATE tickets SET last_activity = ? WHERE channel_id = ?", rows)
+
+    def inactive_since(self, cutoff: float) -> list[Ticket]:
+        """Tickets with no activity after `cutoff`, least recently active first. Flush first."""
+        return [
+            self.by_channel[c]
+            for (c,) in self.db.execute(
+                "SELECT channel_id FROM tickets WHERE last_activity < ? ORDER BY last_activity", (cutoff,)
+            )
+            if c in self.by_channel
+        ]
+
+    def mark_reminded(self, channel_id: int, when: float):
+        ticket = self.by_channel.get(channel_id)
+        if ticket is None:
+            return
+        ticket.reminded_at = when
+        with self.db:
+            self.db.execute("UPDATE tickets SET reminded_at = ? WHERE channel_id = ?", (when, channel_id))
+
+    # ---------- hold state ---------------------------------------------------
+
+    def is_held(self, channel_id: int) -> bool:
+        return channel_id in self.holds
+
+    def hold(self, channel_id: int, overwrites: str | None = None):
+        hold_time = datetime.utcnow().isoformat()
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO ticket_hold (channel_id, hold_time, overwrites) VALUES (?, ?, ?)",
+                (channel_id, hold_time, overwrites)
+            )
+        self.holds[channel_id] = hold_time
+
+    def held_overwrites(self, channel_id: int) -> str | None:
+        """The overwrites recorded by hold(), or None for holds recorded without them."""
+        row = self.db.execute("SELECT overwrites FROM ticket_hold WHERE channel_id = ?", (channel_id,)).fetchone()
+        return row[0] if row else None
+
+    def unhold(self, channel_id: int):
+        with self.db:
+            self.db.execute("DELETE FROM ticket_hold WHERE channel_id = ?", (channel_id,))
+        self.holds.pop(channel_id, None)
+
+    # ---------- channel pool -------------------------------------------------
+
+    def pool_add(self, channel_id: int):
+        with self.db:
+            self.db.execute(
+                "INSERT OR IGNORE INTO ticket_pool (channel_id, created) VALUES (?, ?)", (channel_id, time.time())
+            )
+        self.pool.append(channel_id)
+
+    def pool_take(self) -> int | None:
+        """Oldest pool channel, removed from the pool, or None when it is empty."""
+        if not self.pool:
+            return None
+        channel_id = self.pool.pop(0)
+        with self.db:
+            self.db.execute("DELETE FROM ticket_pool WHERE channel_id = ?", (channel_id,))
+        return channel_id
+
+    def pool_discard(self, channel_id: int):
+        if channel_id in self.pool:
+            self.pool.remove(channel_id)
+        with self.db:
+            self.db.execute("DELETE FROM ticket_pool WHERE channel_id = ?", (channel_id,))
+
+
+_store: TicketStore | None = None
+
+
+def get_ticket_store() -> TicketStore:
+    global _store
+    if _store is None:
+        _store = TicketStore(config.TICKETS_DB)
+        _store.load()
+    return _store
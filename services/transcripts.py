@@ -0,0 +1,266 @@
+import asyncio
+import collections
+import datetime
+import gzip
+import html
+import io
+import os
+import tempfile
+
+import discord
+
+import config
+
+# Messages rendered per worker-thread hop; also the most snapshots held at once
+BATCH_SIZE = 200
+# Room left under the guild's upload limit for the rest of the request
+UPLOAD_MARGIN = 64 * 1024
+
+_STYLE = (
+    "body{background:#313338;color:#dbdee1;font-family:sans-serif;font-size:15px;margin:0;padding:16px}"
+    "h1{font-size:20px;margin:0 0 4px}.info{color:#949ba4;margin-bottom:16px}"
+    ".msg{display:flex;gap:12px;padding:6px 0}.avatar{width:40px;height:40px;border-radius:50%}"
+    ".author{font-weight:600;color:#f2f3f5}.bot{background:#5865f2;border-radius:3px;font-size:11px;padding:0 4px;margin-left:4px}"
+    ".time{color:#949ba4;font-size:12px;margin-left:6px}.content{white-space:pre-wrap;word-wrap:break-word}"
+    ".embed{border-left:4px solid #4e5058;background:#2b2d31;padding:6px 10px;margin-top:4px;border-radius:4px}"
+    "img.attachment{max-width:400px;max-height:300px;display:block;margin-top:4px}a{color:#00a8fc}"
+)
+_IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".webp")
+
+
+class TranscriptMessage:
+    """The parts of a message a transcript shows, detached from discord.py objects."""
+
+    __slots__ = (
+        "id", "author_id", "author_name", "avatar_url", "is_bot",
+        "created_at", "edited", "content", "attachments", "embeds",
+    )
+
+    def __init__(self, id: int, author_id: int, author_name: str, avatar_url: str, is_bot: bool,
+                 created_at: float, edited: bool, content: str,
+                 attachments: list[tuple[str, str]], embeds: list[tuple[str, str]]):
+        self.id = id
+        self.author_id = author_id
+        self.author_name = author_name
+        self.avatar_url = avatar_url
+        self.is_bot = is_bot
+        self.created_at = created_at
+        self.edited = edited
+        self.content = content
+        # (filename, url)
+        self.attachments = attachments
+        # (title, description)
+        self.embeds = embeds
+
+    @classmethod
+    def from_message(cls, message: discord.Message) -> "TranscriptMessage":
+        return cls(
+            message.id,
+            message.author.id,
+            message.author.display_name,
+            message.author.display_avatar.url,
+            message.author.bot,
+            message.created_at.timestamp(),
+            message.edited_at is not None,
+            message.content,
+            [(a.filename, a.url) for a in message.attachments],
+            [(e.title or "", e.description or "") for e in message.embeds],
+        )
+
+
+def _render_message(m: TranscriptMessage) -> str:
+    stamp = datetime.datetime.fromtimestamp(m.created_at, datetime.timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
+    parts = [
+        f'<div class="msg" id="m{m.id}"><img class="avatar" src="{html.escape(m.avatar_url)}" alt=""><div>',
+        f'<span class="author">{html.escape(m.author_name)}</span>',
+        '<span class="bot">BOT</span>' if m.is_bot else "",
+        f'<span class="time">{stamp}{" (edited)" if m.edited else ""}</span>',
+    ]
+    if m.content:
+        parts.append(f'<div class="content">{html.escape(m.content)}</div>')
+    for title, description in m.embeds:
+        if title or description:
+            parts.append(
+                f'<div class="embed"><b>{html.escape(title)}</b>'
+                f'<div class="content">{html.escape(description)}</div></div>'
+            )
+    for filename, url in m.attachments:
+        url = html.escape(url)
+        if filename.lower().endswith(_IMAGE_EXTENSIONS):
+            parts.append(f'<a href="{url}"><img class="attachment" src="{url}" alt="{html.escape(filename)}"></a>')
+        else:
+            parts.append(f'<div><a href="{url}">{html.escape(filename)}</a></div>')
+    parts.append("</div></div>\n")
+    return "".join(parts)
+
+
+def _plain_text(m: TranscriptMessage) -> str:
+    lines = [f"{m.author_name}: {m.content}"] if m.content else []
+    lines.extend(f"{title} {description}".strip() for title, description in m.embeds if title or description)
+    lines.extend(filename for filename, _ in m.attachments)
+    return "".join(line + "\n" for line in lines)
+
+
+class TranscriptWriter:
+    """
+    Writes a channel transcript as gzip-compressed HTML into a temp file.
+
+    Messages are added oldest first as snapshots and rendered in batches of
+    BATCH_SIZE in a worker thread, so the event loop never renders and
+    memory doesn't grow with the length of the channel. Per-author message
+    counts are kept along the way, and a plain-text copy is written next to
+    it for the search archive (see take_text()).
+    """
+
+    def __init__(self, title: str):
+        self.title = title
+        fd, self.path = tempfile.mkstemp(prefix="transcript-", suffix=".html.gz")
+        os.close(fd)
+        fd, self.text_path = tempfile.mkstemp(prefix="transcript-", suffix=".txt")
+        os.close(fd)
+        self._out = None
+        self._text = None
+        self._pending: list[TranscriptMessage] = []
+        self.counts: collections.Counter[int] = collections.Counter()
+        self.message_count = 0
+
+    def _write(self, batch: list[TranscriptMessage], last: bool):
+        if self._out is None:
+            self._out = gzip.open(self.path, "wt", encoding="utf-8")
+            self._text = open(self.text_path, "w", encoding="utf-8")
+            self._out.write(
+                f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>{html.escape(self.title)}</title>'
+                f'<style>{_STYLE}</style></head><body><h1>{html.escape(self.title)}</h1>\n'
+            )
+        for m in batch:
+            self._out.write(_render_message(m))
+            self._text.write(_plain_text(m))
+        if last:
+            self._out.write(f'<div class="info">{self.message_count} messages</div></body></html>\n')
+            self._out.close()
+            self._text.close()
+
+    async def add(self, message: TranscriptMessage):
+        self._pending.append(message)
+        self.counts[message.author_id] += 1
+        self.message_count += 1
+        if len(self._pending) >= BATCH_SIZE:
+            batch, self._pending = self._pending, []
+            await asyncio.to_thread(self._write, batch, False)
+
+    def render_all(self, messages):
+        """Blocking: render every message from an iterable and close the file. For worker threads."""
+        batch = []
+        for message in messages:
+            batch.append(message)
+            self.counts[message.author_id] += 1
+            self.message_count += 1
+            if len(batch) >= BATCH_SIZE:
+                self._write(batch, False)
+                batch = []
+        self._write(batch, True)
+
+    async def finish(self) -> str:
+        """Render what's left, close the file and return its path."""
+        batch, self._pending = self._pending, []
+        await asyncio.to_thread(self._write, batch, True)
+        return self.path
+
+    def file(self, filename: str) -> discord.File:
+        return discord.File(self.path, filename=filename)
+
+    def size(self) -> int:
+        return os.path.getsize(self.path)
+
+    def read_part(self, offset: int, length: int) -> bytes:
+        """Blocking: `length` bytes of the compressed transcript from `offset`."""
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return f.read(length)
+
+    def take_text(self) -> str | None:
+        """Hand the plain-text copy over to the caller, who then owns (and removes) the file."""
+        path, self.text_path = self.text_path, None
+        return path
+
+    def discard(self):
+        for f in (self._out, self._text):
+            if f is not None and not f.closed:
+                f.close()
+        for path in (self.path, self.text_path):
+            if path is None:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def user_breakdown(counts: collections.Counter[int]) -> str:
+    """`<@id> - N messages` per author, busiest first."""
+    return "\n".join(f"<@{uid}> - {count} messages" for uid, count in counts.most_common())
+
+
+async def export_channel(channel: discord.TextChannel) -> TranscriptWriter:
+    """
+    Transcript of the whole channel from a single history pass. The caller
+    uploads writer.file(...) and must call writer.discard() afterwards.
+    """
+    writer = TranscriptWriter(f"#{channel.name}")
+    try:
+        async for message in channel.history(limit=None, oldest_first=True):
+            await writer.add(TranscriptMessage.from_message(message))
+        await writer.finish()
+    except BaseException:
+        writer.discard()
+        raise
+    return writer
+
+
+async def send_transcript(
+    destination: discord.abc.Messageable, embed: discord.Embed, transcript: TranscriptWriter, filename: str,
+    limit: int
+) -> int:
+    """
+    Post `embed` with the transcript attached; returns the number of files posted.
+
+    A transcript over `limit` bytes is split into byte ranges posted one per
+    message (`<filename>.part1`, `.part2`, ...), which concatenated in order
+    give back the .html.gz. Raises if any part fails to post, so callers
+    keep the ticket channel instead of losing its history.
+    """
+    size = transcript.size()
+    if size <= limit:
+        await destination.send(embed=embed, file=transcript.file(filename))
+        return 1
+    part_size = max(limit - UPLOAD_MARGIN, limit // 2)
+    count = -(-size // part_size)
+    width = len(str(count))
+    for i in range(count):
+        data = await asyncio.to_thread(transcript.read_part, i * part_size, part_size)
+        content = f"Transcript part {i + 1}/{count}"
+        if i == 0:
+            content += f" (too large for one upload; join the parts in order: `cat {filename}.part* > {filename}`)"
+        await destination.send(
+            content,
+            embed=embed if i == 0 else None,
+            file=discord.File(io.BytesIO(data), filename=f"{filename}.part{i + 1:0{width}d}"),
+        )
+    return count
+
+
+def transcript_embed(
+    name: str, category: str, users_label: str, users_value: str, created_epoch: int, closed_epoch: int
+) -> discord.Embed:
+    """The summary posted with a closed ticket's transcript."""
+    embed = discord.Embed(
+        title="Ticket Transcript",
+        description="Below are the details of the closed ticket:",
+        color=config.EMBED_COLOR
+    )
+    embed.add_field(name="Ticket Name", value=name, inline=True)
+    embed.add_field(name="Ticket Category", value=category, inline=True)
+    embed.add_field(name=users_label, value=users_value, inline=False)
+    embed.add_field(name="Ticket Created at", value=f"<t:{created_epoch}:F>", inline=False)
+    embed.add_field(name="Ticket Closed at", value=f"<t:{closed_epoch}:F>", inline=False)
+    return embed
@@ -0,0 +1,190 @@
+import asyncio
+import datetime
+import logging
+import sqlite3
+
+import config
+from services.gemini import estimate_text_tokens, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+
+class QuotaExceeded(Exception):
+    """The user has spent their daily AI token quota."""
+
+
+def _today() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%d")
+
+
+class UsageLedger:
+    """
+    Per-user, per-day Gemini token totals.
+
+    Totals live in memory so quota checks never touch the database; changed
+    rows are written behind every AI_USAGE_FLUSH_SECONDS by a task started
+    with start(), through a writer connection of their own in a worker
+    thread. Rows are stored as absolute totals, so a batch can be retried
+    safely. Reads such as top() use the main connection on the event loop.
+    """
+
+    def __init__(self, db_path: str):
+        self.db = sqlite3.connect(db_path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        with self.db:
+            self.db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS usage (
+                    user_id       INTEGER,
+                    day           TEXT,
+                    prompt_tokens INTEGER DEFAULT 0,
+                    output_tokens INTEGER DEFAULT 0,
+                    calls         INTEGER DEFAULT 0,
+                    PRIMARY KEY (user_id, day)
+                )
+                """
+            )
+            self.db.execute("CREATE INDEX IF NOT EXISTS idx_usage_day ON usage(day)")
+        # (user_id, day) -> [prompt_tokens, output_tokens, calls]
+        self._totals: dict[tuple[int, str], list[int]] = {}
+        self._dirty: set[tuple[int, str]] = set()
+        self._day = _today()
+        for user_id, prompt, output, calls in self.db.execute(
+            "SELECT user_id, prompt_tokens, output_tokens, calls FROM usage WHERE day = ?", (self._day,)
+        ):
+            self._totals[(user_id, self._day)] = [prompt, output, calls]
+        self._writer = sqlite3.connect(db_path, check_same_thread=False)
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: asyncio.Task | None = None
+
+    def _roll_day(self):
+        today = _today()
+        if today != self._day:
+            # Yesterday's totals only need to stay until they are written
+            self._totals = {k: v for k, v in self._totals.items() if k[1] == today or k in self._dirty}
+            self._day = today
+
+    def used_today(self, user_id: int) -> int:
+        self._roll_day()
+        prompt, output, _ = self._totals.get((user_id, self._day), (0, 0, 0))
+        return prompt + output
+
+    def check(self, user_id: int):
+        """Raise QuotaExceeded if the user is over today's quota. Memory only."""
+        if not config.AI_DAILY_TOKEN_QUOTA or user_id in config.AI_QUOTA_EXEMPT_USER_IDS:
+            return
+        if self.used_today(user_id) >= config.AI_DAILY_TOKEN_QUOTA:
+            raise QuotaExceeded(user_id)
+
+    def record(self, user_id: int, prompt_tokens: int, output_tokens: int):
+        self._roll_day()
+        key = (user_id, self._day)
+        totals = self._totals.setdefault(key, [0, 0, 0])
+        totals[0] += prompt_tokens
+        totals[1] += output_tokens
+        totals[2] += 1
+        self._dirty.add(key)
+
+    def drain(self) -> list[tuple]:
+        """Rows changed since the last drain, as (user_id, day, prompt, output, calls)."""
+        rows = [(user_id, day, *self._totals[(user_id, day)]) for user_id, day in self._dirty]
+        self._dirty.clear()
+        return rows
+
+    def write(self, rows: list[tuple]):
+        """Blocking: upsert drained rows through the writer connection."""
+        with self._writer:
+            self._writer.executemany(
+                """
+                INSERT INTO usage (user_id, day, prompt_tokens, output_tokens, calls) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(user_id, day) DO UPDATE SET
+                    prompt_tokens = excluded.prompt_tokens,
+                    output_tokens = excluded.output_tokens,
+                    calls         = excluded.calls
+                """,
+                rows
+            )
+
+    def requeue(self, rows: list[tuple]):
+        """Mark rows from a failed write as dirty again."""
+        for user_id, day, *totals in rows:
+            # The day may have rolled over and dropped the in-memory copy
+            self._totals.setdefault((user_id, day), totals)
+            self._dirty.add((user_id, day))
+
+    async def flush(self):
+        async with self._flush_lock:
+            rows = self.drain()
+            if not rows:
+                return
+            try:
+                await asyncio.to_thread(self.write, rows)
+            except sqlite3.Error as e:
+                logger.error(f"Failed to write AI usage for {len(rows)} users: {e}")
+                self.requeue(rows)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(config.AI_USAGE_FLUSH_SECONDS)
+            await self.flush()
+
+    def start(self):
+        """Start writing totals behind; independent of which cogs are loaded."""
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    async def close(self):
+        """Stop the flush task and write out anything still pending."""
+        # Holding the lock waits out a flush that is mid-write, so the writer
+        # connection is never used from two threads; the task is then only
+        # sleeping or waiting for the lock, and safe to cancel
+        async with self._flush_lock:
+            if self._flush_task is not None:
+                self._flush_task.cancel()
+            rows = self.drain()
+            if rows:
+                await asyncio.to_thread(self.write, rows)
+            self._writer.close()
+            self.db.close()
+
+    def top(self, days: int = 1, limit: int = 10) -> list[tuple[int, int, int, int]]:
+        """Heaviest users over the last `days` days: (user_id, prompt, output, calls). Reads the DB."""
+        since = (datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=days - 1)).strftime("%Y-%m-%d")
+        return self.db.execute(
+            """
+            SELECT user_id, SUM(prompt_tokens), SUM(output_tokens), SUM(calls)
+            FROM usage WHERE day >= ?
+            GROUP BY user_id
+            ORDER BY SUM(prompt_tokens) + SUM(output_tokens) DESC
+            LIMIT ?
+            """,
+            (since, limit)
+        ).fetchall()
+
+
+def usage_counts(usage: dict, payload: dict, reply: str) -> tuple[int, int]:
+    """(prompt, output) tokens from usageMetadata, estimated when the API didn't send it."""
+    prompt = usage.get("promptTokenCount")
+    if prompt is None:
+        max_output = payload.get("generationConfig", {}).get("maxOutputTokens", 0)
+        prompt = estimate_tokens(payload) - max_output
+    output = usage.get("candidatesTokenCount")
+    if output is None:
+        output = estimate_text_tokens(reply) if reply else 0
+    return prompt, output
+
+
+_ledger: UsageLedger | None = None
+
+
+def get_usage_ledger() -> UsageLedger:
+    global _ledger
+    if _ledger is None:
+        _ledger = UsageLedger(config.AI_USAGE_DB)
+    return _ledger
+
+
+async def close_usage_ledger():
+    """Write out anything still pending; called on shutdown."""
+    if _ledger is not None:
+        await _ledger.close()
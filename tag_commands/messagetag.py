@@ -3,6 +3,8 @@ from discord.ext import commands
 import sqlite3
 import os
 from config import TAG_PERMISSIONS
+from services.tag_index import get_tag_index
+from services.tag_files import get_tag_file_cache, send_tag_file
 
 class MessageTags(commands.Cog):
     def __init__(self, bot: commands.Bot):
@@ -58,7 +60,7 @@ class MessageTags(commands.Cog):
                         ref_msg = await ctx.channel.fetch_message(ctx.message.reference.message_id)
                         # Reply with text and/or file
                         if file_path:
-                            await ref_msg.reply(tag_message or "", file=discord.File(file_path), mention_author=False)
+                            await send_tag_file(ref_msg.reply, tag_name, tag_message, file_path, mention_author=False)
                         else:
                             await ref_msg.reply(tag_message, mention_author=False)
                     except Exception as e:
@@ -66,7 +68,7 @@ class MessageTags(commands.Cog):
                 else:
                     # Send in channel
                     if file_path:
-                        await ctx.send(content=tag_message or "", file=discord.File(file_path))
+                        await send_tag_file(ctx.send, tag_name, tag_message, file_path)
                     else:
                         await ctx.send(tag_message)
             else:
@@ -96,6 +98,8 @@ class MessageTags(commands.Cog):
             (tag_name, message, file_path_to_store)
         )
         self.db.commit()
+        get_tag_index().put(tag_name, message, file_path_to_store)
+        get_tag_file_cache().invalidate(tag_name)
         await ctx.send(f"Tag '{tag_name}' saved.")
 
 
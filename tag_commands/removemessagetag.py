@@ -3,6 +3,8 @@ from discord.ext import commands
 import sqlite3
 import os
 from config import TAG_PERMISSIONS  # List of allowed role IDs
+from services.tag_index import get_tag_index
+from services.tag_files import get_tag_file_cache
 
 class RemoveTag(commands.Cog):
     def __init__(self, bot: commands.Bot):
@@ -38,6 +40,8 @@ class RemoveTag(commands.Cog):
             # Remove the tag entry from the database
             self.cursor.execute("DELETE FROM tags WHERE tag = ?", (tag_name,))
             self.db.commit()
+            get_tag_index().remove(tag_name)
+            get_tag_file_cache().invalidate(tag_name)
             await ctx.send(f"Tag '{tag_name}' has been removed.")
         else:
             await ctx.send(f"Tag '{tag_name}' not found.")
@@ -5,6 +5,8 @@ from discord.ext import commands
 import sqlite3
 import os
 from config import TAG_PERMISSIONS  # List of allowed role IDs
+from services.tag_index import get_tag_index
+from services.tag_files import get_tag_file_cache
 
 class RenameTag(commands.Cog):
     def __init__(self, bot: commands.Bot):
@@ -67,6 +69,8 @@ class RenameTag(commands.Cog):
                 (new_name, old_name)
             )
         self.db.commit()
+        get_tag_index().rename(old_name, new_name, new_file_path)
+        get_tag_file_cache().invalidate(old_name)
         await ctx.send(f"Tag '{old_name}' has been renamed to '{new_name}'.")
 
 async def setup(bot: commands.Bot):
@@ -1,6 +1,7 @@
 import discord
 from discord.ext import commands
 import config
+from services.overwrites import apply_overwrites, copy_overwrites
 
 class TicketAdd(commands.Cog):
     def __init__(self, bot):
@@ -16,13 +17,14 @@ class TicketAdd(commands.Cog):
         """
         if not ctx.channel.category or ctx.channel.category.id not in config.TICKET_CATEGORY_IDS:
             return
+        overwrites = copy_overwrites(ctx.channel)
+        overwrites[member] = discord.PermissionOverwrite(
+            view_channel=True,
+            send_messages=True,
+            attach_files=True
+        )
         try:
-            await ctx.channel.set_permissions(
-                member,
-                view_channel=True,
-                send_messages=True,
-                attach_files=True
-            )
+            await apply_overwrites(ctx.channel, overwrites, reason=f"Added to ticket by {ctx.author}")
             embed = discord.Embed(
                 title="User Added",
                 description=f"{member.mention} has been added to this ticket.",
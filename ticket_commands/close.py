@@ -1,12 +1,12 @@
 import discord
 from discord.ext import commands
 import config
-import sqlite3
-import io
 import logging
-import chat_exporter
 from datetime import datetime
-import asyncio
+from services.ticket_archive import get_ticket_archive
+from services.ticket_mirror import get_ticket_mirror
+from services.tickets import Ticket, get_ticket_store
+from services.transcripts import TranscriptWriter, send_transcript, transcript_embed, user_breakdown
 
 logger = logging.getLogger(__name__)
 
@@ -25,115 +25,88 @@ class DeveloperTicketCommands(commands.Cog):
         if not ctx.channel.category:
             await ctx.send("This channel is not recognized as a ticket channel.")
             return
-        if ctx.channel.category.id == config.DEV_SUPPORT_CATEGORY_ID:
-            db_path = "dev_tickets.db"
-            transcript_channel_id = config.DEV_SUPPORT_TRANSCRIPT_CHANNEL_ID
-        elif ctx.channel.category.id == config.API_CATEGORY_ID:
-            db_path = "api_tickets.db"
-            transcript_channel_id = config.API_TRANSCRIPT_CHANNEL_ID
-        else:
+        transcript_channel_id = self.transcript_channel_for(ctx.channel)
+        if transcript_channel_id is None:
             await ctx.send("This channel is not recognized as a valid ticket channel.")
             return
-        try:
-            conn = sqlite3.connect("tickethold.db")
-            c = conn.cursor()
-            c.execute("SELECT channel_id FROM ticket_hold WHERE channel_id = ?", (ctx.channel.id,))
-            if c.fetchone():
-                await ctx.send("This ticket is currently on hold. Please unhold before closing.")
-                conn.close()
-                return
-            conn.close()
-        except Exception as e:
-            logger.error(f"Error checking ticket hold status for channel {ctx.channel.id}: {e}")
-            await ctx.send("Error checking ticket hold status.")
+        store = get_ticket_store()
+        if store.is_held(ctx.channel.id):
+            await ctx.send("This ticket is currently on hold. Please unhold before closing.")
             return
-        try:
-            transcript = await chat_exporter.export(ctx.channel)
-            transcript_file = discord.File(io.StringIO(transcript), filename=f"transcript-{ctx.channel.id}.html")
-        except Exception as e:
-            logger.error(f"Error generating transcript for channel {ctx.channel.id}: {e}")
-            await ctx.send("Failed to generate transcript.")
+        ticket = store.get(ctx.channel.id)
+        if ticket is None:
+            await ctx.send("No ticket owner found. This ticket may have already been closed or not properly registered.")
             return
-        try:
-            messages = [msg async for msg in ctx.channel.history(limit=None)]
-            user_message_counts = {}
-            for msg in messages:
-                user_message_counts[msg.author.id] = user_message_counts.get(msg.author.id, 0) + 1
-            user_message_breakdown = "\n".join(f"<@{uid}> - {count} messages" for uid, count in user_message_counts.items())
-        except Exception as e:
-            logger.error(f"Error processing messages in channel {ctx.channel.id}: {e}")
-            user_message_breakdown = "N/A"
+        error = await self.close_channel(ctx.channel, ticket, transcript_channel_id)
+        if error:
+            await ctx.send(error)
 
-        ticket_created_epoch = 0
-        try:
-            conn = sqlite3.connect(db_path)
-            c = conn.cursor()
-            c.execute("SELECT created FROM tickets WHERE channel_id = ?", (ctx.channel.id,))
-            result = c.fetchone()
-            if result:
-                ticket_created_str = result[0]
-                ticket_created_dt = datetime.fromisoformat(ticket_created_str)
-                ticket_created_epoch = int(ticket_created_dt.timestamp())
-            conn.close()
-        except Exception as e:
-            logger.error(f"Error fetching ticket creation time for channel {ctx.channel.id}: {e}")
+    def transcript_channel_for(self, channel: discord.TextChannel) -> int | None:
+        if channel.category_id == config.DEV_SUPPORT_CATEGORY_ID:
+            return config.DEV_SUPPORT_TRANSCRIPT_CHANNEL_ID
+        elif channel.category_id == config.API_CATEGORY_ID:
+            return config.API_TRANSCRIPT_CHANNEL_ID
+        return None
 
-        ticket_closed_epoch = int(datetime.utcnow().timestamp())
-        ticket_owner_id = None
+    async def close_channel(
+        self, channel: discord.TextChannel, ticket: Ticket, transcript_channel_id: int, footer: str | None = None
+    ) -> str | None:
+        """
+        Post the ticket's transcript, forget the ticket and delete its channel.
+        Shared by !close and the inactivity sweep; returns an error message if the ticket stays open.
+        """
         try:
-            conn = sqlite3.connect(db_path)
-            c = conn.cursor()
-            c.execute("SELECT user_id FROM tickets WHERE channel_id = ?", (ctx.channel.id,))
-            result = c.fetchone()
-            if result:
-                ticket_owner_id = result[0]
-            conn.close()
+            # From the local mirror; one history pass feeds transcript and counts otherwise
+            transcript = await get_ticket_mirror().export(channel)
         except Exception as e:
-            logger.error(f"Error fetching ticket owner for channel {ctx.channel.id}: {e}")
-
-        if ticket_owner_id is None:
-            await ctx.send("No ticket owner found. This ticket may have already been closed or not properly registered.")
-            return
+            logger.error(f"Error generating transcript for channel {channel.id}: {e}")
+            return "Failed to generate transcript."
+        try:
+            return await self._post_transcript(channel, ticket, transcript, transcript_channel_id, footer)
+        finally:
+            transcript.discard()
 
-        ticket_owner_mention = f"<@{ticket_owner_id}>"
-        ticket_name = ctx.channel.name
-        ticket_category = ctx.channel.category.name if ctx.channel.category else "None"
-        embed_transcript = discord.Embed(
-            title="Ticket Transcript",
-            description="Below are the details of the closed ticket:",
-            color=config.EMBED_COLOR
-        )
-        embed_transcript.add_field(name="Ticket Name", value=ticket_name, inline=True)
-        embed_transcript.add_field(name="Ticket Category", value=ticket_category, inline=True)
-        embed_transcript.add_field(
-            name="Users Involved",
-            value=user_message_breakdown,
-            inline=False
+    async def _post_transcript(
+        self, channel: discord.TextChannel, ticket: Ticket, transcript: TranscriptWriter,
+        transcript_channel_id: int, footer: str | None
+    ) -> str | None:
+        user_message_breakdown = user_breakdown(transcript.counts) or "N/A"
+        ticket_created_epoch = ticket.created_epoch()
+        ticket_closed_epoch = int(datetime.utcnow().timestamp())
+        ticket_name = channel.name
+        ticket_category = channel.category.name if channel.category else "None"
+        embed_transcript = transcript_embed(
+            ticket_name, ticket_category, "Users Involved", user_message_breakdown,
+            ticket_created_epoch, ticket_closed_epoch
         )
-        embed_transcript.add_field(name="Ticket Created at", value=f"<t:{ticket_created_epoch}:F>", inline=False)
-        embed_transcript.add_field(name="Ticket Closed at", value=f"<t:{ticket_closed_epoch}:F>", inline=False)
+        if footer:
+            embed_transcript.set_footer(text=footer)
 
-        transcript_channel = ctx.guild.get_channel(transcript_channel_id)
+        transcript_channel = channel.guild.get_channel(transcript_channel_id)
         if transcript_channel:
-            await transcript_channel.send(embed=embed_transcript, file=transcript_file)
+            try:
+                await send_transcript(
+                    transcript_channel, embed_transcript, transcript, f"transcript-{channel.id}.html.gz",
+                    channel.guild.filesize_limit
+                )
+            except discord.HTTPException as e:
+                logger.error(f"Failed to post the transcript for channel {channel.id}: {e}")
+                return "Failed to post the transcript; the ticket was left open."
         else:
             logger.error("Transcript channel not found in guild.")
-            await ctx.send("Transcript channel not found.")
-            return
+            return "Transcript channel not found."
 
         try:
-            conn = sqlite3.connect(db_path)
-            c = conn.cursor()
-            c.execute("DELETE FROM tickets WHERE channel_id = ?", (ctx.channel.id,))
-            conn.commit()
-            conn.close()
+            get_ticket_store().remove(channel.id)
+            get_ticket_mirror().forget(channel.id)
+            get_ticket_archive().enqueue(ticket, ticket_name, ticket_category, transcript)
         except Exception as e:
-            logger.error(f"Error deleting ticket data for channel {ctx.channel.id}: {e}")
-            await ctx.send("Failed to remove ticket data from the database.")
-            return
+            logger.error(f"Error deleting ticket data for channel {channel.id}: {e}")
+            return "Failed to remove ticket data from the database."
 
-        await ctx.send("Ticket closed successfully.")
-        await ctx.channel.delete()
+        await channel.send("Ticket closed successfully.")
+        await channel.delete()
+        return None
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(DeveloperTicketCommands(bot))
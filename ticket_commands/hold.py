@@ -1,8 +1,8 @@
 import discord
 from discord.ext import commands
 import config
-import sqlite3
-from datetime import datetime
+from services.overwrites import apply_overwrites, copy_overwrites, dump_member_overwrites
+from services.tickets import get_ticket_store
 
 class TicketHold(commands.Cog):
     def __init__(self, bot):
@@ -12,41 +12,41 @@ class TicketHold(commands.Cog):
     async def hold_ticket(self, ctx):
         """
         Puts the ticket on hold by removing the ability to send messages for all added users (not roles).
-        Logs the hold event in tickethold.db with the channel ID and timestamp.
+        The users' previous overwrites are recorded with the hold in the ticket store, so !unhold restores them exactly.
         This command only works if executed in a channel whose category ID is in config.TICKET_CATEGORY_IDS.
         """
         if not ctx.channel.category or ctx.channel.category.id not in config.TICKET_CATEGORY_IDS:
             return
 
+        store = get_ticket_store()
+        if store.is_held(ctx.channel.id):
+            embed = discord.Embed(
+                title="Ticket On Hold",
+                description="This ticket is already on hold.",
+                color=config.EMBED_COLOR
+            )
+            await ctx.send(embed=embed)
+            return
+
+        overwrites = copy_overwrites(ctx.channel)
+        previous = dump_member_overwrites(overwrites)
         count = 0
-        for target, overwrite in ctx.channel.overwrites.items():
+        for target, overwrite in overwrites.items():
             if isinstance(target, discord.Member):
-                new_overwrite = overwrite
-                new_overwrite.send_messages = False
-                try:
-                    await ctx.channel.set_permissions(target, overwrite=new_overwrite)
-                    count += 1
-                except Exception as e:
-                    embed = discord.Embed(
-                        title="Error",
-                        description=f"Failed to update permissions for {target.mention}: {e}",
-                        color=config.EMBED_COLOR
-                    )
-                    await ctx.send(embed=embed)
-                    continue
+                overwrite.send_messages = False
+                count += 1
+        try:
+            await apply_overwrites(ctx.channel, overwrites, reason=f"Ticket put on hold by {ctx.author}")
+        except Exception as e:
+            embed = discord.Embed(
+                title="Error",
+                description=f"Failed to update permissions: {e}",
+                color=config.EMBED_COLOR
+            )
+            await ctx.send(embed=embed)
+            return
         try:
-            conn = sqlite3.connect("tickethold.db")
-            c = conn.cursor()
-            c.execute("""
-                CREATE TABLE IF NOT EXISTS ticket_hold (
-                    channel_id INTEGER PRIMARY KEY,
-                    hold_time TEXT
-                )
-            """)
-            c.execute("INSERT OR REPLACE INTO ticket_hold (channel_id, hold_time) VALUES (?, ?)",
-                      (ctx.channel.id, datetime.utcnow().isoformat()))
-            conn.commit()
-            conn.close()
+            store.hold(ctx.channel.id, previous)
         except Exception as e:
             embed = discord.Embed(
                 title="Database Error",
@@ -64,4 +64,4 @@ class TicketHold(commands.Cog):
         await ctx.send(embed=embed)
 
 async def setup(bot):
-    await bot.add_cog(TicketHold(bot))
\ No newline at end of file
+    await bot.add_cog(TicketHold(bot))
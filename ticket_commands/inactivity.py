@@ -0,0 +1,107 @@
+import discord
+from discord.ext import commands, tasks
+import config
+import logging
+import time
+from services.tickets import get_ticket_store
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL_SECONDS = 60
+
+class TicketInactivity(commands.Cog):
+    """
+    Tracks the last member message in every open ticket and periodically reminds the owners of stale tickets.
+    A ticket goes stale after config.TICKET_REMIND_AFTER_HOURS without messages (0 disables the sweep).
+    If config.TICKET_AUTO_CLOSE_AFTER_HOURS is set, a ticket still silent that long after its reminder is closed.
+    The sweep reads the stale tickets from the ticket store's last_activity index; it never reads channel history.
+    """
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.store = get_ticket_store()
+        self.flush_loop.start()
+        self.sweep_loop.start()
+
+    async def cog_unload(self):
+        self.flush_loop.cancel()
+        self.sweep_loop.cancel()
+        self.store.flush_activity()
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        if message.guild and not message.author.bot:
+            self.store.touch(message.channel.id, message.created_at.timestamp())
+
+    @tasks.loop(seconds=FLUSH_INTERVAL_SECONDS)
+    async def flush_loop(self):
+        self.store.flush_activity()
+
+    @tasks.loop(minutes=config.TICKET_INACTIVITY_SWEEP_MINUTES)
+    async def sweep_loop(self):
+        if config.TICKET_REMIND_AFTER_HOURS <= 0:
+            return
+        try:
+            await self.sweep()
+        except Exception as e:
+            logger.error(f"Error during ticket inactivity sweep: {e}")
+
+    @sweep_loop.before_loop
+    async def before_sweep(self):
+        await self.bot.wait_until_ready()
+
+    async def sweep(self):
+        now = time.time()
+        close_after = config.TICKET_AUTO_CLOSE_AFTER_HOURS * 3600
+        self.store.flush_activity()
+        reminded = closed = 0
+        for ticket in self.store.inactive_since(now - config.TICKET_REMIND_AFTER_HOURS * 3600):
+            if self.store.is_held(ticket.channel_id):
+                continue
+            channel = self.bot.get_channel(ticket.channel_id)
+            if not isinstance(channel, discord.TextChannel):
+                continue
+            if ticket.reminded_at is None or ticket.reminded_at < ticket.last_activity:
+                await self._remind(channel, ticket.user_id, now)
+                reminded += 1
+            elif close_after > 0 and now - ticket.reminded_at >= close_after:
+                if await self._close(channel, ticket):
+                    closed += 1
+        if reminded or closed:
+            logger.info(f"Ticket inactivity sweep: {reminded} reminded, {closed} closed")
+
+    async def _remind(self, channel: discord.TextChannel, ticket_owner_id: int, now: float):
+        remind_cog = self.bot.get_cog("RemindTicket")
+        if remind_cog is not None:
+            await remind_cog.send_reminder(channel.guild.id, channel.id, ticket_owner_id)
+        # Recorded even if the DM failed (closed DMs), so the ticket isn't retried every sweep
+        self.store.mark_reminded(channel.id, now)
+        description = f"<@{ticket_owner_id}>, this ticket has had no activity for a while."
+        if config.TICKET_AUTO_CLOSE_AFTER_HOURS > 0:
+            description += (
+                f" It will be closed automatically if there is no reply within "
+                f"{config.TICKET_AUTO_CLOSE_AFTER_HOURS} hours."
+            )
+        embed = discord.Embed(title="Ticket Reminder", description=description, color=config.EMBED_COLOR)
+        try:
+            await channel.send(embed=embed)
+        except discord.HTTPException as e:
+            logger.error(f"Error posting inactivity notice in channel {channel.id}: {e}")
+
+    async def _close(self, channel: discord.TextChannel, ticket) -> bool:
+        close_cog = self.bot.get_cog("DeveloperTicketCommands")
+        if close_cog is None:
+            return False
+        transcript_channel_id = close_cog.transcript_channel_for(channel)
+        if transcript_channel_id is None:
+            return False
+        error = await close_cog.close_channel(
+            channel, ticket, transcript_channel_id, footer="Closed automatically after inactivity."
+        )
+        if error:
+            logger.error(f"Could not auto-close inactive ticket {channel.id}: {error}")
+            return False
+        return True
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(TicketInactivity(bot))
@@ -1,8 +1,9 @@
 import discord
 from discord.ext import commands
 import config
-import sqlite3
 import logging
+import time
+from services.tickets import get_ticket_store
 
 logger = logging.getLogger(__name__)
 
@@ -15,7 +16,7 @@ class RemindTicket(commands.Cog):
         await ctx.message.delete()
 
         """
-        Check the current channel's ID in both API and DEV ticket databases for a ticket owner.
+        Look up the ticket owner of the current channel in the ticket store.
         If a ticket is found, DM that user a reminder that their ticket is still open in r/thelumen.
         Only executable by members with the developer role (config.DEVELOPER_ROLE_ID).
         """
@@ -23,36 +24,17 @@ class RemindTicket(commands.Cog):
             await ctx.send("You do not have permission to use this command.", delete_after=5)
             return
 
-        channel_id = ctx.channel.id
-        ticket_owner_id = None
-
-        try:
-            conn = sqlite3.connect("api_tickets.db")
-            c = conn.cursor()
-            c.execute("SELECT user_id FROM tickets WHERE channel_id = ?", (channel_id,))
-            result = c.fetchone()
-            conn.close()
-            if result:
-                ticket_owner_id = result[0]
-        except Exception as e:
-            logger.error(f"Error checking API tickets for channel {channel_id}: {e}")
-
-        if ticket_owner_id is None:
-            try:
-                conn = sqlite3.connect("dev_tickets.db")
-                c = conn.cursor()
-                c.execute("SELECT user_id FROM tickets WHERE channel_id = ?", (channel_id,))
-                result = c.fetchone()
-                conn.close()
-                if result:
-                    ticket_owner_id = result[0]
-            except Exception as e:
-                logger.error(f"Error checking DEV tickets for channel {channel_id}: {e}")
-
-        if ticket_owner_id is None:
+        ticket = get_ticket_store().get(ctx.channel.id)
+        if ticket is None:
             await ctx.send("No open ticket found for this channel.", delete_after=5)
             return
+        if await self.send_reminder(ctx.guild.id, ctx.channel.id, ticket.user_id):
+            await ctx.send("Reminder sent successfully.", delete_after=5)
+        else:
+            await ctx.send("Failed to send the reminder DM.", delete_after=5)
 
+    async def send_reminder(self, guild_id: int, channel_id: int, ticket_owner_id: int) -> bool:
+        """DM the ticket owner a reminder and record it in the ticket store. Also used by the inactivity sweep."""
         embed = discord.Embed(
             title="Ticket Reminder",
             description=(
@@ -63,7 +45,7 @@ class RemindTicket(commands.Cog):
         )
 
         view = discord.ui.View()
-        view_ticket_url = f"https://discord.com/channels/{ctx.guild.id}/{ctx.channel.id}"
+        view_ticket_url = f"https://discord.com/channels/{guild_id}/{channel_id}"
         button_view_ticket = discord.ui.Button(
             label="View Ticket",
             style=discord.ButtonStyle.link,
@@ -81,12 +63,13 @@ class RemindTicket(commands.Cog):
         view.add_item(button_rthelumen)
 
         try:
-            ticket_owner = await self.bot.fetch_user(ticket_owner_id)
+            ticket_owner = self.bot.get_user(ticket_owner_id) or await self.bot.fetch_user(ticket_owner_id)
             await ticket_owner.send(embed=embed, view=view)
-            await ctx.send("Reminder sent successfully.", delete_after=5)
         except Exception as e:
             logger.error(f"Error sending reminder DM to user {ticket_owner_id}: {e}")
-            await ctx.send("Failed to send the reminder DM.", delete_after=5)
+            return False
+        get_ticket_store().mark_reminded(channel_id, time.time())
+        return True
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(RemindTicket(bot))
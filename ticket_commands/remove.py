@@ -1,6 +1,7 @@
 import discord
 from discord.ext import commands
 import config
+from services.overwrites import apply_overwrites, copy_overwrites
 
 class TicketRemove(commands.Cog):
     def __init__(self, bot):
@@ -16,8 +17,10 @@ class TicketRemove(commands.Cog):
         """
         if not ctx.channel.category or ctx.channel.category.id not in config.TICKET_CATEGORY_IDS:
             return  
+        overwrites = copy_overwrites(ctx.channel)
+        overwrites.pop(member, None)
         try:
-            await ctx.channel.set_permissions(member, overwrite=None)
+            await apply_overwrites(ctx.channel, overwrites, reason=f"Removed from ticket by {ctx.author}")
             embed = discord.Embed(
                 title="User Removed",
                 description=f"{member.mention} has been removed from this ticket.",
@@ -1,10 +1,10 @@
 import discord
 from discord.ext import commands
 import config
-import sqlite3
-from datetime import datetime
 import re
 import logging
+from services.ticket_pool import get_ticket_pool
+from services.tickets import get_ticket_store
 
 logger = logging.getLogger(__name__)
 
@@ -29,27 +29,18 @@ class TicketPanelView(discord.ui.View):
         ticket_type = select.values[0]
         if ticket_type == "api":
             category_id = config.API_CATEGORY_ID
-            db_file = "api_tickets.db"
         elif ticket_type == "dev":
             category_id = config.DEV_SUPPORT_CATEGORY_ID
-            db_file = "dev_tickets.db"
         else:
             await interaction.edit_original_response(content="Invalid selection.")
             return
-        try:
-            conn = sqlite3.connect(db_file)
-            c = conn.cursor()
-            c.execute("SELECT channel_id FROM tickets WHERE user_id = ?", (interaction.user.id,))
-            rows = c.fetchall()
-            conn.close()
-            for (channel_id,) in rows:
-                if interaction.guild.get_channel(channel_id) is not None:
-                    await interaction.edit_original_response(
-                        content="You already have an open ticket for this type. Please close it before opening a new one."
-                    )
-                    return
-        except Exception as e:
-            logger.error(f"Error checking tickets in {db_file}: {e}")
+        store = get_ticket_store()
+        for ticket in store.for_user(interaction.user.id, ticket_type):
+            if interaction.guild.get_channel(ticket.channel_id) is not None:
+                await interaction.edit_original_response(
+                    content="You already have an open ticket for this type. Please close it before opening a new one."
+                )
+                return
 
         category = interaction.guild.get_channel(category_id)
         if category is None:
@@ -79,35 +70,33 @@ class TicketPanelView(discord.ui.View):
             developer_role: developer_overwrites
         }
 
-        try:
-            channel = await interaction.guild.create_text_channel(
-                name=channel_name,
-                category=category,
-                overwrites=overwrites
-            )
-        except Exception as e:
-            logger.error(f"Error creating channel: {e}")
-            await interaction.edit_original_response(content=f"Failed to create channel: {e}")
-            return
+        # A pre-created channel when the pool has one; otherwise create it (slow, rate-limited)
+        channel = None
+        pool = get_ticket_pool()
+        if pool.size > 0 and category_id == pool.category_id:
+            channel = await pool.claim(interaction.guild, channel_name, overwrites)
+        claimed = channel is not None
+        if channel is None:
+            try:
+                channel = await interaction.guild.create_text_channel(
+                    name=channel_name,
+                    category=category,
+                    overwrites=overwrites
+                )
+            except Exception as e:
+                logger.error(f"Error creating channel: {e}")
+                await interaction.edit_original_response(content=f"Failed to create channel: {e}")
+                return
 
         try:
-            conn = sqlite3.connect(db_file)
-            c = conn.cursor()
-            c.execute("""
-                CREATE TABLE IF NOT EXISTS tickets (
-                    user_id INTEGER,
-                    channel_id INTEGER,
-                    created TEXT
-                )
-            """)
-            c.execute("INSERT INTO tickets (user_id, channel_id, created) VALUES (?, ?, ?)",
-                      (interaction.user.id, channel.id, datetime.utcnow().isoformat()))
-            conn.commit()
-            conn.close()
+            ticket = store.register(channel.id, interaction.user.id, ticket_type)
         except Exception as e:
             logger.error(f"Error logging ticket: {e}")
             await interaction.edit_original_response(content=f"Failed to log ticket: {e}")
             return
+        if claimed:
+            # No channel-create event for a claimed channel; let the ticket listener greet
+            self.bot.dispatch("ticket_claimed", channel, ticket)
 
         await interaction.edit_original_response(content=f"Ticket created: {channel.mention}")
 
@@ -117,6 +106,15 @@ class TicketPanels(commands.Cog):
         self.ticket_panel_view = TicketPanelView(self.bot)
         self.bot.add_view(self.ticket_panel_view)
 
+    @commands.Cog.listener()
+    async def on_ready(self):
+        guild = self.bot.get_guild(config.GUILD_ID)
+        if guild is None:
+            return
+        pool = get_ticket_pool()
+        pool.prune(guild)
+        pool.replenish(guild)
+
     @commands.command()
     async def ticketpanel(self, ctx):
         """Sends a ticket panel with a dropdown to create tickets."""
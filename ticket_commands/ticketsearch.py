@@ -0,0 +1,102 @@
+import discord
+from discord.ext import commands, tasks
+import config
+import logging
+import time
+from services.ticket_archive import get_ticket_archive
+
+logger = logging.getLogger(__name__)
+
+RESULTS_PER_PAGE = 5
+FLUSH_INTERVAL_SECONDS = 10
+
+class TicketSearchView(discord.ui.View):
+    """Pages through search results, running one query per click."""
+
+    def __init__(self, author: discord.abc.User, query: str, total: int):
+        super().__init__(timeout=180)
+        self.author = author
+        self.query = query
+        self.page = 1
+        self.max_pages = max(1, -(-total // RESULTS_PER_PAGE))
+        self.message: discord.Message | None = None
+
+    def build_embed(self) -> discord.Embed:
+        started = time.perf_counter()
+        total, results = get_ticket_archive().search(
+            self.query, RESULTS_PER_PAGE, (self.page - 1) * RESULTS_PER_PAGE
+        )
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        embed = discord.Embed(title=f"Ticket search: {self.query}"[:256], color=config.EMBED_COLOR)
+        for t in results:
+            embed.add_field(
+                name=f"#{t.name} · {t.category}"[:256],
+                value=(
+                    f"<@{t.owner_id}> · closed <t:{t.closed_at}:d> · {t.message_count} messages · "
+                    f"{len(t.participants)} participants\n{t.snippet or '*(matched the ticket name)*'}"
+                )[:1024],
+                inline=False
+            )
+        embed.set_footer(text=f"Page {self.page} of {self.max_pages} · {total} tickets · {elapsed_ms:.1f} ms")
+        self.prev_button.disabled = self.page == 1
+        self.next_button.disabled = self.page == self.max_pages
+        return embed
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.author.id:
+            await interaction.response.send_message("You can't control this list.", ephemeral=True)
+            return False
+        return True
+
+    @discord.ui.button(label="< Previous", style=discord.ButtonStyle.primary)
+    async def prev_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page = max(1, self.page - 1)
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
+
+    @discord.ui.button(label="Next >", style=discord.ButtonStyle.primary)
+    async def next_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page = min(self.max_pages, self.page + 1)
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
+
+    async def on_timeout(self):
+        for item in self.children:
+            item.disabled = True
+        if self.message:
+            try:
+                await self.message.edit(view=self)
+            except discord.NotFound:
+                pass
+
+class TicketSearch(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.archive = get_ticket_archive()
+        self.flush_loop.start()
+
+    async def cog_unload(self):
+        self.flush_loop.cancel()
+        await self.archive.flush()
+
+    @tasks.loop(seconds=FLUSH_INTERVAL_SECONDS)
+    async def flush_loop(self):
+        await self.archive.flush()
+
+    @commands.command(name="ticketsearch")
+    async def ticketsearch(self, ctx: commands.Context, *, query: str):
+        """
+        Search the transcripts of closed tickets. Every word must match; the last one may be a prefix.
+        Only executable by members with the developer role (config.DEVELOPER_ROLE_ID).
+        """
+        if not ctx.guild or config.DEVELOPER_ROLE_ID not in [role.id for role in ctx.author.roles]:
+            await ctx.send("You are not authorized to use this command.")
+            return
+        total, _ = self.archive.search(query, 0)
+        if not total:
+            await ctx.send("No closed tickets match that search.")
+            return
+        view = TicketSearchView(ctx.author, query, total)
+        view.message = await ctx.send(embed=view.build_embed(), view=view)
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(TicketSearch(bot))
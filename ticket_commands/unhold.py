@@ -1,7 +1,8 @@
 import discord
 from discord.ext import commands
 import config
-import sqlite3
+from services.overwrites import apply_overwrites, copy_overwrites, load_member_overwrites
+from services.tickets import get_ticket_store
 
 class TicketUnhold(commands.Cog):
     def __init__(self, bot):
@@ -10,41 +11,42 @@ class TicketUnhold(commands.Cog):
     @commands.command(name="unhold")
     async def unhold_ticket(self, ctx):
         """
-        Reverts the hold on the ticket channel by re-enabling send_messages for all added users (not roles).
-        Also removes the channel id from tickethold.db.
+        Reverts the hold on the ticket channel by restoring the overwrites users (not roles) had before !hold.
+        Holds recorded without them fall back to re-enabling send_messages for all added users.
+        Also clears the hold in the ticket store.
         This command only works if executed in a channel whose category ID is in config.TICKET_CATEGORY_IDS.
         """
         if not ctx.channel.category or ctx.channel.category.id not in config.TICKET_CATEGORY_IDS:
             return
 
+        store = get_ticket_store()
+        saved = store.held_overwrites(ctx.channel.id)
+        previous = load_member_overwrites(saved) if saved else None
+        overwrites = copy_overwrites(ctx.channel)
         count = 0
-        for target, overwrite in ctx.channel.overwrites.items():
-            if isinstance(target, discord.Member):
-                new_overwrite = overwrite
-                new_overwrite.send_messages = True
-                try:
-                    await ctx.channel.set_permissions(target, overwrite=new_overwrite)
-                    count += 1
-                except Exception as e:
-                    embed = discord.Embed(
-                        title="Error",
-                        description=f"Failed to update permissions for {target.mention}: {e}",
-                        color=config.EMBED_COLOR
-                    )
-                    await ctx.send(embed=embed)
-                    continue
+        for target in list(overwrites):
+            if not isinstance(target, discord.Member):
+                continue
+            if previous is None:
+                overwrites[target].send_messages = True
+            elif target.id in previous:
+                overwrites[target] = previous[target.id]
+            else:
+                # Added while on hold; already has the access it was given
+                continue
+            count += 1
         try:
-            conn = sqlite3.connect("tickethold.db")
-            c = conn.cursor()
-            c.execute("""
-                CREATE TABLE IF NOT EXISTS ticket_hold (
-                    channel_id INTEGER PRIMARY KEY,
-                    hold_time TEXT
-                )
-            """)
-            c.execute("DELETE FROM ticket_hold WHERE channel_id = ?", (ctx.channel.id,))
-            conn.commit()
-            conn.close()
+            await apply_overwrites(ctx.channel, overwrites, reason=f"Ticket taken off hold by {ctx.author}")
+        except Exception as e:
+            embed = discord.Embed(
+                title="Error",
+                description=f"Failed to update permissions: {e}",
+                color=config.EMBED_COLOR
+            )
+            await ctx.send(embed=embed)
+            return
+        try:
+            store.unhold(ctx.channel.id)
         except Exception as e:
             embed = discord.Embed(
                 title="Database Error",
@@ -56,10 +58,10 @@ class TicketUnhold(commands.Cog):
 
         embed = discord.Embed(
             title="Ticket Unheld",
-            description=f"Ticket is now unheld. Re-enabled send messages for {count} user(s).",
+            description=f"Ticket is now unheld. Restored send messages for {count} user(s).",
             color=config.EMBED_COLOR
         )
         await ctx.send(embed=embed)
 
 async def setup(bot):
-    await bot.add_cog(TicketUnhold(bot))
\ No newline at end of file
+    await bot.add_cog(TicketUnhold(bot))